@@ -62,6 +62,10 @@ interface Thread {
 
 const WS_URL = WS_BASE;
 const API_URL = API_BASE;
+// Must stay below the server's WS_TYPING_TTL_SECONDS (default 6s).
+const TYPING_HEARTBEAT_MS = 2000;
+// How long a remote "typing" state is shown without a fresh update.
+const TYPING_DISPLAY_MS = 5000;
 
 // Stable, memoized child components to avoid remounts that can steal input focus
 const ThreadsList = React.memo(function ThreadsListComponent({
@@ -208,6 +212,28 @@ const ThreadsList = React.memo(function ThreadsListComponent({
   );
 });
 
+function normalizeMessage(m: any, threadId: string): Message {
+  return {
+    id: m.id?.toString?.() ?? m.id,
+    threadId:
+      m.threadId?.toString?.() ??
+      m.thread_id?.toString?.() ??
+      threadId,
+    senderId:
+      m.senderId?.toString?.() ??
+      m.sender_id?.toString?.() ??
+      m.sender?.id?.toString?.(),
+    content: m.content ?? "",
+    createdAt: m.createdAt ?? m.created_at ?? new Date().toISOString(),
+    sender: {
+      id: (m.sender?.id ?? m.senderId ?? m.sender_id)?.toString?.() ?? "",
+      name: m.sender?.name ?? m.sender_name ?? "",
+      email: m.sender?.email ?? "",
+      avatar: m.sender?.avatar ?? undefined,
+    },
+  };
+}
+
 const ChatWindow = React.memo(function ChatWindowComponent({
   activeThread,
   user,
@@ -215,6 +241,9 @@ const ChatWindow = React.memo(function ChatWindowComponent({
   currentThreadTypingUsers,
   messages,
   messagesLoading,
+  hasOlderMessages,
+  loadingOlderMessages,
+  onLoadOlderMessages,
   messagesEndRef,
   inputRef,
   newMessage,
@@ -228,6 +257,9 @@ const ChatWindow = React.memo(function ChatWindowComponent({
   currentThreadTypingUsers: User[];
   messages: Message[];
   messagesLoading: boolean;
+  hasOlderMessages: boolean;
+  loadingOlderMessages: boolean;
+  onLoadOlderMessages: () => void;
   messagesEndRef: React.RefObject<HTMLDivElement>;
   inputRef: React.RefObject<HTMLInputElement>;
   newMessage: string;
@@ -308,6 +340,20 @@ const ChatWindow = React.memo(function ChatWindowComponent({
               </div>
             ) : (
               <>
+                {hasOlderMessages && (
+                  <div className="flex justify-center">
+                    <Button
+                      variant="ghost"
+                      size="sm"
+                      onClick={onLoadOlderMessages}
+                      disabled={loadingOlderMessages}
+                    >
+                      {loadingOlderMessages
+                        ? "Loading..."
+                        : "Load older messages"}
+                    </Button>
+                  </div>
+                )}
                 {messages.map((message, index) => {
                   // ISSUE #2 FIX: Compare with both string and number
                   const isOwnMessage =
@@ -447,6 +493,11 @@ export default function ChatPage() {
   const inputRef = useRef<HTMLInputElement>(null);
   const queryClient = useQueryClient();
   const typingTimeoutRef = useRef<NodeJS.Timeout>();
+  // When "typing" was last sent; re-sent every TYPING_HEARTBEAT_MS while the
+  // input keeps changing so the server does not expire a long typing session.
+  const typingSentAtRef = useRef(0);
+  // One expiry timer per remote typist, reset by each update they send.
+  const typingExpiryRef = useRef<Map<string, NodeJS.Timeout>>(new Map());
   const [typingUsers, setTypingUsers] = useState<Set<string>>(new Set());
 
   const {
@@ -472,31 +523,42 @@ export default function ChatPage() {
       const res = await fetch(`${API_URL}/messages/${activeChatThread}`);
       if (!res.ok) throw new Error("Failed to fetch messages");
       const json = await res.json();
-      const normalized = (json?.messages || []).map((m: any) => ({
-        id: m.id?.toString?.() ?? m.id,
-        threadId:
-          m.threadId?.toString?.() ??
-          m.thread_id?.toString?.() ??
-          activeChatThread,
-        senderId:
-          m.senderId?.toString?.() ??
-          m.sender_id?.toString?.() ??
-          m.sender?.id?.toString?.(),
-        content: m.content ?? "",
-        createdAt: m.createdAt ?? m.created_at ?? new Date().toISOString(),
-        sender: {
-          id: (m.sender?.id ?? m.senderId ?? m.sender_id)?.toString?.() ?? "",
-          name: m.sender?.name ?? m.sender_name ?? "",
-          email: m.sender?.email ?? "",
-          avatar: m.sender?.avatar ?? undefined,
-        },
-      }));
-      return { messages: normalized };
+      return {
+        messages: (json?.messages || []).map((m: any) =>
+          normalizeMessage(m, activeChatThread),
+        ),
+        nextCursor: json?.nextCursor ?? null,
+      };
     },
     enabled: !!activeChatThread,
   });
 
   const messages: Message[] = messagesData?.messages || [];
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false);
+
+  const loadOlderMessages = useCallback(async () => {
+    const cursor = messagesData?.nextCursor;
+    if (!activeChatThread || !cursor) return;
+    setLoadingOlderMessages(true);
+    try {
+      const res = await fetch(
+        `${API_URL}/messages/${activeChatThread}?before=${cursor}`,
+      );
+      if (!res.ok) throw new Error("Failed to fetch messages");
+      const json = await res.json();
+      const older: Message[] = (json?.messages || []).map((m: any) =>
+        normalizeMessage(m, activeChatThread),
+      );
+      queryClient.setQueryData(["messages", activeChatThread], (old: any) => ({
+        messages: [...older, ...(old?.messages || [])],
+        nextCursor: json?.nextCursor ?? null,
+      }));
+    } catch (error) {
+      toast.error("Failed to load older messages");
+    } finally {
+      setLoadingOlderMessages(false);
+    }
+  }, [activeChatThread, messagesData?.nextCursor, queryClient]);
 
   const handleWebSocketMessage = useCallback(
     (data: any) => {
@@ -522,30 +584,72 @@ export default function ChatPage() {
               return old;
             }
 
+            // Our own echo replaces the optimistic copy it was sent as.
+            if (
+              data.message.clientId &&
+              old.messages.some((m: Message) => m.id === data.message.clientId)
+            ) {
+              return {
+                ...old,
+                messages: old.messages.map((m: Message) =>
+                  m.id === data.message.clientId ? data.message : m,
+                ),
+              };
+            }
+
             console.log("✅ Adding new message to cache");
-            return { messages: [...old.messages, data.message] };
+            return { ...old, messages: [...old.messages, data.message] };
           },
         );
-
-        // Invalidate to force re-render
-        queryClient.invalidateQueries({
-          queryKey: ["messages", data.message.threadId],
+      } else if (data.type === "message_persisted") {
+        // The message is durable: swap its provisional id for the stored one.
+        queryClient.setQueryData(["messages", data.threadId], (old: any) => {
+          if (!old) return old;
+          return {
+            ...old,
+            messages: old.messages.map((m: Message) =>
+              m.id === data.provisionalId || m.id === data.clientId
+                ? { ...m, id: data.id, createdAt: data.createdAt }
+                : m,
+            ),
+          };
         });
         refetchThreads();
+      } else if (data.type === "message_failed") {
+        queryClient.setQueryData(["messages", data.threadId], (old: any) => {
+          if (!old) return old;
+          return {
+            ...old,
+            messages: old.messages.filter(
+              (m: Message) =>
+                m.id !== data.provisionalId && m.id !== data.clientId,
+            ),
+          };
+        });
+        toast.error("Failed to send message");
       } else if (data.type === "thread_joined") {
         console.log("Joined thread:", data.thread_id);
       } else if (data.type === "user_typing") {
+        const expiry = typingExpiryRef.current.get(data.user_id);
+        if (expiry) {
+          clearTimeout(expiry);
+          typingExpiryRef.current.delete(data.user_id);
+        }
         if (data.is_typing) {
           setTypingUsers(
             (prev) => new Set(Array.from(prev).concat(data.user_id)),
           );
-          setTimeout(() => {
-            setTypingUsers((prev) => {
-              const next = new Set(prev);
-              next.delete(data.user_id);
-              return next;
-            });
-          }, 3000);
+          typingExpiryRef.current.set(
+            data.user_id,
+            setTimeout(() => {
+              typingExpiryRef.current.delete(data.user_id);
+              setTypingUsers((prev) => {
+                const next = new Set(prev);
+                next.delete(data.user_id);
+                return next;
+              });
+            }, TYPING_DISPLAY_MS),
+          );
         } else {
           setTypingUsers((prev) => {
             const next = new Set(prev);
@@ -587,9 +691,11 @@ export default function ChatPage() {
     }
   }, [isConnected, activeChatThread, sendWsMessage]);
 
+  // Follow new messages only; prepending older history keeps the position.
+  const lastMessageId = messages[messages.length - 1]?.id;
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages]);
+  }, [lastMessageId]);
 
   useEffect(() => {
     if (!searchParams) return;
@@ -654,7 +760,7 @@ export default function ChatPage() {
     // Immediately add to cache for instant UI update
     queryClient.setQueryData(["messages", activeChatThread], (old: any) => {
       if (!old) return { messages: [optimisticMessage] };
-      return { messages: [...old.messages, optimisticMessage] };
+      return { ...old, messages: [...old.messages, optimisticMessage] };
     });
 
     // Clear input immediately
@@ -675,6 +781,7 @@ export default function ChatPage() {
       type: "send_message",
       thread_id: activeChatThread,
       content: messageContent,
+      client_id: tempId,
     });
 
     if (success) {
@@ -686,6 +793,7 @@ export default function ChatPage() {
       queryClient.setQueryData(["messages", activeChatThread], (old: any) => {
         if (!old) return { messages: [] };
         return {
+          ...old,
           messages: old.messages.filter((m: Message) => m.id !== tempId),
         };
       });
@@ -699,9 +807,14 @@ export default function ChatPage() {
 
     if (!isConnected || !activeChatThread) return;
 
-    // Send typing indicator only once when user starts typing
-    if (!isTyping && value.length > 0) {
+    // Send typing indicator when user starts typing, then as a heartbeat
+    // while they keep going
+    if (
+      value.length > 0 &&
+      (!isTyping || Date.now() - typingSentAtRef.current >= TYPING_HEARTBEAT_MS)
+    ) {
       setIsTyping(true);
+      typingSentAtRef.current = Date.now();
       sendWsMessage({
         type: "typing",
         thread_id: activeChatThread,
@@ -773,6 +886,9 @@ export default function ChatPage() {
             currentThreadTypingUsers={currentThreadTypingUsers}
             messages={messages}
             messagesLoading={messagesLoading}
+            hasOlderMessages={!!messagesData?.nextCursor}
+            loadingOlderMessages={loadingOlderMessages}
+            onLoadOlderMessages={loadOlderMessages}
             messagesEndRef={messagesEndRef}
             inputRef={inputRef}
             newMessage={newMessage}
@@ -805,6 +921,9 @@ export default function ChatPage() {
             currentThreadTypingUsers={currentThreadTypingUsers}
             messages={messages}
             messagesLoading={messagesLoading}
+            hasOlderMessages={!!messagesData?.nextCursor}
+            loadingOlderMessages={loadingOlderMessages}
+            onLoadOlderMessages={loadOlderMessages}
             messagesEndRef={messagesEndRef}
             inputRef={inputRef}
             newMessage={newMessage}
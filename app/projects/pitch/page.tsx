@@ -3,6 +3,7 @@
 
 import { useState } from "react";
 import { useRouter } from "next/navigation";
+import { useQueryClient } from "@tanstack/react-query";
 import { useAuthStore } from "@/store/auth-store";
 import { Card, CardHeader, CardContent } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
@@ -12,10 +13,11 @@ import { Textarea } from "@/components/ui/textarea";
 import { toast } from "sonner";
 import { ArrowLeft } from "lucide-react";
 import Link from "next/link";
-import { createProject } from "@/lib/api/projects";
+import { createProject, waitForRecommendationJob } from "@/lib/api/projects";
 
 export default function PitchProjectPage() {
   const router = useRouter();
+  const queryClient = useQueryClient();
   const { user } = useAuthStore();
   const [title, setTitle] = useState("");
   const [description, setDescription] = useState("");
@@ -29,6 +31,37 @@ export default function PitchProjectPage() {
     return null;
   }
 
+  // Matching runs as a background job; keep the owner informed and refresh
+  // their pitched-project matches once it finishes. This outlives the
+  // redirect below, so it only touches the toast and the query cache.
+  const trackRecommendations = async (jobId: string) => {
+    const toastId = toast.loading("Finding collaborators for your project...");
+    try {
+      const job = await waitForRecommendationJob(jobId);
+      if (job.status === "completed") {
+        queryClient.invalidateQueries({ queryKey: ["pitch-matches"] });
+        toast.success(
+          job.matchCount
+            ? `Found ${job.matchCount} potential collaborator${job.matchCount === 1 ? "" : "s"}`
+            : "No matching collaborators yet - we'll keep looking",
+          {
+            id: toastId,
+            action: { label: "View", onClick: () => router.push("/profile") },
+          },
+        );
+      } else if (job.status === "failed") {
+        toast.error("Couldn't generate recommendations for your project", { id: toastId });
+      } else {
+        toast.info("Recommendations are still being generated; check your profile shortly", {
+          id: toastId,
+        });
+      }
+    } catch (error) {
+      console.error("Error checking recommendation job:", error);
+      toast.dismiss(toastId);
+    }
+  };
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
 
@@ -73,8 +106,11 @@ export default function PitchProjectPage() {
         roles_available: parseInt(rolesAvailable) || 0,
       });
 
-      toast.success("Project created successfully! Recommendations generated.");
-      console.debug("Created project", response.project, response.matches);
+      toast.success("Project created successfully!");
+      console.debug("Created project", response.project, response.recommendationJob);
+      if (response.recommendationJob) {
+        trackRecommendations(response.recommendationJob.jobId);
+      }
 
       setTitle("");
       setDescription("");
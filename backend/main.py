@@ -1,17 +1,33 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Dict, Set, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Iterable, Set, List, Optional, Tuple
+import asyncio
+import bisect
+import heapq
 import json
+import select
+import uuid
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from contextlib import asynccontextmanager
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import RealDictCursor, execute_values
+from contextlib import asynccontextmanager, contextmanager
 from pydantic import BaseModel, validator
 import time
 import os
+import threading
 from pathlib import Path
+from anyio import to_thread
+
+try:
+    import numpy as np
+except ImportError:  # vectorized scoring is optional; rank_candidates falls back to Python
+    np = None
 
 # Load .env from project root so DATABASE_URL matches Next.js (e.g. .env.local)
 _env_path = Path(__file__).resolve().parent.parent / ".env.local"
@@ -31,9 +47,45 @@ else:
             pass
 
 
-def get_db_connection():
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_skill_limits(name: str) -> Dict[str, int]:
+    """Parse a JSON object of skill -> positive int, skipping invalid entries."""
+    raw = os.getenv(name)
+    if not raw:
+        return {}
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        print(f"⚠️  {name} is not valid JSON; ignoring it")
+        return {}
+    if not isinstance(parsed, dict):
+        print(f"⚠️  {name} must be a JSON object; ignoring it")
+        return {}
+    limits = {}
+    for skill, limit in parsed.items():
+        if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0 or not str(skill).strip():
+            print(f"⚠️  {name}: ignoring {skill!r} -> {limit!r} (expected a positive integer)")
+            continue
+        limits[str(skill).strip().lower()] = limit
+    return limits
+
+
+def _connect_raw():
     """
-    Centralized database connection helper.
+    Open a new physical database connection.
 
     Prefer DATABASE_URL so the FastAPI backend shares the same database
     configuration as the Next.js app. Falls back to local defaults if the
@@ -52,23 +104,728 @@ def get_db_connection():
     )
 
 
-# Simple in-memory cache for analytics
-analytics_cache = {}
-CACHE_DURATION = 300  # 5 minutes
+class PooledConnection:
+    """Thin proxy around a pooled connection; close() hands it back to the pool."""
+
+    def __init__(self, pool: "ConnectionPool", conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise AttributeError(name)
+        return getattr(conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.putconn(conn)
+
+    def __del__(self):
+        # Safety net for handlers that raise before reaching close(): the
+        # connection may be mid-transaction, so drop it instead of reusing it.
+        conn = self.__dict__.get("_conn")
+        if conn is not None:
+            self._conn = None
+            try:
+                self._pool.putconn(conn, discard=True)
+            except Exception:
+                pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    Keeps between ``min_size`` and ``max_size`` physical connections, checks
+    connections that sat idle longer than ``health_check_interval`` before
+    handing them out, and recycles idle connections above ``min_size`` once they
+    exceed ``idle_timeout``. Callers that find the pool exhausted wait up to
+    ``timeout`` seconds for a connection to be returned.
+    """
+
+    def __init__(
+        self,
+        connect,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+    ):
+        self._connect = connect
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = deque()  # (connection, last_used) pairs, most recent at the right
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "idle_recycled": 0,
+            "health_check_failures": 0,
+        }
+
+    def open(self):
+        """Pre-open ``min_size`` connections so the first requests don't pay for them."""
+        with self._cond:
+            self._closed = False
+            missing = self.min_size - self._size
+            self._size += max(0, missing)
+        for _ in range(max(0, missing)):
+            try:
+                conn = self._new_connection()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def getconn(self):
+        """Check out a connection, waiting for one to be returned if the pool is full."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            conn = None
+            stale = []
+            with self._cond:
+                while True:
+                    stale.extend(self._evict_idle_locked())
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        last_used = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise HTTPException(
+                            status_code=503, detail="Database connection pool exhausted"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+            for stale_conn in stale:
+                self._close_quietly(stale_conn)
+
+            if conn is None:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn, last_used):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                    self._size -= 1
+                    self._cond.notify()
+                self._close_quietly(conn)
+                continue
+
+            with self._cond:
+                self._stats["checkouts"] += 1
+                if waited:
+                    wait_time = time.monotonic() - started
+                    self._stats["waits"] += 1
+                    self._stats["wait_time_total"] += wait_time
+                    self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+            return conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection; anything left mid-transaction is rolled back first."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        with self._cond:
+            if discard or self._closed or conn.closed:
+                self._size -= 1
+                close_conn = True
+            else:
+                self._idle.append((conn, time.monotonic()))
+                close_conn = False
+            self._cond.notify()
+        if close_conn:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update(
+                {
+                    "min_size": self.min_size,
+                    "max_size": self.max_size,
+                    "size": self._size,
+                    "idle": len(self._idle),
+                    "in_use": self._size - len(self._idle),
+                }
+            )
+        checkouts = snapshot["checkouts"]
+        snapshot["avg_wait_time"] = (
+            snapshot["wait_time_total"] / snapshot["waits"] if snapshot["waits"] else 0.0
+        )
+        snapshot["wait_ratio"] = snapshot["waits"] / checkouts if checkouts else 0.0
+        return snapshot
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._cond:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _evict_idle_locked(self):
+        """Pop idle connections past ``idle_timeout`` while keeping ``min_size`` open."""
+        if not self.idle_timeout:
+            return []
+        now = time.monotonic()
+        evicted = []
+        # Oldest connections sit at the left of the deque.
+        while self._idle and self._size > self.min_size:
+            conn, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._stats["idle_recycled"] += 1
+            evicted.append(conn)
+        return evicted
+
+    def _is_healthy(self, conn, last_used: Optional[float]) -> bool:
+        if conn.closed:
+            return False
+        if last_used is None or time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["connections_closed"] += 1
+
+
+db_pool = ConnectionPool(
+    _connect_raw,
+    min_size=_env_int("DB_POOL_MIN_SIZE", 1),
+    max_size=_env_int("DB_POOL_MAX_SIZE", 10),
+    timeout=_env_float("DB_POOL_TIMEOUT", 30.0),
+    idle_timeout=_env_float("DB_POOL_IDLE_TIMEOUT", 300.0),
+    health_check_interval=_env_float("DB_POOL_HEALTH_CHECK_INTERVAL", 30.0),
+)
+
+# Route handlers that touch the database are plain ``def`` functions, so FastAPI
+# runs them on Starlette's worker threads; the WebSocket loop offloads its
+# queries with ``run_in_threadpool``. Both share this bounded thread limiter,
+# which keeps slow queries off the event loop without spawning unbounded threads.
+DB_THREADPOOL_SIZE = _env_int("DB_THREADPOOL_SIZE", 40)
+
+
+def configure_db_threadpool():
+    to_thread.current_default_thread_limiter().total_tokens = max(1, DB_THREADPOOL_SIZE)
+
+
+def get_db_connection():
+    """
+    Centralized database connection helper.
+
+    Checks a connection out of the shared pool. Calling ``close()`` on the
+    returned connection hands it back to the pool instead of closing the socket.
+    """
+    return PooledConnection(db_pool, db_pool.getconn())
+
+
+@contextmanager
+def db_connection():
+    """Context manager that checks out a pooled connection and always returns it."""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_db():
+    """FastAPI dependency yielding a pooled connection for the lifetime of a request."""
+    with db_connection() as conn:
+        yield conn
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL.
+
+    Holds at most ``max_entries`` values; the least recently used entry is
+    evicted first. Entries past their TTL are still returned by ``lookup`` as
+    stale for another ``stale_ttl`` seconds and dropped when read after that.
+    Used as the default analytics cache and as the stand-in for
+    ``PostgresCache`` in tests.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 300.0, stale_ttl: float = 0.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.stale_ttl = max(0.0, stale_ttl)
+        self._entries = OrderedDict()  # key -> (value, expires_at), most recent at the end
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def init_storage(self):
+        pass
+
+    def lookup(self, key: str) -> Optional[Tuple[object, bool]]:
+        """Return ``(value, fresh)``, or ``None`` when the key is missing or past its stale window."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            value, expires_at = entry
+            now = time.monotonic()
+            if expires_at + self.stale_ttl <= now:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            fresh = expires_at > now
+            self._stats["hits" if fresh else "stale_hits"] += 1
+            return value, fresh
+
+    def get(self, key: str):
+        entry = self.lookup(key)
+        return entry[0] if entry and entry[1] else None
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._stats["sets"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return _cache_stats(self._stats, "memory", len(self._entries), self.max_entries, self.ttl)
+
+
+class PostgresCache:
+    """
+    LRU/TTL cache shared by every worker process through an UNLOGGED table.
+
+    Reads bump ``accessed_at`` so eviction can drop the least recently used
+    rows; every ``prune_every`` writes, expired rows and rows beyond
+    ``max_entries`` are deleted. Cache errors are logged and treated as misses
+    so a cache outage never fails the request. Hit/miss counters are per process.
+    """
+
+    def __init__(
+        self,
+        connect,
+        table: str = "analytics_cache",
+        max_entries: int = 1000,
+        ttl: float = 300.0,
+        stale_ttl: float = 0.0,
+        prune_every: int = 100,
+    ):
+        self._connect = connect
+        self.table = table
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.stale_ttl = max(0.0, stale_ttl)
+        self.prune_every = max(1, prune_every)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _execute(self, query: str, params=None, fetch: bool = False):
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                row = cursor.fetchone() if fetch else None
+                rowcount = cursor.rowcount
+                conn.commit()
+                cursor.close()
+            return row, rowcount
+        except psycopg2.Error as e:
+            print(f"Cache query on {self.table} failed: {e}")
+            self._count("errors")
+            return None, 0
+
+    def init_storage(self):
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                CREATE UNLOGGED TABLE IF NOT EXISTS {self.table} (
+                    cache_key TEXT PRIMARY KEY,
+                    value JSONB NOT NULL,
+                    expires_at TIMESTAMPTZ NOT NULL,
+                    accessed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed_at ON {self.table} (accessed_at)"
+            )
+            conn.commit()
+            cursor.close()
+
+    def lookup(self, key: str) -> Optional[Tuple[object, bool]]:
+        """Return ``(value, fresh)``, or ``None`` when the key is missing or past its stale window."""
+        row, _ = self._execute(
+            f"""
+            UPDATE {self.table}
+            SET accessed_at = CURRENT_TIMESTAMP
+            WHERE cache_key = %s
+              AND expires_at > CURRENT_TIMESTAMP - make_interval(secs => %s)
+            RETURNING value, expires_at > CURRENT_TIMESTAMP
+        """,
+            (key, self.stale_ttl),
+            fetch=True,
+        )
+        if row is None:
+            self._count("misses")
+            return None
+        value, fresh = row[0], bool(row[1])
+        self._count("hits" if fresh else "stale_hits")
+        return value, fresh
+
+    def get(self, key: str):
+        entry = self.lookup(key)
+        return entry[0] if entry and entry[1] else None
+
+    def set(self, key: str, value):
+        self._execute(
+            f"""
+            INSERT INTO {self.table} (cache_key, value, expires_at)
+            VALUES (%s, %s::jsonb, CURRENT_TIMESTAMP + make_interval(secs => %s))
+            ON CONFLICT (cache_key) DO UPDATE
+            SET value = EXCLUDED.value,
+                expires_at = EXCLUDED.expires_at,
+                accessed_at = CURRENT_TIMESTAMP
+        """,
+            (key, json.dumps(value, default=str), self.ttl),
+        )
+        with self._lock:
+            self._stats["sets"] += 1
+            self._writes_since_prune += 1
+            prune = self._writes_since_prune >= self.prune_every
+            if prune:
+                self._writes_since_prune = 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        _, expired = self._execute(
+            f"""
+            DELETE FROM {self.table}
+            WHERE expires_at <= CURRENT_TIMESTAMP - make_interval(secs => %s)
+        """,
+            (self.stale_ttl,),
+        )
+        _, evicted = self._execute(
+            f"""
+            DELETE FROM {self.table}
+            WHERE cache_key IN (
+                SELECT cache_key FROM {self.table}
+                ORDER BY accessed_at DESC
+                OFFSET %s
+            )
+        """,
+            (self.max_entries,),
+        )
+        self._count("expirations", max(expired, 0))
+        self._count("evictions", max(evicted, 0))
+
+    def delete(self, *keys: str):
+        if not keys:
+            return
+        _, deleted = self._execute(f"DELETE FROM {self.table} WHERE cache_key = ANY(%s)", (list(keys),))
+        self._count("invalidations", max(deleted, 0))
+
+    def clear(self):
+        self._execute(f"TRUNCATE {self.table}")
+
+    def stats(self) -> dict:
+        row, _ = self._execute(f"SELECT COUNT(*) FROM {self.table}", fetch=True)
+        with self._lock:
+            return _cache_stats(self._stats, "postgres", row[0] if row else None, self.max_entries, self.ttl)
+
+
+def _cache_stats(counters: dict, backend: str, size, max_entries: int, ttl: float) -> dict:
+    lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+    return {
+        "backend": backend,
+        "size": size,
+        "max_entries": max_entries,
+        "ttl_seconds": ttl,
+        **counters,
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+    }
+
+
+def make_analytics_cache():
+    backend = os.getenv("ANALYTICS_CACHE_BACKEND", "memory").lower()
+    max_entries = _env_int("ANALYTICS_CACHE_MAX_ENTRIES", 1000)
+    ttl = _env_float("ANALYTICS_CACHE_TTL_SECONDS", 300.0)
+    stale_ttl = _env_float("ANALYTICS_CACHE_STALE_SECONDS", 300.0)
+    if backend == "postgres":
+        return PostgresCache(get_db_connection, max_entries=max_entries, ttl=ttl, stale_ttl=stale_ttl)
+    if backend != "memory":
+        print(f"⚠️  Unknown ANALYTICS_CACHE_BACKEND '{backend}', using the in-memory cache")
+    return TTLCache(max_entries=max_entries, ttl=ttl, stale_ttl=stale_ttl)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs ``fn``; callers that arrive while it is
+    running wait and receive its result (or exception) instead of repeating
+    the work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, dict] = {}
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+                self._stats["executions"] += 1
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as exc:
+            call["error"] = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
+
+
+class CachedLoader:
+    """
+    Read-through cache with single-flight loads and stale-while-revalidate.
+
+    A fresh hit is returned directly. A stale hit (past the cache TTL but
+    within its stale window) is returned immediately while one background
+    thread reloads it. A miss loads through ``SingleFlight`` so a burst of
+    identical requests runs ``load`` once. Keys invalidated while a load is in
+    flight are not left holding the pre-invalidation result.
+    """
+
+    def __init__(self, cache, load, key=str):
+        self.cache = cache
+        self._load = load
+        self._key = key
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, bool] = {}  # key -> invalidated while loading
+        self._refreshing: Set[str] = set()  # keys with a background refresh claimed
+        self._stats = {"stale_served": 0, "revalidations": 0, "revalidation_errors": 0}
+
+    def get(self, arg):
+        key = self._key(arg)
+        entry = self.cache.lookup(key)
+        if entry is not None:
+            value, fresh = entry
+            if not fresh:
+                with self._lock:
+                    self._stats["stale_served"] += 1
+                self._revalidate(key, arg)
+            return value
+        return self._flight.do(key, lambda: self._load_and_store(key, arg))
+
+    def invalidate(self, *args):
+        keys = [self._key(arg) for arg in args]
+        with self._lock:
+            for key in keys:
+                if key in self._loading:
+                    self._loading[key] = True
+        self.cache.delete(*keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {**self._stats, "refreshing": len(self._refreshing)}
+        return {**stats, **self._flight.stats()}
+
+    def _load_and_store(self, key: str, arg):
+        with self._lock:
+            self._loading[key] = False
+        try:
+            value = self._load(arg)
+            self.cache.set(key, value)
+            with self._lock:
+                invalidated = self._loading[key]
+            if invalidated:
+                self.cache.delete(key)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    def _revalidate(self, key: str, arg):
+        # Claim the key before starting the thread so concurrent stale hits
+        # start one refresh between them.
+        with self._lock:
+            if key in self._refreshing or self._flight.in_flight(key):
+                return
+            self._refreshing.add(key)
+            self._stats["revalidations"] += 1
+        try:
+            threading.Thread(
+                target=self._revalidate_worker, args=(key, arg), name=f"revalidate-{key}", daemon=True
+            ).start()
+        except Exception:
+            with self._lock:
+                self._refreshing.discard(key)
+            raise
+
+    def _revalidate_worker(self, key: str, arg):
+        try:
+            # Another caller may have reloaded or invalidated the key since
+            # the stale hit; only a still-stale entry is worth loading.
+            entry = self.cache.lookup(key)
+            if entry is None or entry[1]:
+                return
+            self._flight.do(key, lambda: self._load_and_store(key, arg))
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {e}")
+            with self._lock:
+                self._stats["revalidation_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+analytics_cache = make_analytics_cache()
+
+
+def analytics_cache_key(user_id: int) -> str:
+    return f"analytics_{user_id}"
+
+
+# compute_user_analytics is defined with the analytics endpoint further down.
+analytics_loader = CachedLoader(
+    analytics_cache, lambda user_id: compute_user_analytics(user_id), key=analytics_cache_key
+)
+
 
 def get_cached_analytics(user_id: int):
     """Get cached analytics if available and not expired"""
-    cache_key = f"analytics_{user_id}"
-    if cache_key in analytics_cache:
-        cached_data, timestamp = analytics_cache[cache_key]
-        if time.time() - timestamp < CACHE_DURATION:
-            return cached_data
-    return None
+    return analytics_loader.cache.get(analytics_cache_key(user_id))
+
 
 def cache_analytics(user_id: int, data):
     """Cache analytics data"""
-    cache_key = f"analytics_{user_id}"
-    analytics_cache[cache_key] = (data, time.time())
+    analytics_loader.cache.set(analytics_cache_key(user_id), data)
+
+
+def invalidate_analytics(*user_ids: Optional[int]):
+    """Drop cached analytics for users whose engagement, ratings or matches changed."""
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if user_ids:
+        analytics_loader.invalidate(*user_ids)
 
 
 # Simple authentication for development
@@ -122,21 +879,147 @@ def init_chat_tables():
 
     cursor.execute(
         """
-        CREATE TABLE IF NOT EXISTS message_reads (
-            message_id INTEGER REFERENCES messages(message_id),
-            user_id INTEGER REFERENCES users(user_id),
-            read_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (message_id, user_id)
-        )
+        CREATE INDEX IF NOT EXISTS idx_messages_thread_created
+        ON messages (thread_id, created_at, message_id)
     """
     )
 
+    init_thread_summary_columns(cursor)
+
     conn.commit()
     cursor.close()
     conn.close()
     print("Chat tables initialized")
 
 
+# Serializes the thread summary migration across workers starting together.
+THREAD_SUMMARY_MIGRATION_LOCK = 7_301_018
+
+
+def init_thread_summary_columns(cursor):
+    """
+    Denormalized inbox state: each thread's latest message, and for each
+    participant a read watermark (the newest message_id they have read) plus
+    the unread count past it. ``persist_chat_messages`` and
+    ``mark_message_read`` keep these current so ``get_user_threads`` needs no
+    per-thread scans. The watermark replaces the per-message ``message_reads``
+    table, which is folded into it on first migration and left in place
+    until ``drop_message_reads`` is run. Workers starting together take an
+    advisory lock, so only the first one backfills.
+    """
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (THREAD_SUMMARY_MIGRATION_LOCK,))
+    cursor.execute(
+        """
+        SELECT NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'thread_participants' AND column_name = 'last_read_message_id'
+        ),
+        to_regclass('message_reads') IS NOT NULL
+    """
+    )
+    needs_backfill, has_message_reads = cursor.fetchone()
+
+    cursor.execute(
+        """
+        ALTER TABLE chat_threads
+        ADD COLUMN IF NOT EXISTS last_message_id INTEGER REFERENCES messages(message_id)
+        """
+    )
+    cursor.execute(
+        """
+        ALTER TABLE thread_participants
+        ADD COLUMN IF NOT EXISTS unread_count INTEGER NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS last_read_message_id INTEGER NOT NULL DEFAULT 0
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_thread_participants_user
+        ON thread_participants (user_id)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_messages_thread_message
+        ON messages (thread_id, message_id)
+    """
+    )
+
+    if needs_backfill:
+        cursor.execute(
+            """
+            UPDATE chat_threads t
+            SET last_message_id = (
+                SELECT m.message_id
+                FROM messages m
+                WHERE m.thread_id = t.thread_id
+                ORDER BY m.created_at DESC, m.message_id DESC
+                LIMIT 1
+            )
+        """
+        )
+        if has_message_reads:
+            cursor.execute(
+                """
+                UPDATE thread_participants tp
+                SET last_read_message_id = latest.message_id
+                FROM (
+                    SELECT m.thread_id, mr.user_id, MAX(m.message_id) AS message_id
+                    FROM message_reads mr
+                    JOIN messages m ON m.message_id = mr.message_id
+                    GROUP BY m.thread_id, mr.user_id
+                ) latest
+                WHERE tp.thread_id = latest.thread_id
+                  AND tp.user_id = latest.user_id
+            """
+            )
+        cursor.execute(
+            """
+            UPDATE thread_participants tp
+            SET unread_count = (
+                SELECT COUNT(*)
+                FROM messages m
+                WHERE m.thread_id = tp.thread_id
+                  AND m.message_id > tp.last_read_message_id
+                  AND m.sender_id != tp.user_id
+            )
+        """
+        )
+
+
+def drop_message_reads(cursor) -> dict:
+    """
+    Drop the retired ``message_reads`` table once the watermarks cover it.
+
+    Refuses (and drops nothing) if any participant's watermark is behind a
+    message they have a read row for, i.e. the backfill did not run or did
+    not finish. The caller commits.
+    """
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (THREAD_SUMMARY_MIGRATION_LOCK,))
+    cursor.execute("SELECT to_regclass('message_reads') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return {"dropped": False, "behind": 0}
+    cursor.execute(
+        """
+        SELECT COUNT(*)
+        FROM (
+            SELECT m.thread_id, mr.user_id, MAX(m.message_id) AS message_id
+            FROM message_reads mr
+            JOIN messages m ON m.message_id = mr.message_id
+            GROUP BY m.thread_id, mr.user_id
+        ) latest
+        JOIN thread_participants tp
+          ON tp.thread_id = latest.thread_id AND tp.user_id = latest.user_id
+        WHERE tp.last_read_message_id < latest.message_id
+    """
+    )
+    behind = cursor.fetchone()[0]
+    if behind:
+        return {"dropped": False, "behind": behind}
+    cursor.execute("DROP TABLE IF EXISTS message_reads")
+    return {"dropped": True, "behind": 0}
+
+
 def init_rating_tables():
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -198,656 +1081,3648 @@ def init_feedback_learning_tables():
         """
     )
 
+    # Composite score of automated matches, so incremental updates can tell
+    # whether a rescored candidate beats the weakest match on a skill's slate
+    cursor.execute(
+        """
+        ALTER TABLE project_matches
+        ADD COLUMN IF NOT EXISTS composite_score NUMERIC(6,2)
+        """
+    )
+
     conn.commit()
     cursor.close()
     conn.close()
     print("Feedback learning tables initialized")
 
 
-ENGAGEMENT_POINTS = {
-    "pitch_project": 10,
-    "apply_collaboration": 5,
-    "owner_acceptance": 2,
-}
-
-DEFAULT_SKILL_BUCKET = "general"
-RECOMMENDATION_WEIGHTS = {
-    "skill": 0.5,
-    "engagement": 0.15,
-    "rating": 0.15,
-    "feedback": 0.2,
-}
-
-
-def clamp(value: float, min_value: float, max_value: float) -> float:
-    return max(min_value, min(max_value, value))
-
-
-def get_feedback_skill_bucket(required_skill: Optional[str]) -> str:
-    if required_skill and required_skill.strip():
-        return required_skill.strip().lower()
-    return DEFAULT_SKILL_BUCKET
-
+def init_skill_index_tables():
+    conn = get_db_connection()
+    cursor = conn.cursor()
 
-def upsert_feedback_stat(cursor, user_id: int, skill_bucket: str, accepted: bool):
-    if not user_id:
-        return
-    accepted_increment = 1 if accepted else 0
-    rejected_increment = 0 if accepted else 1
+    # skills_updated_at lets the in-memory skill index pick up skill edits made
+    # by any writer (Next.js onboarding/profile routes included) with a delta query.
     cursor.execute(
         """
-        INSERT INTO user_feedback_stats (
-            user_id,
-            skill,
-            total_recommendations,
-            accepted_count,
-            rejected_count,
-            accept_rate,
-            last_feedback_at
-        )
-        VALUES (%s, %s, 1, %s, %s, %s, CURRENT_TIMESTAMP)
-        ON CONFLICT (user_id, skill) DO UPDATE SET
-            total_recommendations = user_feedback_stats.total_recommendations + 1,
-            accepted_count = user_feedback_stats.accepted_count + EXCLUDED.accepted_count,
-            rejected_count = user_feedback_stats.rejected_count + EXCLUDED.rejected_count,
-            accept_rate = (
-                user_feedback_stats.accepted_count + EXCLUDED.accepted_count
-            )::numeric(5,4) / (user_feedback_stats.total_recommendations + 1),
-            last_feedback_at = CURRENT_TIMESTAMP
-    """,
-        (
-            user_id,
-            skill_bucket,
-            accepted_increment,
-            rejected_increment,
-            accepted_increment,
-        ),
+        ALTER TABLE users
+        ADD COLUMN IF NOT EXISTS skills_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_users_skills_updated_at
+        ON users (skills_updated_at)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION touch_user_skills_updated_at()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' OR NEW.skills IS DISTINCT FROM OLD.skills THEN
+                NEW.skills_updated_at := CURRENT_TIMESTAMP;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+    )
+    cursor.execute("DROP TRIGGER IF EXISTS users_skills_updated_at ON users")
+    cursor.execute(
+        """
+        CREATE TRIGGER users_skills_updated_at
+            BEFORE INSERT OR UPDATE OF skills ON users
+            FOR EACH ROW
+            EXECUTE PROCEDURE touch_user_skills_updated_at()
+    """
     )
 
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print("Skill index tables initialized")
 
-def record_feedback_signal(cursor, user_id: Optional[int], required_skill: Optional[str], accepted: bool):
-    if not user_id:
-        return
-    skill_bucket = get_feedback_skill_bucket(required_skill)
-    upsert_feedback_stat(cursor, user_id, skill_bucket, accepted)
 
+def init_analytics_rollup_tables():
+    conn = get_db_connection()
+    cursor = conn.cursor()
 
-def load_feedback_stats(cursor, user_ids: List[int]) -> Dict[Tuple[int, str], float]:
-    if not user_ids:
-        return {}
-    unique_ids = list({uid for uid in user_ids if uid})
-    if not unique_ids:
-        return {}
+    cursor.execute("SELECT to_regclass('user_engagement_daily') IS NULL")
+    needs_backfill = cursor.fetchone()[0]
+
+    # Per-user rollups behind the analytics charts. ``entries`` counts the raw
+    # rows in each bucket so a bucket whose rows were all deleted is skipped
+    # the same way an empty GROUP BY group would be.
     cursor.execute(
         """
-        SELECT user_id, skill, accept_rate
-        FROM user_feedback_stats
-        WHERE user_id = ANY(%s)
-    """,
-        (unique_ids,),
+        CREATE TABLE IF NOT EXISTS user_engagement_daily (
+            user_id INT NOT NULL,
+            day DATE NOT NULL,
+            points BIGINT NOT NULL DEFAULT 0,
+            entries INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        )
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_rating_monthly (
+            user_id INT NOT NULL,
+            month DATE NOT NULL,
+            score_sum NUMERIC NOT NULL DEFAULT 0,
+            score_count INT NOT NULL DEFAULT 0,
+            entries INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, month)
+        )
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_collaboration_daily (
+            user_id INT NOT NULL,
+            day DATE NOT NULL,
+            projects INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        )
+    """
     )
-    stats_map: Dict[Tuple[int, str], float] = {}
-    for row in cursor.fetchall():
-        key = (row["user_id"], row["skill"])
-        stats_map[key] = float(row["accept_rate"] or 0.0)
-    return stats_map
 
+    # Row triggers keep the rollups in the same transaction as every write,
+    # including add_engagement_points, rating submission, collaboration sync,
+    # cascaded deletes and writes made outside this service.
+    cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION rollup_engagement_daily()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.user_id IS NOT NULL AND OLD.timestamp IS NOT NULL THEN
+                UPDATE user_engagement_daily
+                SET points = points - COALESCE(OLD.points, 0), entries = entries - 1
+                WHERE user_id = OLD.user_id AND day = DATE(OLD.timestamp);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.user_id IS NOT NULL AND NEW.timestamp IS NOT NULL THEN
+                INSERT INTO user_engagement_daily (user_id, day, points, entries)
+                VALUES (NEW.user_id, DATE(NEW.timestamp), COALESCE(NEW.points, 0), 1)
+                ON CONFLICT (user_id, day) DO UPDATE
+                SET points = user_engagement_daily.points + EXCLUDED.points,
+                    entries = user_engagement_daily.entries + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+    )
+    cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION rollup_rating_monthly()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.ratee_id IS NOT NULL
+               AND OLD.status = 'completed' AND OLD.completed_at IS NOT NULL THEN
+                UPDATE user_rating_monthly
+                SET score_sum = score_sum - COALESCE(OLD.score, 0),
+                    score_count = score_count - (OLD.score IS NOT NULL)::int,
+                    entries = entries - 1
+                WHERE user_id = OLD.ratee_id AND month = DATE_TRUNC('month', OLD.completed_at)::date;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.ratee_id IS NOT NULL
+               AND NEW.status = 'completed' AND NEW.completed_at IS NOT NULL THEN
+                INSERT INTO user_rating_monthly (user_id, month, score_sum, score_count, entries)
+                VALUES (
+                    NEW.ratee_id,
+                    DATE_TRUNC('month', NEW.completed_at)::date,
+                    COALESCE(NEW.score, 0),
+                    (NEW.score IS NOT NULL)::int,
+                    1
+                )
+                ON CONFLICT (user_id, month) DO UPDATE
+                SET score_sum = user_rating_monthly.score_sum + EXCLUDED.score_sum,
+                    score_count = user_rating_monthly.score_count + EXCLUDED.score_count,
+                    entries = user_rating_monthly.entries + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+    )
+    cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION rollup_collaboration_daily()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.user_id IS NOT NULL AND OLD.joined_at IS NOT NULL THEN
+                UPDATE user_collaboration_daily
+                SET projects = projects - 1
+                WHERE user_id = OLD.user_id AND day = DATE(OLD.joined_at);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.user_id IS NOT NULL AND NEW.joined_at IS NOT NULL THEN
+                INSERT INTO user_collaboration_daily (user_id, day, projects)
+                VALUES (NEW.user_id, DATE(NEW.joined_at), 1)
+                ON CONFLICT (user_id, day) DO UPDATE
+                SET projects = user_collaboration_daily.projects + 1;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+    )
+    for trigger, table, columns, function in (
+        ("engagement_rollup", "engagement", 'user_id, points, "timestamp"', "rollup_engagement_daily"),
+        ("user_ratings_rollup", "user_ratings", "ratee_id, score, status, completed_at", "rollup_rating_monthly"),
+        ("project_collaborators_rollup", "project_collaborators", "user_id, joined_at", "rollup_collaboration_daily"),
+    ):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger} ON {table}")
+        cursor.execute(
+            f"""
+            CREATE TRIGGER {trigger}
+                AFTER INSERT OR DELETE OR UPDATE OF {columns} ON {table}
+                FOR EACH ROW
+                EXECUTE PROCEDURE {function}()
+        """
+        )
 
-def resolve_feedback_score(stats_map: Dict[Tuple[int, str], float], user_id: int, skill_bucket: str) -> float:
-    if not stats_map or not user_id:
-        return 0.0
-    key_specific = (user_id, skill_bucket)
-    if key_specific in stats_map:
-        return stats_map[key_specific]
-    key_general = (user_id, DEFAULT_SKILL_BUCKET)
-    return stats_map.get(key_general, 0.0)
+    if needs_backfill:
+        backfill_analytics_rollups(cursor)
 
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print("Analytics rollup tables initialized")
 
-def add_engagement_points(cursor, user_id: Optional[int], points: int, reason: str):
-    if not user_id or not points:
-        return
+
+def backfill_analytics_rollups(cursor):
+    """
+    Rebuild every analytics rollup from the raw tables.
+
+    The raw tables are locked against writes until the caller commits, so no
+    trigger update can land between the rebuild and the commit.
+    """
+    cursor.execute("LOCK TABLE engagement, user_ratings, project_collaborators IN SHARE MODE")
+    cursor.execute("TRUNCATE user_engagement_daily, user_rating_monthly, user_collaboration_daily")
     cursor.execute(
         """
-        INSERT INTO engagement (user_id, points, reason)
-        VALUES (%s, %s, %s)
-    """,
-        (user_id, points, reason),
+        INSERT INTO user_engagement_daily (user_id, day, points, entries)
+        SELECT user_id, DATE(timestamp), COALESCE(SUM(points), 0), COUNT(*)
+        FROM engagement
+        WHERE user_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY user_id, DATE(timestamp)
+    """
     )
     cursor.execute(
         """
-        UPDATE users
-        SET engagement_score = COALESCE(engagement_score, 0) + %s
-        WHERE user_id = %s
-    """,
-        (points, user_id),
+        INSERT INTO user_rating_monthly (user_id, month, score_sum, score_count, entries)
+        SELECT ratee_id, DATE_TRUNC('month', completed_at)::date, COALESCE(SUM(score), 0), COUNT(score), COUNT(*)
+        FROM user_ratings
+        WHERE ratee_id IS NOT NULL AND status = 'completed' AND completed_at IS NOT NULL
+        GROUP BY ratee_id, DATE_TRUNC('month', completed_at)
+    """
     )
-
-
-def ensure_rating_prompt(cursor, project_id: int, rater_id: int, ratee_id: int):
-    if not project_id or not rater_id or not ratee_id or rater_id == ratee_id:
-        return
     cursor.execute(
         """
-        INSERT INTO user_ratings (project_id, rater_id, ratee_id, status)
-        VALUES (%s, %s, %s, 'pending')
-        ON CONFLICT (project_id, rater_id, ratee_id) DO NOTHING
-    """,
-        (project_id, rater_id, ratee_id),
+        INSERT INTO user_collaboration_daily (user_id, day, projects)
+        SELECT user_id, DATE(joined_at), COUNT(*)
+        FROM project_collaborators
+        WHERE user_id IS NOT NULL AND joined_at IS NOT NULL
+        GROUP BY user_id, DATE(joined_at)
+    """
     )
 
 
-def recalculate_user_rating(cursor, user_id: int):
+def init_leaderboard_tables():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    # leaderboard_updated_at moves whenever anything shown on (or deciding a
+    # place on) the leaderboard changes, so the in-memory leaderboard can
+    # apply deltas instead of re-ranking every user.
     cursor.execute(
         """
-        SELECT AVG(score)::numeric(3,2)
-        FROM user_ratings
-        WHERE ratee_id = %s AND status = 'completed' AND score IS NOT NULL
-    """,
-        (user_id,),
+        ALTER TABLE users
+        ADD COLUMN IF NOT EXISTS leaderboard_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        """
     )
-    avg_row = cursor.fetchone()
-    avg_score = avg_row[0] if avg_row else None
     cursor.execute(
         """
-        UPDATE users
-        SET rating = COALESCE(%s, 0)
-        WHERE user_id = %s
-    """,
-        (avg_score, user_id),
+        CREATE INDEX IF NOT EXISTS idx_users_leaderboard_updated_at
+        ON users (leaderboard_updated_at)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION touch_user_leaderboard_updated_at()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT'
+               OR NEW.engagement_score IS DISTINCT FROM OLD.engagement_score
+               OR NEW.rating IS DISTINCT FROM OLD.rating
+               OR NEW.name IS DISTINCT FROM OLD.name
+               OR NEW.email IS DISTINCT FROM OLD.email
+               OR NEW.skills IS DISTINCT FROM OLD.skills
+               OR NEW.account_status IS DISTINCT FROM OLD.account_status
+               OR NEW.frozen_since IS DISTINCT FROM OLD.frozen_since THEN
+                NEW.leaderboard_updated_at := CURRENT_TIMESTAMP;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+    )
+    cursor.execute("DROP TRIGGER IF EXISTS users_leaderboard_updated_at ON users")
+    cursor.execute(
+        """
+        CREATE TRIGGER users_leaderboard_updated_at
+            BEFORE INSERT OR UPDATE OF engagement_score, rating, name, email, skills, account_status, frozen_since
+            ON users
+            FOR EACH ROW
+            EXECUTE PROCEDURE touch_user_leaderboard_updated_at()
+    """
+    )
+    # Completed collaborations are counted on the leaderboard; finishing one
+    # happens in Next.js (finish_collaboration), so stamp the user from here.
+    cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION touch_collaborator_leaderboard_updated_at()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE users SET leaderboard_updated_at = CURRENT_TIMESTAMP WHERE user_id = OLD.user_id;
+            END IF;
+            IF TG_OP = 'INSERT' THEN
+                UPDATE users SET leaderboard_updated_at = CURRENT_TIMESTAMP WHERE user_id = NEW.user_id;
+            ELSIF TG_OP = 'UPDATE' THEN
+                IF NEW.user_id IS DISTINCT FROM OLD.user_id THEN
+                    UPDATE users SET leaderboard_updated_at = CURRENT_TIMESTAMP WHERE user_id = NEW.user_id;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+    )
+    cursor.execute("DROP TRIGGER IF EXISTS project_collaborators_leaderboard ON project_collaborators")
+    cursor.execute(
+        """
+        CREATE TRIGGER project_collaborators_leaderboard
+            AFTER INSERT OR DELETE OR UPDATE OF status, user_id ON project_collaborators
+            FOR EACH ROW
+            EXECUTE PROCEDURE touch_collaborator_leaderboard_updated_at()
+    """
     )
 
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print("Leaderboard tables initialized")
 
-def _normalize_skills(skills: Optional[List[str]]) -> List[str]:
-    if not skills:
-        return []
-    return [skill.strip().lower() for skill in skills if isinstance(skill, str) and skill.strip()]
 
+INACTIVITY_FREEZE_AFTER = "4 weeks"
 
-def calculate_skill_match_score(required_skills: List[str], candidate_skills: List[str]) -> float:
-    if not required_skills or not candidate_skills:
-        return 0.0
-    required_set = set(_normalize_skills(required_skills))
-    candidate_set = set(_normalize_skills(candidate_skills))
-    if not required_set or not candidate_set:
-        return 0.0
-    overlap = len(required_set & candidate_set)
-    return round((overlap / len(required_set)) * 100, 2)
 
+def init_inactivity_tables():
+    conn = get_db_connection()
+    cursor = conn.cursor()
 
-def fetch_candidate_users(cursor, owner_id: int):
     cursor.execute(
         """
-        SELECT 
-            u.user_id,
-            u.name,
-            u.email,
-            u.skills,
-            u.rating,
-            u.engagement_score,
-            COALESCE(pc.active_count, 0) AS active_collaborations,
-            COALESCE(pp.open_projects, 0) AS pitched_projects
-        FROM users u
-        LEFT JOIN (
-            SELECT user_id, COUNT(*) AS active_count
-            FROM project_collaborators
-            WHERE status = 'active'
-            GROUP BY user_id
-        ) pc ON u.user_id = pc.user_id
-        LEFT JOIN (
-            SELECT owner_id, COUNT(*) AS open_projects
-            FROM projects
-            WHERE status = 'Open'
-            GROUP BY owner_id
-        ) pp ON u.user_id = pp.owner_id
-        WHERE u.user_id <> %s
-          AND u.account_status = 'active'
-          AND (COALESCE(pc.active_count, 0) + COALESCE(pp.open_projects, 0)) < 2
-        """,
-        (owner_id,),
+        SELECT NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'users' AND column_name = 'last_decision_at'
+        )
+    """
     )
-    return cursor.fetchall()
+    needs_backfill = cursor.fetchone()[0]
 
+    # last_decision_at is stamped by update_user_decision; frozen_since is set
+    # by sweep_inactive_accounts once a user has ignored a match for 4 weeks
+    # without deciding on anything else in that time.
+    cursor.execute(
+        """
+        ALTER TABLE users
+        ADD COLUMN IF NOT EXISTS last_decision_at TIMESTAMP,
+        ADD COLUMN IF NOT EXISTS frozen_since TIMESTAMP
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_users_frozen_since
+        ON users (frozen_since) WHERE frozen_since IS NOT NULL
+    """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_project_matches_pending_created_at
+        ON project_matches (created_at) WHERE user_decision = 'pending'
+    """
+    )
 
-def sync_collaboration_if_ready(cursor, match_row):
-    if (
-        match_row.get("owner_decision") == "accepted"
-        and match_row.get("user_decision") == "accepted"
-    ):
-        # Check if collaboration already exists
+    if needs_backfill:
         cursor.execute(
             """
-            SELECT collaboration_id, status FROM project_collaborators
-            WHERE project_id = %s AND user_id = %s
-        """,
-            (
-                match_row["project_id"],
-                match_row["recommended_user_id"],
-            ),
+            UPDATE users u
+            SET last_decision_at = decided.last_decision_at
+            FROM (
+                SELECT recommended_user_id, MAX(user_decided_at) as last_decision_at
+                FROM project_matches
+                WHERE user_decision IN ('accepted', 'rejected')
+                GROUP BY recommended_user_id
+            ) decided
+            WHERE u.user_id = decided.recommended_user_id
+        """
         )
-        existing = cursor.fetchone()
-        
-        if existing:
-            # If exists but is completed, reactivate it; if already active, skip
-            if existing.get("status") == "completed":
-                cursor.execute(
-                    """
-                    UPDATE project_collaborators
-                    SET status = 'active', joined_at = CURRENT_TIMESTAMP
-                    WHERE collaboration_id = %s
-                    RETURNING collaboration_id
-                """,
-                    (existing["collaboration_id"],),
-                )
-                updated = cursor.fetchone()
-                if not updated:
-                    return
-                # Award engagement points and create rating prompts for reactivated collaboration
-                cursor.execute(
-                    "SELECT owner_id FROM projects WHERE project_id = %s",
-                    (match_row["project_id"],),
-                )
-                owner_row = cursor.fetchone()
-                owner_id = owner_row[0] if owner_row else None
-                collaborator_id = match_row["recommended_user_id"]
-                if owner_id:
-                    add_engagement_points(cursor, owner_id, 8, "collaboration_started_owner")
-                add_engagement_points(cursor, collaborator_id, 8, "collaboration_started_collaborator")
-                if owner_id:
-                    ensure_rating_prompt(cursor, match_row["project_id"], owner_id, collaborator_id)
-                    ensure_rating_prompt(cursor, match_row["project_id"], collaborator_id, owner_id)
-                return
-            else:
-                # Already active, skip
-                return
+        sweep_inactive_accounts(cursor)
+
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print("Inactivity tables initialized")
+
+
+def sweep_inactive_accounts(cursor) -> dict:
+    """
+    Bring ``users.frozen_since`` in line with the inactivity rule.
+
+    Freezes users with a pending match older than the freeze window and no
+    decision inside it (``frozen_since`` is when that became true), and thaws
+    frozen users whose stale matches are gone or who decided recently. Only
+    pending matches past the window are scanned, via a partial index.
+    """
+    cursor.execute(
+        f"""
+        WITH overdue AS (
+            SELECT recommended_user_id as user_id, MIN(created_at) as pending_since
+            FROM project_matches
+            WHERE user_decision = 'pending'
+              AND created_at < CURRENT_TIMESTAMP - INTERVAL '{INACTIVITY_FREEZE_AFTER}'
+            GROUP BY recommended_user_id
+        ),
+        frozen AS (
+            UPDATE users u
+            SET frozen_since = GREATEST(
+                overdue.pending_since,
+                COALESCE(u.last_decision_at, overdue.pending_since)
+            ) + INTERVAL '{INACTIVITY_FREEZE_AFTER}'
+            FROM overdue
+            WHERE u.user_id = overdue.user_id
+              AND u.frozen_since IS NULL
+              AND (
+                  u.last_decision_at IS NULL
+                  OR u.last_decision_at <= CURRENT_TIMESTAMP - INTERVAL '{INACTIVITY_FREEZE_AFTER}'
+              )
+            RETURNING u.user_id
+        ),
+        thawed AS (
+            UPDATE users u
+            SET frozen_since = NULL
+            WHERE u.frozen_since IS NOT NULL
+              AND (
+                  u.last_decision_at > CURRENT_TIMESTAMP - INTERVAL '{INACTIVITY_FREEZE_AFTER}'
+                  OR NOT EXISTS (SELECT 1 FROM overdue WHERE overdue.user_id = u.user_id)
+              )
+            RETURNING u.user_id
+        )
+        SELECT (SELECT COUNT(*) FROM frozen) as frozen, (SELECT COUNT(*) FROM thawed) as thawed
+    """
+    )
+    frozen, thawed = cursor.fetchone()
+    return {"frozen": frozen, "thawed": thawed}
+
+
+def run_inactivity_sweep() -> dict:
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        result = sweep_inactive_accounts(cursor)
+        conn.commit()
+        cursor.close()
+    if result["frozen"] or result["thawed"]:
+        leaderboard.mark_stale()
+    return result
+
+
+class PeriodicTask:
+    """Run ``task`` on a daemon thread every ``interval`` seconds until stopped."""
+
+    def __init__(self, name: str, task, interval: float):
+        self.name = name
+        self._task = task
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "errors": 0, "last_run_at": None, "last_result": None, "last_error": None}
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self):
+        try:
+            result = self._task()
+        except Exception as e:
+            print(f"{self.name} failed: {e}")
+            with self._lock:
+                self._stats.update(errors=self._stats["errors"] + 1, last_error=str(e))
+            return None
+        with self._lock:
+            self._stats.update(runs=self._stats["runs"] + 1, last_run_at=time.time(), last_result=result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _worker(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+inactivity_sweeper = PeriodicTask(
+    "inactivity-sweeper", run_inactivity_sweep, _env_float("INACTIVITY_SWEEP_SECONDS", 900.0)
+)
+
+
+def init_user_profile_tables():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    # profile_updated_at moves whenever a field held by ``user_profiles``
+    # changes, including edits made through the Next.js API, so the cache can
+    # drop just those users.
+    cursor.execute(
+        """
+        ALTER TABLE users
+        ADD COLUMN IF NOT EXISTS profile_updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_users_profile_updated_at
+        ON users (profile_updated_at)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION touch_user_profile_updated_at()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF NEW.name IS DISTINCT FROM OLD.name
+               OR NEW.email IS DISTINCT FROM OLD.email
+               OR NEW.skills IS DISTINCT FROM OLD.skills THEN
+                NEW.profile_updated_at := CURRENT_TIMESTAMP;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """
+    )
+    cursor.execute("DROP TRIGGER IF EXISTS users_profile_updated_at ON users")
+    cursor.execute(
+        """
+        CREATE TRIGGER users_profile_updated_at
+            BEFORE UPDATE OF name, email, skills
+            ON users
+            FOR EACH ROW
+            EXECUTE PROCEDURE touch_user_profile_updated_at()
+    """
+    )
+
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+class UserProfileCache:
+    """
+    Process-wide cache of the profile fields used to label a user (id, name,
+    email, skills) in chat broadcasts, match responses and the thread list.
+
+    Entries expire after ``ttl`` seconds. ``sync`` drops entries for users
+    whose ``profile_updated_at`` moved since the previous sync (re-reading
+    ``sync_overlap`` back for commits that landed late), and a load that
+    overlaps an invalidation is returned but not cached.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000, sync_overlap: float = 5.0):
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self._synced_at: Optional[datetime] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "loaded": 0, "syncs": 0}
+
+    def peek(self, user_id) -> Optional[dict]:
+        """Return a cached profile without touching the database."""
+        return self._cache.get(str(user_id))
+
+    def get(self, user_id, cursor=None) -> Optional[dict]:
+        return self.get_many([user_id], cursor).get(str(user_id))
+
+    def get_many(self, user_ids: Iterable, cursor=None) -> Dict[str, dict]:
+        """
+        Profiles keyed by ``str(user_id)``; misses are loaded in one query,
+        on ``cursor`` when given or a pooled connection otherwise. Unknown
+        users are left out.
+        """
+        profiles = {}
+        missing = set()
+        for user_id in user_ids:
+            key = str(user_id)
+            profile = self._cache.get(key)
+            if profile is not None:
+                profiles[key] = profile
+            elif key.isdigit():
+                missing.add(int(key))
+        if not missing:
+            return profiles
+
+        with self._lock:
+            generation = self._generation
+            self._stats["loads"] += 1
+        if cursor is not None:
+            rows = self._load(cursor, missing)
         else:
-            # Create new collaboration
-            cursor.execute(
-                """
-                INSERT INTO project_collaborators (project_id, user_id, required_skill, status)
-                VALUES (%s, %s, %s, 'active')
-                RETURNING collaboration_id
-            """,
-                (
-                    match_row["project_id"],
-                    match_row["recommended_user_id"],
-                    match_row.get("required_skill"),
-                ),
-            )
-            inserted = cursor.fetchone()
-            if not inserted:
-                return
+            with db_connection() as conn:
+                load_cursor = conn.cursor(cursor_factory=RealDictCursor)
+                rows = self._load(load_cursor, missing)
+                load_cursor.close()
+
+        with self._lock:
+            cacheable = generation == self._generation
+            self._stats["loaded"] += len(rows)
+        for row in rows:
+            profile = {
+                "user_id": row["user_id"],
+                "name": row["name"],
+                "email": row["email"],
+                "skills": row["skills"],
+            }
+            profiles[str(row["user_id"])] = profile
+            if cacheable:
+                self._cache.set(str(row["user_id"]), profile)
+        return profiles
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+        self._cache.delete(*(str(user_id) for user_id in user_ids))
+
+    def sync(self, cursor) -> int:
+        """Drop profiles changed since the last sync; returns how many users changed."""
+        if self._synced_at is None:
+            cursor.execute("SELECT MAX(profile_updated_at) AS synced_at FROM users")
+            row = cursor.fetchone()
+            self._synced_at = row["synced_at"] if row else None
+            return 0
 
-        # Award engagement points and create rating prompts for new collaboration
         cursor.execute(
-            "SELECT owner_id FROM projects WHERE project_id = %s",
-            (match_row["project_id"],),
+            """
+            SELECT user_id, profile_updated_at
+            FROM users
+            WHERE profile_updated_at > %s
+        """,
+            (self._synced_at - self.sync_overlap,),
         )
-        owner_row = cursor.fetchone()
-        owner_id = owner_row[0] if owner_row else None
-        collaborator_id = match_row["recommended_user_id"]
-        if owner_id:
-            add_engagement_points(cursor, owner_id, 8, "collaboration_started_owner")
-        add_engagement_points(cursor, collaborator_id, 8, "collaboration_started_collaborator")
-        if owner_id:
-            ensure_rating_prompt(cursor, match_row["project_id"], owner_id, collaborator_id)
-            ensure_rating_prompt(cursor, match_row["project_id"], collaborator_id, owner_id)
+        rows = cursor.fetchall()
+        if rows:
+            self.invalidate(*(row["user_id"] for row in rows))
+            self._synced_at = max(self._synced_at, max(row["profile_updated_at"] for row in rows))
+        with self._lock:
+            self._stats["syncs"] += 1
+        return len(rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        return {**stats, "cache": self._cache.stats()}
+
+    @staticmethod
+    def _load(cursor, user_ids: Set[int]) -> List[dict]:
+        cursor.execute(
+            """
+            SELECT user_id, name, email, skills
+            FROM users
+            WHERE user_id = ANY(%s)
+        """,
+            (sorted(user_ids),),
+        )
+        return cursor.fetchall()
 
 
-def fetch_match_with_relations(cursor, match_id: int):
+user_profiles = UserProfileCache(
+    ttl=_env_float("USER_PROFILE_CACHE_TTL_SECONDS", 300.0),
+    max_entries=_env_int("USER_PROFILE_CACHE_MAX_ENTRIES", 10000),
+)
+
+
+def sync_user_profiles() -> int:
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        changed = user_profiles.sync(cursor)
+        cursor.close()
+    return changed
+
+
+user_profile_sync = PeriodicTask(
+    "user-profile-sync", sync_user_profiles, _env_float("USER_PROFILE_SYNC_SECONDS", 5.0)
+)
+
+
+ENGAGEMENT_POINTS = {
+    "pitch_project": 10,
+    "apply_collaboration": 5,
+    "owner_acceptance": 2,
+}
+
+DEFAULT_SKILL_BUCKET = "general"
+# Below this pool size the per-candidate Python scorer beats building arrays.
+VECTORIZED_SCORING_MIN_CANDIDATES = 64
+# How many top candidates are recommended for each required skill; popular
+# skills can be given a different budget, e.g.
+# RECOMMENDATIONS_PER_SKILL_OVERRIDES='{"python": 5, "figma": 1}'.
+RECOMMENDATIONS_PER_SKILL = _env_int("RECOMMENDATIONS_PER_SKILL", 3)
+RECOMMENDATIONS_PER_SKILL_OVERRIDES = _env_skill_limits("RECOMMENDATIONS_PER_SKILL_OVERRIDES")
+RECOMMENDATION_WEIGHTS = {
+    "skill": 0.5,
+    "engagement": 0.15,
+    "rating": 0.15,
+    "feedback": 0.2,
+}
+
+
+def clamp(value: float, min_value: float, max_value: float) -> float:
+    return max(min_value, min(max_value, value))
+
+
+def get_feedback_skill_bucket(required_skill: Optional[str]) -> str:
+    if required_skill and required_skill.strip():
+        return required_skill.strip().lower()
+    return DEFAULT_SKILL_BUCKET
+
+
+def upsert_feedback_stat(cursor, user_id: int, skill_bucket: str, accepted: bool) -> Optional[int]:
+    """Record one decision in the caller's transaction; returns the user to mark dirty after commit."""
+    if not user_id:
+        return None
+    accepted_increment = 1 if accepted else 0
+    rejected_increment = 0 if accepted else 1
     cursor.execute(
         """
-        SELECT 
-            pm.match_id,
-            pm.project_id,
-            pm.recommended_user_id,
-            pm.required_skill,
-            pm.skill_match_score,
-            pm.engagement_score_snapshot,
-            pm.rating_snapshot,
-            pm.owner_decision,
-            pm.owner_decided_at,
-            pm.user_decision,
-            pm.user_decided_at,
-            pm.created_at,
-            pm.updated_at,
-            u.name AS recommended_user_name,
-            u.email AS recommended_user_email,
-            u.skills AS recommended_user_skills,
-            p.title AS project_title,
-            p.description AS project_description,
-            p.owner_id
-        FROM project_matches pm
-        JOIN users u ON pm.recommended_user_id = u.user_id
-        JOIN projects p ON pm.project_id = p.project_id
-        WHERE pm.match_id = %s
+        INSERT INTO user_feedback_stats (
+            user_id,
+            skill,
+            total_recommendations,
+            accepted_count,
+            rejected_count,
+            accept_rate,
+            last_feedback_at
+        )
+        VALUES (%s, %s, 1, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id, skill) DO UPDATE SET
+            total_recommendations = user_feedback_stats.total_recommendations + 1,
+            accepted_count = user_feedback_stats.accepted_count + EXCLUDED.accepted_count,
+            rejected_count = user_feedback_stats.rejected_count + EXCLUDED.rejected_count,
+            accept_rate = (
+                user_feedback_stats.accepted_count + EXCLUDED.accepted_count
+            )::numeric(5,4) / (user_feedback_stats.total_recommendations + 1),
+            last_feedback_at = CURRENT_TIMESTAMP
     """,
-        (match_id,),
+        (
+            user_id,
+            skill_bucket,
+            accepted_increment,
+            rejected_increment,
+            accepted_increment,
+        ),
     )
-    row = cursor.fetchone()
-    return dict(row) if row else None
+    return user_id
 
 
-def fetch_project_matches_with_users(project_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+def record_feedback_signal(
+    cursor, user_id: Optional[int], required_skill: Optional[str], accepted: bool
+) -> Optional[int]:
+    if not user_id:
+        return None
+    skill_bucket = get_feedback_skill_bucket(required_skill)
+    return upsert_feedback_stat(cursor, user_id, skill_bucket, accepted)
+
+
+def load_feedback_stats(cursor, user_ids: List[int]) -> Dict[Tuple[int, str], float]:
+    if not user_ids:
+        return {}
+    unique_ids = list({uid for uid in user_ids if uid})
+    if not unique_ids:
+        return {}
     cursor.execute(
         """
-        SELECT 
-            pm.match_id,
-            pm.project_id,
-            pm.recommended_user_id,
-            pm.required_skill,
-            pm.skill_match_score,
-            pm.engagement_score_snapshot,
-            pm.rating_snapshot,
-            pm.owner_decision,
-            pm.user_decision,
-            pm.created_at,
-            pm.updated_at,
-            u.name AS recommended_user_name,
-            u.email AS recommended_user_email,
-            u.skills AS recommended_user_skills
-        FROM project_matches pm
-        JOIN users u ON pm.recommended_user_id = u.user_id
-        WHERE pm.project_id = %s
-        ORDER BY pm.required_skill NULLS LAST, pm.match_id
+        SELECT user_id, skill, accept_rate
+        FROM user_feedback_stats
+        WHERE user_id = ANY(%s)
     """,
-        (project_id,),
+        (unique_ids,),
+    )
+    stats_map: Dict[Tuple[int, str], float] = {}
+    for row in cursor.fetchall():
+        key = (row["user_id"], row["skill"])
+        stats_map[key] = float(row["accept_rate"] or 0.0)
+    return stats_map
+
+
+def resolve_feedback_score(stats_map: Dict[Tuple[int, str], float], user_id: int, skill_bucket: str) -> float:
+    if not stats_map or not user_id:
+        return 0.0
+    key_specific = (user_id, skill_bucket)
+    if key_specific in stats_map:
+        return stats_map[key_specific]
+    key_general = (user_id, DEFAULT_SKILL_BUCKET)
+    return stats_map.get(key_general, 0.0)
+
+
+def add_engagement_points(cursor, user_id: Optional[int], points: int, reason: str) -> Optional[int]:
+    """
+    Award ``points`` inside the caller's transaction.
+
+    Returns the user id when points were added so the caller can invalidate
+    cached analytics, mark the leaderboard stale and mark the user dirty for
+    ``recommendation_updater`` once it has committed; doing any of these
+    earlier lets a concurrent read pick up the pre-commit values.
+    """
+    if not user_id or not points:
+        return None
+    cursor.execute(
+        """
+        INSERT INTO engagement (user_id, points, reason)
+        VALUES (%s, %s, %s)
+    """,
+        (user_id, points, reason),
+    )
+    cursor.execute(
+        """
+        UPDATE users
+        SET engagement_score = COALESCE(engagement_score, 0) + %s
+        WHERE user_id = %s
+    """,
+        (points, user_id),
+    )
+    return user_id
+
+
+def ensure_rating_prompt(cursor, project_id: int, rater_id: int, ratee_id: int):
+    if not project_id or not rater_id or not ratee_id or rater_id == ratee_id:
+        return
+    cursor.execute(
+        """
+        INSERT INTO user_ratings (project_id, rater_id, ratee_id, status)
+        VALUES (%s, %s, %s, 'pending')
+        ON CONFLICT (project_id, rater_id, ratee_id) DO NOTHING
+    """,
+        (project_id, rater_id, ratee_id),
+    )
+
+
+def recalculate_user_rating(cursor, user_id: int) -> int:
+    """Refresh ``users.rating`` in the caller's transaction; returns the user to mark dirty after commit."""
+    cursor.execute(
+        """
+        SELECT AVG(score)::numeric(3,2)
+        FROM user_ratings
+        WHERE ratee_id = %s AND status = 'completed' AND score IS NOT NULL
+    """,
+        (user_id,),
+    )
+    avg_row = cursor.fetchone()
+    avg_score = avg_row[0] if avg_row else None
+    cursor.execute(
+        """
+        UPDATE users
+        SET rating = COALESCE(%s, 0)
+        WHERE user_id = %s
+    """,
+        (avg_score, user_id),
+    )
+    return user_id
+
+
+def _normalize_skills(skills: Optional[List[str]]) -> List[str]:
+    if not skills:
+        return []
+    return [skill.strip().lower() for skill in skills if isinstance(skill, str) and skill.strip()]
+
+
+def calculate_skill_match_score(required_skills: List[str], candidate_skills: List[str]) -> float:
+    if not required_skills or not candidate_skills:
+        return 0.0
+    required_set = set(_normalize_skills(required_skills))
+    candidate_set = set(_normalize_skills(candidate_skills))
+    if not required_set or not candidate_set:
+        return 0.0
+    overlap = len(required_set & candidate_set)
+    return round((overlap / len(required_set)) * 100, 2)
+
+
+class SkillIndex:
+    """
+    In-memory inverted index from normalized skill to the users that list it.
+
+    Only skills are indexed; eligibility (account status, commitment limit,
+    rating, engagement) is still read from Postgres for the returned IDs, so the
+    index never has to track collaborations or score changes. ``sync`` applies
+    rows whose ``skills_updated_at`` moved since the last sync (re-reading a
+    small overlap window to catch late commits) and rebuilds from scratch every
+    ``rebuild_interval`` seconds.
+    """
+
+    def __init__(self, rebuild_interval: float = 3600.0, sync_overlap: float = 60.0, on_change=None):
+        self.rebuild_interval = rebuild_interval
+        self.on_change = on_change
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._user_skills: Dict[int, frozenset] = {}
+        self._synced_at: Optional[datetime] = None
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._user_skills.clear()
+            self._synced_at = None
+            self._built_at = None
+
+    def update_user(self, user_id: int, skills: Optional[List[str]]):
+        with self._lock:
+            self._update_user_locked(user_id, skills)
+
+    def remove_user(self, user_id: int):
+        self.update_user(user_id, None)
+
+    def users_with_skill(self, skill: str) -> Set[int]:
+        with self._lock:
+            return set(self._postings.get(skill, ()))
+
+    def users_with_any(self, skills: List[str]) -> Set[int]:
+        with self._lock:
+            matched: Set[int] = set()
+            for skill in skills:
+                matched.update(self._postings.get(skill, ()))
+            return matched
+
+    def lookup(self, cursor, skills: List[str]) -> Set[int]:
+        """Sync with the database, then return users holding at least one of ``skills``."""
+        self.sync(cursor)
+        return self.users_with_any(skills)
+
+    def sync(self, cursor):
+        with self._lock:
+            rebuild = self._built_at is None or (
+                time.monotonic() - self._built_at >= self.rebuild_interval
+            )
+            since = None if rebuild or self._synced_at is None else self._synced_at - self.sync_overlap
+
+        if since is None:
+            cursor.execute("SELECT user_id, skills, skills_updated_at FROM users")
+        else:
+            cursor.execute(
+                """
+                SELECT user_id, skills, skills_updated_at
+                FROM users
+                WHERE skills_updated_at > %s
+            """,
+                (since,),
+            )
+        rows = cursor.fetchall()
+
+        changed_users = set()
+        with self._lock:
+            initial_build = self._built_at is None
+            if since is None:
+                previous_skills = dict(self._user_skills)
+                self._postings.clear()
+                self._user_skills.clear()
+                self._built_at = time.monotonic()
+            else:
+                previous_skills = self._user_skills
+            for row in rows:
+                user_id = row["user_id"]
+                old_skills = previous_skills.get(user_id, frozenset())
+                self._update_user_locked(user_id, row["skills"])
+                if self._user_skills.get(user_id, frozenset()) != old_skills:
+                    changed_users.add(user_id)
+                changed_at = row.get("skills_updated_at")
+                if changed_at and (self._synced_at is None or changed_at > self._synced_at):
+                    self._synced_at = changed_at
+
+        # The first build describes existing state rather than edits.
+        if changed_users and not initial_build and self.on_change:
+            self.on_change(changed_users)
+
+    def _update_user_locked(self, user_id: int, skills: Optional[List[str]]):
+        new_skills = frozenset(_normalize_skills(skills))
+        old_skills = self._user_skills.pop(user_id, frozenset())
+        for skill in old_skills - new_skills:
+            holders = self._postings.get(skill)
+            if holders is not None:
+                holders.discard(user_id)
+                if not holders:
+                    del self._postings[skill]
+        for skill in new_skills:
+            self._postings[skill].add(user_id)
+        if new_skills:
+            self._user_skills[user_id] = new_skills
+
+
+skill_index = SkillIndex(
+    rebuild_interval=_env_float("SKILL_INDEX_REBUILD_SECONDS", 3600.0),
+)
+
+
+def fetch_candidate_users(cursor, owner_id: int, user_ids: Optional[Set[int]] = None):
+    """
+    Load users eligible for recommendations (active and under the commitment limit).
+
+    When ``user_ids`` is given (e.g. from ``skill_index``), only those users and
+    their collaboration/project counts are read instead of scanning every user.
+    """
+    if user_ids is not None and not user_ids:
+        return []
+    collab_filter = project_filter = user_filter = ""
+    params: list = [owner_id]
+    if user_ids is not None:
+        id_list = list(user_ids)
+        collab_filter = "AND user_id = ANY(%s)"
+        project_filter = "AND owner_id = ANY(%s)"
+        user_filter = "AND u.user_id = ANY(%s)"
+        params = [id_list, id_list, owner_id, id_list]
+    cursor.execute(
+        f"""
+        SELECT 
+            u.user_id,
+            u.name,
+            u.email,
+            u.skills,
+            u.rating,
+            u.engagement_score,
+            COALESCE(pc.active_count, 0) AS active_collaborations,
+            COALESCE(pp.open_projects, 0) AS pitched_projects
+        FROM users u
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS active_count
+            FROM project_collaborators
+            WHERE status = 'active' {collab_filter}
+            GROUP BY user_id
+        ) pc ON u.user_id = pc.user_id
+        LEFT JOIN (
+            SELECT owner_id, COUNT(*) AS open_projects
+            FROM projects
+            WHERE status = 'Open' {project_filter}
+            GROUP BY owner_id
+        ) pp ON u.user_id = pp.owner_id
+        WHERE u.user_id <> %s
+          AND u.account_status = 'active'
+          AND (COALESCE(pc.active_count, 0) + COALESCE(pp.open_projects, 0)) < 2
+          {user_filter}
+        """,
+        params,
+    )
+    return cursor.fetchall()
+
+
+def sync_collaboration_if_ready(cursor, match_row) -> List[int]:
+    """Start the collaboration once both sides accepted; returns the users awarded points."""
+    if (
+        match_row.get("owner_decision") == "accepted"
+        and match_row.get("user_decision") == "accepted"
+    ):
+        # Check if collaboration already exists
+        cursor.execute(
+            """
+            SELECT collaboration_id, status FROM project_collaborators
+            WHERE project_id = %s AND user_id = %s
+        """,
+            (
+                match_row["project_id"],
+                match_row["recommended_user_id"],
+            ),
+        )
+        existing = cursor.fetchone()
+        
+        if existing:
+            # If exists but is completed, reactivate it; if already active, skip
+            if existing.get("status") == "completed":
+                cursor.execute(
+                    """
+                    UPDATE project_collaborators
+                    SET status = 'active', joined_at = CURRENT_TIMESTAMP
+                    WHERE collaboration_id = %s
+                    RETURNING collaboration_id
+                """,
+                    (existing["collaboration_id"],),
+                )
+                updated = cursor.fetchone()
+                if not updated:
+                    return []
+                # Award engagement points and create rating prompts for reactivated collaboration
+                cursor.execute(
+                    "SELECT owner_id FROM projects WHERE project_id = %s",
+                    (match_row["project_id"],),
+                )
+                owner_row = cursor.fetchone()
+                owner_id = owner_row[0] if owner_row else None
+                collaborator_id = match_row["recommended_user_id"]
+                awarded = []
+                if owner_id:
+                    awarded.append(add_engagement_points(cursor, owner_id, 8, "collaboration_started_owner"))
+                awarded.append(add_engagement_points(cursor, collaborator_id, 8, "collaboration_started_collaborator"))
+                if owner_id:
+                    ensure_rating_prompt(cursor, match_row["project_id"], owner_id, collaborator_id)
+                    ensure_rating_prompt(cursor, match_row["project_id"], collaborator_id, owner_id)
+                return [user_id for user_id in awarded if user_id]
+            else:
+                # Already active, skip
+                return []
+        else:
+            # Create new collaboration
+            cursor.execute(
+                """
+                INSERT INTO project_collaborators (project_id, user_id, required_skill, status)
+                VALUES (%s, %s, %s, 'active')
+                RETURNING collaboration_id
+            """,
+                (
+                    match_row["project_id"],
+                    match_row["recommended_user_id"],
+                    match_row.get("required_skill"),
+                ),
+            )
+            inserted = cursor.fetchone()
+            if not inserted:
+                return []
+
+        # Award engagement points and create rating prompts for new collaboration
+        cursor.execute(
+            "SELECT owner_id FROM projects WHERE project_id = %s",
+            (match_row["project_id"],),
+        )
+        owner_row = cursor.fetchone()
+        owner_id = owner_row[0] if owner_row else None
+        collaborator_id = match_row["recommended_user_id"]
+        awarded = []
+        if owner_id:
+            awarded.append(add_engagement_points(cursor, owner_id, 8, "collaboration_started_owner"))
+        awarded.append(add_engagement_points(cursor, collaborator_id, 8, "collaboration_started_collaborator"))
+        if owner_id:
+            ensure_rating_prompt(cursor, match_row["project_id"], owner_id, collaborator_id)
+            ensure_rating_prompt(cursor, match_row["project_id"], collaborator_id, owner_id)
+        return [user_id for user_id in awarded if user_id]
+    return []
+
+
+def fetch_match_with_relations(cursor, match_id: int):
+    cursor.execute(
+        """
+        SELECT 
+            pm.match_id,
+            pm.project_id,
+            pm.recommended_user_id,
+            pm.required_skill,
+            pm.skill_match_score,
+            pm.engagement_score_snapshot,
+            pm.rating_snapshot,
+            pm.owner_decision,
+            pm.owner_decided_at,
+            pm.user_decision,
+            pm.user_decided_at,
+            pm.created_at,
+            pm.updated_at,
+            u.name AS recommended_user_name,
+            u.email AS recommended_user_email,
+            u.skills AS recommended_user_skills,
+            p.title AS project_title,
+            p.description AS project_description,
+            p.owner_id
+        FROM project_matches pm
+        JOIN users u ON pm.recommended_user_id = u.user_id
+        JOIN projects p ON pm.project_id = p.project_id
+        WHERE pm.match_id = %s
+    """,
+        (match_id,),
+    )
+    row = cursor.fetchone()
+    return dict(row) if row else None
+
+
+def fetch_project_matches_with_users(project_id: int):
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(
+            """
+            SELECT 
+                pm.match_id,
+                pm.project_id,
+                pm.recommended_user_id,
+                pm.required_skill,
+                pm.skill_match_score,
+                pm.engagement_score_snapshot,
+                pm.rating_snapshot,
+                pm.owner_decision,
+                pm.user_decision,
+                pm.created_at,
+                pm.updated_at,
+                u.name AS recommended_user_name,
+                u.email AS recommended_user_email,
+                u.skills AS recommended_user_skills
+            FROM project_matches pm
+            JOIN users u ON pm.recommended_user_id = u.user_id
+            WHERE pm.project_id = %s
+            ORDER BY pm.required_skill NULLS LAST, pm.match_id
+        """,
+            (project_id,),
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+        cursor.close()
+    return rows
+
+
+def upsert_project_matches(cursor, recommendations: List[dict]) -> List[dict]:
+    """
+    Write automated recommendations in one multi-row upsert and return them
+    joined to their users, in the same shape as ``fetch_project_matches_with_users``.
+
+    The rows are passed as parallel arrays and expanded with ``unnest``, so the
+    statement text (and its round trip count) is the same for any number of matches.
+    """
+    if not recommendations:
+        return []
+    cursor.execute(
+        """
+        WITH upserted AS (
+            INSERT INTO project_matches (
+                project_id,
+                recommended_user_id,
+                required_skill,
+                skill_match_score,
+                engagement_score_snapshot,
+                rating_snapshot,
+                composite_score,
+                owner_decision,
+                user_decision,
+                owner_decided_at,
+                user_decided_at,
+                source_type
+            )
+            SELECT
+                rec.project_id,
+                rec.recommended_user_id,
+                rec.required_skill,
+                rec.skill_match_score,
+                rec.engagement_score_snapshot,
+                rec.rating_snapshot,
+                rec.composite_score,
+                'pending',
+                'pending',
+                NULL,
+                NULL,
+                'automated'
+            FROM unnest(
+                %s::int[], %s::int[], %s::text[], %s::numeric[], %s::numeric[], %s::numeric[],
+                %s::numeric[]
+            ) AS rec(
+                project_id,
+                recommended_user_id,
+                required_skill,
+                skill_match_score,
+                engagement_score_snapshot,
+                rating_snapshot,
+                composite_score
+            )
+            ON CONFLICT (project_id, recommended_user_id, required_skill)
+            DO UPDATE SET
+                skill_match_score = EXCLUDED.skill_match_score,
+                engagement_score_snapshot = EXCLUDED.engagement_score_snapshot,
+                rating_snapshot = EXCLUDED.rating_snapshot,
+                composite_score = EXCLUDED.composite_score,
+                owner_decision = 'pending',
+                user_decision = 'pending',
+                owner_decided_at = NULL,
+                user_decided_at = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING *
+        )
+        SELECT 
+            pm.match_id,
+            pm.project_id,
+            pm.recommended_user_id,
+            pm.required_skill,
+            pm.skill_match_score,
+            pm.engagement_score_snapshot,
+            pm.rating_snapshot,
+            pm.owner_decision,
+            pm.user_decision,
+            pm.created_at,
+            pm.updated_at,
+            u.name AS recommended_user_name,
+            u.email AS recommended_user_email,
+            u.skills AS recommended_user_skills
+        FROM upserted pm
+        JOIN users u ON pm.recommended_user_id = u.user_id
+        ORDER BY pm.required_skill NULLS LAST, pm.match_id
+    """,
+        (
+            [rec["project_id"] for rec in recommendations],
+            [rec["recommended_user_id"] for rec in recommendations],
+            [rec["required_skill"] for rec in recommendations],
+            [rec["skill_match_score"] for rec in recommendations],
+            [rec["engagement_score_snapshot"] for rec in recommendations],
+            [rec["rating_snapshot"] for rec in recommendations],
+            [rec.get("composite_score") for rec in recommendations],
+        ),
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _coerce_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def composite_recommendation_score(
+    skill_match_score: float, engagement: float, rating: float, feedback_score: float
+) -> float:
+    skill_component = skill_match_score * RECOMMENDATION_WEIGHTS["skill"]
+    engagement_component = (
+        clamp(engagement / 100.0, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["engagement"]
+    )
+    rating_component = clamp(rating / 5.0, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["rating"]
+    feedback_component = (
+        clamp(feedback_score, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["feedback"]
+    )
+    return skill_component + engagement_component + rating_component + feedback_component
+
+
+def rank_candidates_python(
+    candidates, required_skills: List[str], feedback_stats, limits: Optional[Dict[str, int]] = None
+) -> Dict[str, List[dict]]:
+    """
+    Score candidates one at a time; the reference implementation for ``CandidateScoreMatrix``.
+
+    ``limits`` maps a skill to how many top entries to keep; skills without a
+    limit return every matching candidate in score order.
+    """
+    normalized_required = required_skills if required_skills else [DEFAULT_SKILL_BUCKET]
+
+    # Skill sets and skill match scores don't depend on the skill being
+    # filled, so normalize each candidate once rather than once per skill.
+    prepared = []
+    for candidate in candidates:
+        candidate_skills = _normalize_skills(candidate.get("skills"))
+        prepared.append(
+            (
+                candidate,
+                set(candidate_skills),
+                float(calculate_skill_match_score(required_skills or candidate_skills, candidate_skills)),
+                _coerce_float(candidate.get("engagement_score")),
+                _coerce_float(candidate.get("rating")),
+            )
+        )
+
+    ranked: Dict[str, List[dict]] = {}
+    for skill in normalized_required:
+        skill_bucket = get_feedback_skill_bucket(None if skill == DEFAULT_SKILL_BUCKET else skill)
+
+        def scored_entries(skill=skill, skill_bucket=skill_bucket):
+            for candidate, candidate_skills, skill_match_score, engagement, rating in prepared:
+                if skill != DEFAULT_SKILL_BUCKET and skill not in candidate_skills:
+                    continue
+                feedback_score = resolve_feedback_score(feedback_stats, candidate["user_id"], skill_bucket)
+                yield {
+                    "candidate": candidate,
+                    "skill_match_score": skill_match_score,
+                    "composite_score": composite_recommendation_score(
+                        skill_match_score, engagement, rating, feedback_score
+                    ),
+                    "engagement": engagement,
+                    "rating": rating,
+                }
+
+        limit = (limits or {}).get(skill)
+        if limit is None:
+            ranked[skill] = sorted(scored_entries(), key=lambda x: x["composite_score"], reverse=True)
+        else:
+            # nlargest keeps a k-sized heap and matches sorted(..., reverse=True)[:k],
+            # ties included, without materializing every matching candidate.
+            ranked[skill] = heapq.nlargest(limit, scored_entries(), key=lambda x: x["composite_score"])
+    return ranked
+
+
+class CandidateScoreMatrix:
+    """
+    Columnar view of a candidate pool for batched composite scoring.
+
+    Built once from ``fetch_candidate_users`` rows and ``load_feedback_stats``
+    output. Skills are kept as per-skill row arrays (a sparse skill matrix) and
+    feedback as per-bucket row/rate arrays, so scoring a project is a handful of
+    array operations over every candidate and required skill at once. Scores
+    are bit-for-bit identical to ``rank_candidates_python``.
+    """
+
+    def __init__(self, candidates, feedback_stats: Dict[Tuple[int, str], float]):
+        self.candidates = list(candidates)
+        size = len(self.candidates)
+        self.user_ids = np.zeros(size, dtype=np.int64)
+        self.engagement = np.zeros(size, dtype=np.float64)
+        self.rating = np.zeros(size, dtype=np.float64)
+        self.has_skills = np.zeros(size, dtype=bool)
+
+        skill_rows: Dict[str, List[int]] = defaultdict(list)
+        row_of_user: Dict[int, int] = {}
+        for row, candidate in enumerate(self.candidates):
+            user_id = candidate["user_id"]
+            row_of_user[user_id] = row
+            self.user_ids[row] = user_id
+            self.engagement[row] = _coerce_float(candidate.get("engagement_score"))
+            self.rating[row] = _coerce_float(candidate.get("rating"))
+            candidate_skills = set(_normalize_skills(candidate.get("skills")))
+            self.has_skills[row] = bool(candidate_skills)
+            for skill in candidate_skills:
+                skill_rows[skill].append(row)
+        self.skill_rows = {
+            skill: np.array(rows, dtype=np.int64) for skill, rows in skill_rows.items()
+        }
+        self.row_of_user = row_of_user
+
+        bucket_rows: Dict[str, Tuple[List[int], List[float]]] = defaultdict(lambda: ([], []))
+        for (user_id, bucket), accept_rate in (feedback_stats or {}).items():
+            row = row_of_user.get(user_id) if user_id else None
+            if row is None:
+                continue
+            rows, rates = bucket_rows[bucket]
+            rows.append(row)
+            rates.append(accept_rate)
+        self.feedback_rows = {
+            bucket: (np.array(rows, dtype=np.int64), np.array(rates, dtype=np.float64))
+            for bucket, (rows, rates) in bucket_rows.items()
+        }
+        self.general_feedback = np.zeros(size, dtype=np.float64)
+        general = self.feedback_rows.get(DEFAULT_SKILL_BUCKET)
+        if general is not None:
+            self.general_feedback[general[0]] = general[1]
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def score(self, required_skills: List[str], exclude_user_ids: Iterable[int] = ()):
+        """
+        Return ``(skills, membership, skill_match, composite)`` for a project.
+
+        ``membership`` and ``composite`` have one column per distinct required
+        skill (or a single ``general`` column when the project lists none).
+        Users in ``exclude_user_ids`` (e.g. the project owner when the pool is
+        shared across projects) are left out of ``membership``.
+        """
+        size = len(self.candidates)
+        skills = list(dict.fromkeys(required_skills)) or [DEFAULT_SKILL_BUCKET]
+        membership = np.zeros((size, len(skills)), dtype=bool)
+
+        if required_skills:
+            for column, skill in enumerate(skills):
+                rows = self.skill_rows.get(skill)
+                if rows is not None:
+                    membership[rows, column] = True
+            # Overlap can only take len(skills) + 1 values; rounding each in
+            # Python keeps round() semantics identical to calculate_skill_match_score.
+            overlap_scores = np.array(
+                [round((overlap / len(skills)) * 100, 2) for overlap in range(len(skills) + 1)],
+                dtype=np.float64,
+            )
+            skill_match = overlap_scores[membership.sum(axis=1)]
+        else:
+            membership[:, 0] = True
+            skill_match = np.where(self.has_skills, 100.0, 0.0)
+        for user_id in exclude_user_ids:
+            row = self.row_of_user.get(user_id)
+            if row is not None:
+                membership[row, :] = False
+
+        feedback = np.empty((size, len(skills)), dtype=np.float64)
+        for column, skill in enumerate(skills):
+            bucket = get_feedback_skill_bucket(None if skill == DEFAULT_SKILL_BUCKET else skill)
+            feedback[:, column] = self.general_feedback
+            specific = self.feedback_rows.get(bucket)
+            if specific is not None:
+                feedback[specific[0], column] = specific[1]
+
+        # Same operation order as composite_recommendation_score so the float
+        # results match exactly.
+        partial = skill_match * RECOMMENDATION_WEIGHTS["skill"]
+        partial = partial + (
+            np.clip(self.engagement / 100.0, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["engagement"]
+        )
+        partial = partial + (
+            np.clip(self.rating / 5.0, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["rating"]
+        )
+        composite = partial[:, None] + (
+            np.clip(feedback, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["feedback"]
+        )
+        return skills, membership, skill_match, composite
+
+    def rank(
+        self,
+        required_skills: List[str],
+        limits: Optional[Dict[str, int]] = None,
+        exclude_user_ids: Iterable[int] = (),
+    ) -> Dict[str, List[dict]]:
+        skills, membership, skill_match, composite = self.score(required_skills, exclude_user_ids)
+        ranked: Dict[str, List[dict]] = {}
+        for column, skill in enumerate(skills):
+            rows = np.flatnonzero(membership[:, column])
+            limit = (limits or {}).get(skill)
+            if limit is not None:
+                rows = top_k_rows(rows, composite[rows, column], limit)
+            # Stable sort on the negated score keeps the candidate order for ties,
+            # exactly like list.sort(reverse=True) in the Python scorer.
+            ordered = rows[np.argsort(-composite[rows, column], kind="stable")]
+            ranked[skill] = [
+                {
+                    "candidate": self.candidates[row],
+                    "skill_match_score": float(skill_match[row]),
+                    "composite_score": float(composite[row, column]),
+                    "engagement": float(self.engagement[row]),
+                    "rating": float(self.rating[row]),
+                }
+                for row in ordered
+            ]
+        return ranked
+
+
+def top_k_rows(rows, scores, k: int):
+    """
+    Pick the ``k`` highest-scoring ``rows`` (ascending row order) with argpartition.
+
+    Candidates tied with the k-th score are taken in row order, so the result
+    is the same prefix a full stable sort would keep.
+    """
+    if k <= 0:
+        return rows[:0]
+    if len(rows) <= k:
+        return rows
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[: k - len(above)]
+    return rows[np.sort(np.concatenate((above, ties)))]
+
+
+def recommendations_per_skill(skill: str) -> int:
+    return RECOMMENDATIONS_PER_SKILL_OVERRIDES.get(skill, RECOMMENDATIONS_PER_SKILL)
+
+
+def rank_candidates(
+    candidates, required_skills: List[str], feedback_stats, limits: Optional[Dict[str, int]] = None
+) -> Dict[str, List[dict]]:
+    """Rank candidates per required skill, vectorized when NumPy is installed."""
+    if np is not None and len(candidates) >= VECTORIZED_SCORING_MIN_CANDIDATES:
+        return CandidateScoreMatrix(candidates, feedback_stats).rank(required_skills, limits)
+    return rank_candidates_python(candidates, required_skills, feedback_stats, limits)
+
+
+def recommendation_limits(required_skills: List[str]) -> Dict[str, int]:
+    normalized_required = required_skills if required_skills else [DEFAULT_SKILL_BUCKET]
+    return {skill: recommendations_per_skill(skill) for skill in normalized_required}
+
+
+def merge_ranked_recommendations(
+    project_id: int, required_skills: List[str], ranked_by_skill: Dict[str, List[dict]]
+) -> List[dict]:
+    """Keep each user's best per-skill entry and return the slate, best first."""
+    user_best_recommendations = {}
+    normalized_required = required_skills if required_skills else [DEFAULT_SKILL_BUCKET]
+    for skill in normalized_required:
+        for entry in ranked_by_skill[skill]:
+            candidate = entry["candidate"]
+            user_id = candidate["user_id"]
+            recommendation_payload = {
+                "project_id": project_id,
+                "recommended_user_id": user_id,
+                "required_skill": None if skill == DEFAULT_SKILL_BUCKET else skill,
+                "skill_match_score": entry["skill_match_score"],
+                "engagement_score_snapshot": entry["engagement"],
+                "rating_snapshot": entry["rating"],
+                "composite_score": entry["composite_score"],
+            }
+
+            existing = user_best_recommendations.get(user_id)
+            if not existing or recommendation_payload["composite_score"] > existing["composite_score"]:
+                user_best_recommendations[user_id] = recommendation_payload
+
+    return sorted(user_best_recommendations.values(), key=lambda rec: rec["composite_score"], reverse=True)
+
+
+def generate_recommendations_for_project(project_id: int):
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+        cursor.execute(
+            """
+            SELECT project_id, owner_id, required_skills
+            FROM projects
+            WHERE project_id = %s
+        """,
+            (project_id,),
+        )
+        project = cursor.fetchone()
+        if not project:
+            cursor.close()
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        required_skills = _normalize_skills(project["required_skills"])
+        owner_id = project["owner_id"]
+
+        cursor.execute("DELETE FROM project_matches WHERE project_id = %s", (project_id,))
+
+        if required_skills:
+            # Only users holding at least one required skill can be recommended.
+            candidate_ids = skill_index.lookup(cursor, required_skills)
+            candidates = fetch_candidate_users(cursor, owner_id, candidate_ids)
+        else:
+            candidates = fetch_candidate_users(cursor, owner_id)
+        feedback_stats = load_feedback_stats(cursor, [candidate["user_id"] for candidate in candidates])
+        ranked_by_skill = rank_candidates(
+            candidates, required_skills, feedback_stats, limits=recommendation_limits(required_skills)
+        )
+        recommendations = merge_ranked_recommendations(project_id, required_skills, ranked_by_skill)
+
+        rows = upsert_project_matches(cursor, recommendations)
+
+        conn.commit()
+        cursor.close()
+    return rows
+
+
+# Also the ceiling for a ``workers`` value passed to a rebuild.
+RECOMMENDATION_REBUILD_WORKERS = max(1, _env_int("RECOMMENDATION_REBUILD_WORKERS", os.cpu_count() or 1))
+RECOMMENDATION_REBUILD_CHUNK_SIZE = _env_int("RECOMMENDATION_REBUILD_CHUNK_SIZE", 50)
+
+
+class SharedCandidatePool:
+    """
+    Candidate pool and feedback stats loaded once and scored against many projects.
+
+    Unlike ``generate_recommendations_for_project``, the pool is not narrowed
+    per project: the owner is excluded at scoring time and skill filtering
+    happens in ``rank_candidates``, so one ``CandidateScoreMatrix`` serves
+    every project in a rebuild.
+    """
+
+    def __init__(self, candidates, feedback_stats: Dict[Tuple[int, str], float]):
+        self.candidates = [dict(candidate) for candidate in candidates]
+        self.feedback_stats = feedback_stats
+        self.matrix = None
+        if np is not None and len(self.candidates) >= VECTORIZED_SCORING_MIN_CANDIDATES:
+            self.matrix = CandidateScoreMatrix(self.candidates, feedback_stats)
+
+    def recommend(self, project: dict) -> List[dict]:
+        project_id = project["project_id"]
+        owner_id = project["owner_id"]
+        required_skills = _normalize_skills(project["required_skills"])
+        limits = recommendation_limits(required_skills)
+        if self.matrix is not None:
+            ranked_by_skill = self.matrix.rank(required_skills, limits, exclude_user_ids=(owner_id,))
+        else:
+            candidates = [candidate for candidate in self.candidates if candidate["user_id"] != owner_id]
+            ranked_by_skill = rank_candidates_python(candidates, required_skills, self.feedback_stats, limits)
+        return merge_ranked_recommendations(project_id, required_skills, ranked_by_skill)
+
+
+# Set in each rebuild worker process by _init_rebuild_worker.
+_rebuild_pool: Optional[SharedCandidatePool] = None
+
+
+def _init_rebuild_worker(candidates, feedback_stats):
+    global _rebuild_pool
+    _rebuild_pool = SharedCandidatePool(candidates, feedback_stats)
+
+
+def _score_project_chunk(projects: List[dict]) -> List[dict]:
+    recommendations = []
+    for project in projects:
+        recommendations.extend(_rebuild_pool.recommend(project))
+    return recommendations
+
+
+def _rebuild_mp_context():
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def rebuild_open_project_recommendations(
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    progress=None,
+) -> dict:
+    """
+    Rescore every open project against one shared candidate pool.
+
+    Candidates and feedback stats are read once; projects are scored in chunks
+    across ``workers`` processes (inline when ``workers`` <= 1 or there is only
+    one chunk) and each chunk's slates are replaced with a single DELETE and
+    bulk upsert. ``progress(done, total, elapsed)`` is called after each chunk.
+    ``workers`` is capped at ``RECOMMENDATION_REBUILD_WORKERS``.
+    """
+    workers = RECOMMENDATION_REBUILD_WORKERS if workers is None else min(workers, RECOMMENDATION_REBUILD_WORKERS)
+    chunk_size = max(1, chunk_size or RECOMMENDATION_REBUILD_CHUNK_SIZE)
+    started = time.perf_counter()
+    match_count = 0
+
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(
+            """
+            SELECT project_id, owner_id, required_skills
+            FROM projects
+            WHERE status = 'Open'
+            ORDER BY project_id
+        """
+        )
+        projects = [dict(row) for row in cursor.fetchall()]
+        # owner_id 0 excludes nobody; each project's owner is dropped while scoring.
+        candidates = [dict(row) for row in fetch_candidate_users(cursor, 0)]
+        feedback_stats = load_feedback_stats(cursor, [candidate["user_id"] for candidate in candidates])
+        # Don't hold the read snapshot open while the workers score.
+        conn.commit()
+
+        chunks = [projects[i : i + chunk_size] for i in range(0, len(projects), chunk_size)]
+        executor = None
+        if workers > 1 and len(chunks) > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=min(workers, len(chunks)),
+                # The API process runs the DB pool, writer and listener threads;
+                # forking it can leave a child stuck on a lock one of them held.
+                mp_context=_rebuild_mp_context(),
+                initializer=_init_rebuild_worker,
+                initargs=(candidates, feedback_stats),
+            )
+            scored_chunks = executor.map(_score_project_chunk, chunks)
+        else:
+            _init_rebuild_worker(candidates, feedback_stats)
+            scored_chunks = map(_score_project_chunk, chunks)
+
+        done = 0
+        try:
+            for chunk, recommendations in zip(chunks, scored_chunks):
+                cursor.execute(
+                    "DELETE FROM project_matches WHERE project_id = ANY(%s)",
+                    ([project["project_id"] for project in chunk],),
+                )
+                match_count += len(upsert_project_matches(cursor, recommendations))
+                conn.commit()
+                done += len(chunk)
+                if progress:
+                    progress(done, len(projects), time.perf_counter() - started)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            cursor.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "projects": len(projects),
+        "candidates": len(candidates),
+        "matches": match_count,
+        "seconds": round(elapsed, 3),
+        "projects_per_second": round(len(projects) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+class RecommendationRebuild:
+    """Runs ``rebuild_open_project_recommendations`` one at a time and tracks its progress."""
+
+    def __init__(self, rebuild):
+        self._rebuild = rebuild
+        self._lock = threading.Lock()
+        self._state = {"status": "idle"}
+
+    def start(self, workers: Optional[int] = None, chunk_size: Optional[int] = None, wait: bool = False) -> dict:
+        """Start a rebuild in a background thread, or inline when ``wait`` is set."""
+        with self._lock:
+            if self._state["status"] == "running":
+                raise HTTPException(status_code=409, detail="A recommendation rebuild is already running")
+            self._state = {
+                "status": "running",
+                "started_at": time.time(),
+                "finished_at": None,
+                "done": 0,
+                "total": None,
+                "result": None,
+                "error": None,
+            }
+        if wait:
+            self._run(workers, chunk_size)
+        else:
+            threading.Thread(
+                target=self._run, args=(workers, chunk_size), name="recommendation-rebuild", daemon=True
+            ).start()
+        return self.status()
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._state)
+
+    def _run(self, workers: Optional[int], chunk_size: Optional[int]):
+        try:
+            result = self._rebuild(workers=workers, chunk_size=chunk_size, progress=self._progress)
+        except Exception as exc:
+            print(f"Recommendation rebuild failed: {exc}")
+            with self._lock:
+                self._state.update(status="failed", finished_at=time.time(), error=str(exc))
+            return
+        with self._lock:
+            self._state.update(status="succeeded", finished_at=time.time(), result=result)
+
+    def _progress(self, done: int, total: int, elapsed: float):
+        with self._lock:
+            self._state.update(done=done, total=total)
+
+
+def format_recommendation_rebuild(state: dict) -> dict:
+    def iso(timestamp):
+        return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+    result = state.get("result") or {}
+    return {
+        "status": state["status"],
+        "startedAt": iso(state.get("started_at")),
+        "finishedAt": iso(state.get("finished_at")),
+        "projectsDone": state.get("done", 0),
+        "projectsTotal": state.get("total"),
+        "candidates": result.get("candidates"),
+        "matchCount": result.get("matches"),
+        "seconds": result.get("seconds"),
+        "projectsPerSecond": result.get("projects_per_second"),
+        "error": state.get("error"),
+    }
+
+
+recommendation_rebuild = RecommendationRebuild(rebuild_open_project_recommendations)
+
+
+class RecommendationJobQueue:
+    """
+    In-process queue that runs recommendation refreshes on worker threads.
+
+    Submissions are debounced per project: a refresh requested while another
+    one for the same project is still queued joins that job (pushing its start
+    back by ``debounce_seconds``, but never past ``max_delay_seconds`` after it
+    was first queued). A refresh requested while one is running queues a single
+    follow-up job, so a burst of requests costs at most two runs. Finished jobs
+    are kept for status polling up to ``history`` entries. ``persist(job)``, if
+    given, is called with a snapshot whenever a job is queued, coalesced,
+    started or finished, so other workers can answer status polls.
+    """
+
+    def __init__(
+        self,
+        run_job,
+        workers: int = 2,
+        debounce_seconds: float = 0.5,
+        max_delay_seconds: float = 5.0,
+        history: int = 1000,
+        on_finished=None,
+        persist=None,
+    ):
+        self._run_job = run_job
+        self.persist = persist
+        self.workers = max(1, workers)
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.history = history
+        self.on_finished = on_finished
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._queued: Dict[int, dict] = {}
+        self._running: Set[int] = set()
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    def start(self):
+        with self._cond:
+            self._stopped = False
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._worker, name=f"recommendation-worker-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, project_id: int, owner_id: Optional[int] = None) -> dict:
+        if not self._threads:
+            self.start()
+        now = time.time()
+        with self._cond:
+            job = self._queued.get(project_id)
+            if job:
+                job["coalesced"] += 1
+                job["run_at"] = min(now + self.debounce_seconds, job["submitted_at"] + self.max_delay_seconds)
+                if owner_id and not job["owner_id"]:
+                    job["owner_id"] = owner_id
+            else:
+                job = {
+                    "job_id": uuid.uuid4().hex,
+                    "project_id": project_id,
+                    "owner_id": owner_id,
+                    "status": "queued",
+                    "submitted_at": now,
+                    "run_at": now + self.debounce_seconds,
+                    "started_at": None,
+                    "finished_at": None,
+                    "coalesced": 0,
+                    "match_count": None,
+                    "error": None,
+                }
+                self._queued[project_id] = job
+                self._jobs[job["job_id"]] = job
+                self._trim_history_locked()
+                self._cond.notify()
+            snapshot = dict(job)
+        self._persist(snapshot)
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._queued),
+                "running": len(self._running),
+                "tracked": len(self._jobs),
+                "workers": len(self._threads),
+            }
+
+    def _persist(self, job: dict):
+        if not self.persist:
+            return
+        try:
+            self.persist(job)
+        except Exception as e:
+            print(f"Failed to store recommendation job {job['job_id']}: {e}")
+
+    def _next_ready_locked(self):
+        """Return (job, wait_seconds): a runnable job, or how long until one may be."""
+        now = time.time()
+        best = None
+        for project_id, job in self._queued.items():
+            if project_id in self._running:
+                continue
+            if best is None or job["run_at"] < best["run_at"]:
+                best = job
+        if best is None:
+            return None, None
+        wait = best["run_at"] - now
+        return (best, 0.0) if wait <= 0 else (None, wait)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    job, wait = self._next_ready_locked()
+                    if job:
+                        break
+                    self._cond.wait(wait)
+                del self._queued[job["project_id"]]
+                self._running.add(job["project_id"])
+                job["status"] = "running"
+                job["started_at"] = time.time()
+                started = dict(job)
+            self._persist(started)
+
+            try:
+                matches = self._run_job(job["project_id"])
+            except Exception as e:
+                status, match_count = "failed", None
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+            else:
+                status, match_count, error = "completed", len(matches or []), None
+
+            with self._cond:
+                job["status"] = status
+                job["match_count"] = match_count
+                job["error"] = error
+                job["finished_at"] = time.time()
+                self._running.discard(job["project_id"])
+                self._cond.notify_all()
+                snapshot = dict(job)
+            self._persist(snapshot)
+
+            if self.on_finished:
+                try:
+                    self.on_finished(snapshot)
+                except Exception as e:
+                    print(f"Recommendation job notification failed for {snapshot['job_id']}: {e}")
+
+    def _trim_history_locked(self):
+        while len(self._jobs) > self.history:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id]["status"] in {"queued", "running"}:
+                break
+            del self._jobs[oldest_id]
+
+
+def format_recommendation_job(job: dict) -> dict:
+    def iso(timestamp):
+        return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+    return {
+        "jobId": job["job_id"],
+        "projectId": job["project_id"],
+        "status": job["status"],
+        "submittedAt": iso(job["submitted_at"]),
+        "startedAt": iso(job["started_at"]),
+        "finishedAt": iso(job["finished_at"]),
+        "coalescedRequests": job["coalesced"],
+        "matchCount": job["match_count"],
+        "error": job["error"],
+    }
+
+
+def _is_undecided(match_row) -> bool:
+    return match_row.get("owner_decision") == "pending" and match_row.get("user_decision") == "pending"
+
+
+def best_recommendation_for_candidate(project_id: int, required_skills, candidate, feedback_stats):
+    """Score one candidate against a project the way the full pipeline does (best skill wins)."""
+    normalized_required = _normalize_skills(required_skills)
+    ranked = rank_candidates_python([candidate], normalized_required, feedback_stats)
+    best = None
+    for skill in normalized_required or [DEFAULT_SKILL_BUCKET]:
+        for entry in ranked.get(skill, []):
+            if best is None or entry["composite_score"] > best["composite_score"]:
+                best = {
+                    "project_id": project_id,
+                    "recommended_user_id": candidate["user_id"],
+                    "required_skill": None if skill == DEFAULT_SKILL_BUCKET else skill,
+                    "skill_match_score": entry["skill_match_score"],
+                    "engagement_score_snapshot": entry["engagement"],
+                    "rating_snapshot": entry["rating"],
+                    "composite_score": entry["composite_score"],
+                }
+    return best
+
+
+def plan_incremental_match_updates(user_id: int, candidate, feedback_stats, projects, slates) -> dict:
+    """
+    Work out how one user's changed profile affects existing recommendations.
+
+    ``candidate`` is the user's ``fetch_candidate_users`` row (``None`` when the
+    user is no longer eligible), ``projects`` maps project_id to its owner,
+    required skills and status, and ``slates`` are the automated matches of those
+    projects. Only undecided matches are touched: the user's own match is
+    rescored (or dropped when they no longer qualify), and a user without a
+    match joins a skill's slate when it has room or when they outscore its
+    weakest undecided match, which is evicted.
+    """
+    inserts, updates, deletes = [], [], []
+    slates_by_project: Dict[int, List[dict]] = defaultdict(list)
+    for row in slates:
+        slates_by_project[row["project_id"]].append(row)
+
+    for project_id, project in projects.items():
+        rows = slates_by_project.get(project_id, [])
+        own_rows = [row for row in rows if row["recommended_user_id"] == user_id]
+        if any(not _is_undecided(row) for row in own_rows):
+            continue
+        own_row = own_rows[0] if own_rows else None
+
+        best = None
+        if candidate is not None and project.get("status") == "Open" and project.get("owner_id") != user_id:
+            best = best_recommendation_for_candidate(
+                project_id, project.get("required_skills"), candidate, feedback_stats
+            )
+
+        if best is None:
+            if own_row:
+                deletes.append(own_row["match_id"])
+            continue
+
+        if own_row:
+            updates.append(dict(best, match_id=own_row["match_id"]))
+            continue
+
+        slate = [
+            row
+            for row in rows
+            if row["required_skill"] == best["required_skill"] and row["recommended_user_id"] != user_id
+        ]
+        limit = recommendations_per_skill(best["required_skill"] or DEFAULT_SKILL_BUCKET)
+        if len(slate) < limit:
+            inserts.append(best)
+            continue
+        evictable = [row for row in slate if _is_undecided(row)]
+        if not evictable:
+            continue
+        weakest = min(
+            evictable,
+            key=lambda row: float("-inf") if row.get("composite_score") is None else float(row["composite_score"]),
+        )
+        weakest_score = weakest.get("composite_score")
+        if weakest_score is None or best["composite_score"] > float(weakest_score):
+            deletes.append(weakest["match_id"])
+            inserts.append(best)
+
+    return {"inserts": inserts, "updates": updates, "deletes": deletes}
+
+
+def refresh_recommendations_for_user(user_id: int) -> dict:
+    """Rescore only the (project, user) pairs affected by a change to ``user_id``."""
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+        # owner_id 0 excludes nobody; project owners are skipped per project below.
+        candidate_rows = fetch_candidate_users(cursor, 0, {user_id})
+        candidate = dict(candidate_rows[0]) if candidate_rows else None
+        candidate_skills = _normalize_skills(candidate.get("skills")) if candidate else []
+
+        cursor.execute(
+            """
+            SELECT p.project_id, p.owner_id, p.required_skills, p.status
+            FROM projects p
+            WHERE p.project_id IN (
+                SELECT project_id
+                FROM project_matches
+                WHERE recommended_user_id = %s
+                  AND source_type = 'automated'
+                  AND owner_decision = 'pending'
+                  AND user_decision = 'pending'
+            )
+            OR (
+                %s
+                AND p.status = 'Open'
+                AND p.owner_id <> %s
+                AND (
+                    COALESCE(cardinality(p.required_skills), 0) = 0
+                    OR EXISTS (
+                        SELECT 1 FROM unnest(p.required_skills) AS s(skill)
+                        WHERE lower(trim(s.skill)) = ANY(%s)
+                    )
+                )
+            )
+        """,
+            (user_id, candidate is not None, user_id, candidate_skills),
+        )
+        projects = {row["project_id"]: dict(row) for row in cursor.fetchall()}
+        if not projects:
+            cursor.close()
+            return {"inserted": 0, "updated": 0, "deleted": 0}
+
+        cursor.execute(
+            """
+            SELECT match_id, project_id, recommended_user_id, required_skill,
+                   composite_score, owner_decision, user_decision
+            FROM project_matches
+            WHERE project_id = ANY(%s) AND source_type = 'automated'
+        """,
+            (list(projects),),
+        )
+        slates = [dict(row) for row in cursor.fetchall()]
+        feedback_stats = load_feedback_stats(cursor, [user_id]) if candidate else {}
+
+        plan = plan_incremental_match_updates(user_id, candidate, feedback_stats, projects, slates)
+
+        if plan["deletes"]:
+            cursor.execute(
+                "DELETE FROM project_matches WHERE match_id = ANY(%s)",
+                (plan["deletes"],),
+            )
+        if plan["updates"]:
+            updates = plan["updates"]
+            cursor.execute(
+                """
+                UPDATE project_matches pm
+                SET required_skill = rec.required_skill,
+                    skill_match_score = rec.skill_match_score,
+                    engagement_score_snapshot = rec.engagement_score_snapshot,
+                    rating_snapshot = rec.rating_snapshot,
+                    composite_score = rec.composite_score,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM unnest(
+                    %s::int[], %s::text[], %s::numeric[], %s::numeric[], %s::numeric[], %s::numeric[]
+                ) AS rec(
+                    match_id,
+                    required_skill,
+                    skill_match_score,
+                    engagement_score_snapshot,
+                    rating_snapshot,
+                    composite_score
+                )
+                WHERE pm.match_id = rec.match_id
+            """,
+                (
+                    [rec["match_id"] for rec in updates],
+                    [rec["required_skill"] for rec in updates],
+                    [rec["skill_match_score"] for rec in updates],
+                    [rec["engagement_score_snapshot"] for rec in updates],
+                    [rec["rating_snapshot"] for rec in updates],
+                    [rec["composite_score"] for rec in updates],
+                ),
+            )
+        upsert_project_matches(cursor, plan["inserts"])
+
+        conn.commit()
+        cursor.close()
+    return {
+        "inserted": len(plan["inserts"]),
+        "updated": len(plan["updates"]),
+        "deleted": len(plan["deletes"]),
+    }
+
+
+class RecommendationUpdater:
+    """
+    Background worker that applies ``refresh_recommendations_for_user`` to users
+    whose skills, engagement, rating or feedback stats changed.
+
+    Callers mark a user dirty after the transaction that changed them commits
+    (marking earlier could rescore from the old values and clear the flag),
+    so the updater adds no queries to that transaction. A user is processed
+    once ``debounce_seconds`` pass without further changes; a burst of
+    engagement events for one user costs a single rescore.
+    """
+
+    def __init__(
+        self,
+        refresh_user,
+        debounce_seconds: float = 1.0,
+        batch_size: int = 100,
+        poll=None,
+        poll_interval: float = 30.0,
+    ):
+        self._refresh_user = refresh_user
+        self.debounce_seconds = debounce_seconds
+        self.batch_size = batch_size
+        # poll() runs every poll_interval seconds to discover changes made
+        # outside this process (e.g. skill edits from the Next.js routes).
+        self._poll = poll
+        self.poll_interval = poll_interval
+        self._next_poll = 0.0
+        self._dirty: Dict[int, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._stats = {"processed": 0, "failed": 0, "inserted": 0, "updated": 0, "deleted": 0}
+
+    def mark_dirty(self, user_id: Optional[int]):
+        if not user_id:
+            return
+        with self._cond:
+            self._dirty[user_id] = time.monotonic()
+            self._cond.notify()
+
+    def mark_many(self, user_ids):
+        for user_id in user_ids:
+            self.mark_dirty(user_id)
+
+    def start(self):
+        with self._cond:
+            self._stopped = False
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._worker, name="recommendation-updater", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return dict(self._stats, pending=len(self._dirty))
+
+    def _take_ready_locked(self):
+        now = time.monotonic()
+        ready = [
+            user_id
+            for user_id, marked_at in self._dirty.items()
+            if now - marked_at >= self.debounce_seconds
+        ][: self.batch_size]
+        for user_id in ready:
+            del self._dirty[user_id]
+        wait = None
+        if not ready and self._dirty:
+            wait = max(0.0, min(self._dirty.values()) + self.debounce_seconds - now)
+        return ready, wait
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    poll_due = self._poll is not None and time.monotonic() >= self._next_poll
+                    if poll_due:
+                        break
+                    ready, wait = self._take_ready_locked()
+                    if ready:
+                        break
+                    if self._poll is not None:
+                        until_poll = max(0.0, self._next_poll - time.monotonic())
+                        wait = until_poll if wait is None else min(wait, until_poll)
+                    self._cond.wait(wait)
+            if poll_due:
+                self._next_poll = time.monotonic() + self.poll_interval
+                try:
+                    self._poll()
+                except Exception as e:
+                    print(f"Recommendation updater poll failed: {e}")
+                continue
+            for user_id in ready:
+                try:
+                    result = self._refresh_user(user_id)
+                except Exception as e:
+                    print(f"Incremental recommendation update failed for user {user_id}: {e}")
+                    with self._cond:
+                        self._stats["failed"] += 1
+                    continue
+                with self._cond:
+                    self._stats["processed"] += 1
+                    for key in ("inserted", "updated", "deleted"):
+                        self._stats[key] += (result or {}).get(key, 0)
+
+
+def sync_skill_index():
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        skill_index.sync(cursor)
+        cursor.close()
+
+
+recommendation_updater = RecommendationUpdater(
+    refresh_recommendations_for_user,
+    debounce_seconds=_env_float("RECOMMENDATION_UPDATE_DEBOUNCE_SECONDS", 1.0),
+    poll=sync_skill_index,
+    poll_interval=_env_float("SKILL_INDEX_POLL_SECONDS", 30.0),
+)
+skill_index.on_change = recommendation_updater.mark_many
+
+
+class ProjectCreateRequest(BaseModel):
+    title: str
+    description: Optional[str] = None
+    required_skills: List[str]
+    owner_id: int
+    roles_available: int = 0
+    status: Optional[str] = "Open"
+
+
+class MatchDecisionRequest(BaseModel):
+    decision: str
+    reason: Optional[dict] = None
+
+
+class SubmitRatingRequest(BaseModel):
+    score: float
+    feedback: Optional[str] = None
+    rater_id: int
+
+    @validator("score")
+    def validate_score(cls, value):
+        if value < 0 or value > 5:
+            raise ValueError("Score must be between 0 and 5")
+        return round(float(value), 1)
+
+    @validator("rater_id")
+    def validate_rater(cls, value):
+        if value <= 0:
+            raise ValueError("Invalid rater_id")
+        return value
+
+
+def _safe_init_db():
+    """Initialize chat/rating/feedback tables. Skip if base schema (users) does not exist."""
+    try:
+        init_chat_tables()
+        init_rating_tables()
+        init_feedback_learning_tables()
+        init_skill_index_tables()
+        init_analytics_rollup_tables()
+        init_inactivity_tables()
+        init_leaderboard_tables()
+        init_user_profile_tables()
+        init_recommendation_job_table()
+        analytics_loader.cache.init_storage()
+        print("✅ Database tables initialized")
+    except Exception as e:
+        err_msg = str(e).lower()
+        if "does not exist" in err_msg or "undefined_table" in err_msg:
+            print(
+                "⚠️  Database schema not initialized. Run init_db.sql and schema_updates.sql "
+                "against your DATABASE_URL. See repo docs for setup."
+            )
+        else:
+            raise
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global event_loop
+    event_loop = asyncio.get_running_loop()
+    configure_db_threadpool()
+    db_pool.open()
+    _safe_init_db()
+    recommendation_jobs.start()
+    recommendation_updater.start()
+    inactivity_sweeper.start()
+    user_profile_sync.run_once()
+    user_profile_sync.start()
+    leaderboard_rebuilder.run_once()
+    leaderboard_rebuilder.start()
+    chat_writer.start()
+    await manager.start()
+    await typing_indicators.start()
+    print("✅ Application started successfully")
+
+    yield
+    # Flush queued messages and deliver their acknowledgements while the loop
+    # and the sockets are still up.
+    await run_in_threadpool(chat_writer.stop)
+    await drain_chat_acknowledgements()
+    await typing_indicators.stop()
+    await manager.stop()
+    leaderboard_rebuilder.stop()
+    user_profile_sync.stop()
+    inactivity_sweeper.stop()
+    recommendation_updater.stop()
+    recommendation_jobs.stop()
+    db_pool.close()
+    print("👋 Application shutting down")
+
+
+app = FastAPI(lifespan=lifespan, title="Konverge API")
+
+
+@app.get("/")
+async def root():
+    """Root endpoint - API info and links"""
+    return {
+        "message": "Konverge API",
+        "docs": "/docs",
+        "health": "/health",
+        "test": "/api/test",
+    }
+
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=[
+        "http://localhost:3000",
+        "https://konverge-jmdm.vercel.app",
+    ],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+def _latency_summary(samples) -> dict:
+    """Count and millisecond percentiles for a window of latency samples (seconds)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"samples": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+
+    def percentile(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+    return {
+        "samples": len(ordered),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+class LocalBackplane:
+    """
+    In-process WebSocket backplane.
+
+    Every ``ConnectionManager`` started on the same instance receives every
+    published event, so a single worker needs nothing external and tests can
+    stand several managers up as if they were separate workers. Events are
+    round-tripped through JSON exactly as they would be on the wire.
+    """
+
+    name = "local"
+    MAX_PAYLOAD_BYTES = None
+
+    def __init__(self):
+        self._subscribers: List = []
+        self._stats = {"published": 0, "delivered": 0, "errors": 0}
+
+    async def start(self, on_event):
+        self._subscribers.append(on_event)
+
+    async def stop(self, on_event=None):
+        self._subscribers = [subscriber for subscriber in self._subscribers if subscriber != on_event]
+
+    async def publish(self, event: dict):
+        payload = json.dumps(event, default=str)
+        self._stats["published"] += 1
+        for subscriber in list(self._subscribers):
+            try:
+                await subscriber(json.loads(payload))
+                self._stats["delivered"] += 1
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Backplane delivery failed: {e}")
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "subscribers": len(self._subscribers), **self._stats}
+
+
+class PostgresBackplane:
+    """
+    WebSocket backplane over Postgres LISTEN/NOTIFY, for several workers or nodes.
+
+    A listener thread holds its own connection on ``channel`` and hands each
+    notification to the event loop. Publishes are queued and a publisher
+    thread sends whatever is waiting in one ``pg_notify`` round trip, so a
+    burst of broadcasts costs one statement rather than one per event.
+    NOTIFY payloads are capped at 8000 bytes; larger events are delivered on
+    the local worker only and counted as ``oversized``. Chat messages are
+    checked against ``MAX_PAYLOAD_BYTES`` before they are accepted (see
+    ``ConnectionManager.fits_backplane``), so only other events can be dropped.
+    """
+
+    name = "postgres"
+    MAX_PAYLOAD_BYTES = 7999
+
+    def __init__(self, connect, channel: str = "konverge_ws", reconnect_delay: float = 1.0):
+        self._connect = connect
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._on_event = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._outbox: deque = deque()
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stats = {
+            "published": 0,
+            "received": 0,
+            "batches": 0,
+            "oversized": 0,
+            "errors": 0,
+            "reconnects": 0,
+        }
+
+    async def start(self, on_event):
+        self._on_event = on_event
+        self._loop = asyncio.get_running_loop()
+        self._stopped.clear()
+        self._threads = [
+            threading.Thread(target=self._listen, name="ws-backplane-listener", daemon=True),
+            threading.Thread(target=self._publish_worker, name="ws-backplane-publisher", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    async def stop(self, on_event=None):
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+        threads, self._threads = self._threads, []
+        for thread in threads:
+            await run_in_threadpool(thread.join, 5.0)
+
+    async def publish(self, event: dict):
+        payload = json.dumps(event, default=str)
+        if len(payload.encode("utf-8")) > self.MAX_PAYLOAD_BYTES:
+            with self._cond:
+                self._stats["oversized"] += 1
+            return
+        with self._cond:
+            self._outbox.append(payload)
+            self._stats["published"] += 1
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "backend": self.name,
+                "channel": self.channel,
+                "queued": len(self._outbox),
+                "listening": any(thread.is_alive() for thread in self._threads),
+                **self._stats,
+            }
+
+    def _count(self, key: str):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.set_session(autocommit=True)
+                cursor = conn.cursor()
+                cursor.execute(f'LISTEN "{self.channel}"')
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 0.5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._count("received")
+                        asyncio.run_coroutine_threadsafe(self._on_event(json.loads(notify.payload)), self._loop)
+            except Exception as e:
+                self._count("errors")
+                print(f"WebSocket backplane listener failed, reconnecting: {e}")
+                self._count("reconnects")
+                self._stopped.wait(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _publish_worker(self):
+        conn = None
+        while True:
+            with self._cond:
+                while not self._outbox and not self._stopped.is_set():
+                    self._cond.wait()
+                if not self._outbox:
+                    break
+                payloads = list(self._outbox)
+                self._outbox.clear()
+            try:
+                if conn is None or conn.closed:
+                    conn = self._connect()
+                    conn.set_session(autocommit=True)
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) WITH ORDINALITY AS p (payload, position) ORDER BY position",
+                    (self.channel, payloads),
+                )
+                cursor.close()
+                self._count("batches")
+            except Exception as e:
+                self._count("errors")
+                print(f"WebSocket backplane publish of {len(payloads)} events failed: {e}")
+                if conn is not None:
+                    conn.close()
+                conn = None
+                self._stopped.wait(self.reconnect_delay)
+        if conn is not None:
+            conn.close()
+
+
+def make_ws_backplane():
+    backend = os.getenv("WS_BACKPLANE", "local").lower()
+    if backend == "postgres":
+        return PostgresBackplane(_connect_raw, channel=os.getenv("WS_BACKPLANE_CHANNEL", "konverge_ws"))
+    if backend != "local":
+        print(f"⚠️  Unknown WS_BACKPLANE '{backend}', using the in-process backplane")
+    return LocalBackplane()
+
+
+class ClientConnection:
+    """
+    One WebSocket's bounded outbound queue, drained by its own writer task.
+
+    ``send`` never waits on the socket, so a broadcast only enqueues and one
+    slow client cannot hold up delivery to the others. When ``max_queue``
+    messages are already waiting, ``policy`` decides what gives:
+
+    - ``drop``: incoming typing events are dropped, and queued ones are
+      evicted to make room for chat messages;
+    - ``coalesce`` (default): as ``drop``, and a typing event replaces the
+      queued one from the same user in the same thread at any depth;
+    - ``disconnect``: the socket is closed.
+
+    Chat messages are never discarded: if one still cannot be queued the
+    socket is closed (code 1013) so the client reconnects and refetches.
+    A send that takes longer than ``send_timeout`` also closes it.
+    """
+
+    EPHEMERAL_TYPES = frozenset({"user_typing"})
+    POLICIES = ("drop", "coalesce", "disconnect")
+    __slots__ = (
+        "websocket",
+        "user_id",
+        "max_queue",
+        "policy",
+        "send_timeout",
+        "counters",
+        "_queue",
+        "_ephemeral",
+        "_wake",
+        "_closing",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        max_queue: int = 256,
+        policy: str = "coalesce",
+        send_timeout: float = 10.0,
+        counters: Optional[dict] = None,
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_queue = max(1, max_queue)
+        self.policy = policy if policy in self.POLICIES else "coalesce"
+        self.send_timeout = send_timeout
+        self.counters = counters if counters is not None else defaultdict(int)
+        # Coalesced typing events sit in the queue as a key into _ephemeral, so
+        # a newer state can replace the queued one in O(1).
+        self._queue: deque = deque()
+        self._ephemeral: Dict[tuple, dict] = {}
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._writer())
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def send(self, message: dict) -> bool:
+        """Queue ``message`` for this socket; returns False if it was dropped."""
+        if self._closing:
+            return False
+        ephemeral = message.get("type") in self.EPHEMERAL_TYPES
+        key = None
+        if ephemeral and self.policy == "coalesce":
+            key = (message.get("type"), message.get("thread_id"), message.get("user_id"))
+            if key in self._ephemeral:
+                self._ephemeral[key] = message
+                self.counters["coalesced"] += 1
+                return True
+
+        if len(self._queue) >= self.max_queue:
+            if self.policy == "disconnect":
+                self._close_slow()
+                return False
+            if ephemeral:
+                self.counters["dropped"] += 1
+                return False
+            if not self._evict_ephemeral():
+                self._close_slow()
+                return False
+
+        if key is not None:
+            self._ephemeral[key] = message
+            self._queue.append(key)
+        else:
+            self._queue.append(message)
+        self.counters["queued"] += 1
+        self._wake.set()
+        return True
+
+    def close(self):
+        self._closing = True
+        self._task.cancel()
+
+    def finish(self):
+        """Stop accepting messages; the writer sends what is queued, then closes the socket."""
+        self._closing = True
+        self._wake.set()
+
+    def _evict_ephemeral(self) -> bool:
+        for index, entry in enumerate(self._queue):
+            if isinstance(entry, tuple) or entry.get("type") in self.EPHEMERAL_TYPES:
+                del self._queue[index]
+                if isinstance(entry, tuple):
+                    self._ephemeral.pop(entry, None)
+                self.counters["dropped"] += 1
+                return True
+        return False
+
+    def _close_slow(self, refused: int = 1):
+        print(f"Closing slow WebSocket for user {self.user_id} ({len(self._queue)} messages queued)")
+        self.counters["dropped"] += len(self._queue) + refused
+        self.counters["slow_disconnects"] += 1
+        self._queue.clear()
+        self._ephemeral.clear()
+        self._closing = True
+        self._wake.set()
+
+    async def _writer(self):
+        while True:
+            if not self._queue:
+                if self._closing:
+                    break
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            entry = self._queue.popleft()
+            message = self._ephemeral.pop(entry) if isinstance(entry, tuple) else entry
+            try:
+                await asyncio.wait_for(self.websocket.send_json(message), self.send_timeout)
+                self.counters["sent"] += 1
+            except asyncio.TimeoutError:
+                print(f"WebSocket send to user {self.user_id} timed out")
+                self._close_slow(refused=0)
+            except Exception as e:
+                print(f"Error sending message to {self.user_id}: {e}")
+                self.counters["send_errors"] += 1
+                self._closing = True
+                self._queue.clear()
+                self._ephemeral.clear()
+        try:
+            await self.websocket.close(code=1013)
+        except Exception:
+            pass
+
+
+class ConnectionManager:
+    """
+    Tracks this worker's WebSocket connections and the threads they joined.
+
+    A user may hold several sockets at once (tabs, devices); each is its own
+    ``ClientConnection`` in the user's set, everything addressed to the user
+    reaches all of them, and closing one leaves the others untouched. Thread
+    membership is per user and is dropped when their last socket closes.
+
+    Messages are delivered to local sockets straight away and published to
+    the ``backplane`` tagged with this worker's id; every other worker
+    delivers the event to its own sockets. Thread and user ids are kept as
+    strings so clients sending either form land in the same room.
+    """
+
+    def __init__(
+        self,
+        backplane=None,
+        max_queue: int = 256,
+        slow_consumer_policy: str = "coalesce",
+        send_timeout: float = 10.0,
+    ):
+        self.worker_id = uuid.uuid4().hex
+        self.backplane = backplane if backplane is not None else LocalBackplane()
+        self.max_queue = max_queue
+        self.slow_consumer_policy = slow_consumer_policy
+        self.send_timeout = send_timeout
+        self.outbound = defaultdict(int)
+        self.active_connections: Dict[str, Set[ClientConnection]] = {}
+        self.thread_participants: Dict[str, Set[str]] = {}
+        self._user_threads: Dict[str, Set[str]] = {}
+        self._hop_latency: deque = deque(maxlen=1000)
+        self._received = 0
+
+    async def start(self):
+        await self.backplane.start(self.receive)
+
+    async def stop(self, drain_timeout: float = 2.0):
+        await self.backplane.stop(self.receive)
+        connections = [connection for sessions in self.active_connections.values() for connection in sessions]
+        # Let writers send what is already queued (e.g. final acknowledgements)
+        # before the sockets are closed.
+        for connection in connections:
+            connection.finish()
+        if connections:
+            await asyncio.wait([connection._task for connection in connections], timeout=drain_timeout)
+        for connection in connections:
+            connection.close()
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(sessions) for sessions in self.active_connections.values())
+
+    async def connect(self, websocket: WebSocket, user_id: str) -> ClientConnection:
+        await websocket.accept()
+        connection = ClientConnection(
+            websocket,
+            user_id,
+            max_queue=self.max_queue,
+            policy=self.slow_consumer_policy,
+            send_timeout=self.send_timeout,
+            counters=self.outbound,
+        )
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        print(
+            f"User {user_id} connected ({len(self.active_connections[user_id])} sessions). "
+            f"Total users: {len(self.active_connections)}"
+        )
+        return connection
+
+    def disconnect(self, connection: ClientConnection):
+        connection.close()
+        sessions = self.active_connections.get(connection.user_id)
+        if sessions is None or connection not in sessions:
+            return
+        sessions.discard(connection)
+        if not sessions:
+            del self.active_connections[connection.user_id]
+            for thread_id in list(self._user_threads.get(connection.user_id, ())):
+                self.leave_thread(thread_id, connection.user_id)
+        print(
+            f"User {connection.user_id} disconnected ({len(sessions)} sessions left). "
+            f"Total users: {len(self.active_connections)}"
+        )
+
+    def join_thread(self, thread_id: str, user_id: str):
+        thread_id = str(thread_id)
+        self.thread_participants.setdefault(thread_id, set()).add(user_id)
+        self._user_threads.setdefault(user_id, set()).add(thread_id)
+
+    def leave_thread(self, thread_id: str, user_id: str):
+        thread_id = str(thread_id)
+        if thread_id in self.thread_participants:
+            self.thread_participants[thread_id].discard(user_id)
+            if not self.thread_participants[thread_id]:
+                del self.thread_participants[thread_id]
+        if user_id in self._user_threads:
+            self._user_threads[user_id].discard(thread_id)
+            if not self._user_threads[user_id]:
+                del self._user_threads[user_id]
+
+    async def send_personal_message(self, message: dict, user_id: str):
+        user_id = str(user_id)
+        await self._deliver_to_user(message, user_id)
+        await self._publish({"kind": "user", "user_id": user_id, "message": message})
+
+    async def broadcast_to_thread(
+        self, thread_id: str, message: dict, exclude_user: str = None
+    ):
+        thread_id = str(thread_id)
+        exclude_user = str(exclude_user) if exclude_user is not None else None
+        await self._deliver_to_thread(thread_id, message, exclude_user)
+        await self._publish(self._thread_event(thread_id, message, exclude_user))
+
+    def fits_backplane(self, thread_id: str, message: dict, exclude_user: str = None) -> bool:
+        """Whether a thread broadcast of ``message`` fits in one backplane event."""
+        limit = self.backplane.MAX_PAYLOAD_BYTES
+        if limit is None:
+            return True
+        event = self._stamp(self._thread_event(thread_id, message, exclude_user))
+        return len(json.dumps(event, default=str).encode("utf-8")) <= limit
+
+    async def receive(self, event: dict):
+        """Deliver an event published by another worker to this worker's sockets."""
+        if event.get("origin") == self.worker_id:
+            return
+        self._received += 1
+        self._hop_latency.append(max(0.0, time.time() - event.get("sent_at", time.time())))
+        if event.get("kind") == "user":
+            await self._deliver_to_user(event["message"], event["user_id"])
+        elif event.get("kind") == "thread":
+            await self._deliver_to_thread(event["thread_id"], event["message"], event.get("exclude_user"))
+
+    def stats(self) -> dict:
+        depths = [c.depth for sessions in self.active_connections.values() for c in sessions]
+        return {
+            "worker_id": self.worker_id,
+            "users": len(self.active_connections),
+            "connections": self.connection_count,
+            "outbound": {
+                **self.outbound,
+                "policy": self.slow_consumer_policy,
+                "queue_depth": sum(depths),
+                "max_queue_depth": max(depths, default=0),
+            },
+            "threads": len(self.thread_participants),
+            "received": self._received,
+            "hop_latency": _latency_summary(self._hop_latency),
+            "backplane": self.backplane.stats(),
+        }
+
+    @staticmethod
+    def _thread_event(thread_id, message: dict, exclude_user) -> dict:
+        exclude_user = str(exclude_user) if exclude_user is not None else None
+        return {"kind": "thread", "thread_id": str(thread_id), "exclude_user": exclude_user, "message": message}
+
+    def _stamp(self, event: dict) -> dict:
+        event.update(origin=self.worker_id, sent_at=time.time())
+        return event
+
+    async def _publish(self, event: dict):
+        self._stamp(event)
+        try:
+            await self.backplane.publish(event)
+        except Exception as e:
+            print(f"Backplane publish failed: {e}")
+
+    async def _deliver_to_user(self, message: dict, user_id: str):
+        for connection in self.active_connections.get(user_id, ()):
+            connection.send(message)
+
+    async def _deliver_to_thread(self, thread_id: str, message: dict, exclude_user: Optional[str]):
+        for user_id in list(self.thread_participants.get(thread_id, ())):
+            if user_id != exclude_user:
+                await self._deliver_to_user(message, user_id)
+
+
+manager = ConnectionManager(
+    make_ws_backplane(),
+    max_queue=_env_int("WS_MAX_QUEUE", 256),
+    slow_consumer_policy=os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce").lower(),
+    send_timeout=_env_float("WS_SEND_TIMEOUT_SECONDS", 10.0),
+)
+
+
+class TypingCoalescer:
+    """
+    Throttles typing indicators before they are broadcast to a thread.
+
+    Only the latest state per (thread, user) is kept. A change is broadcast
+    at once if the previous broadcast for that pair is at least ``interval``
+    old; otherwise it waits until then, and a change that is reverted in the
+    meantime is never sent. Repeated "typing" frames (clients re-send one as
+    a heartbeat while the user keeps typing) extend the state and are passed
+    on at most once per ``interval``, so receivers keep showing it. A user
+    who has sent none for ``ttl`` seconds is broadcast as stopped, so a
+    closed tab cannot leave an indicator behind.
+    """
+
+    def __init__(self, broadcast, interval: float = 1.0, ttl: float = 6.0):
+        self.broadcast = broadcast
+        self.interval = interval
+        self.ttl = ttl
+        # (thread_id, user_id) -> [emitted, emitted_at, pending, expires_at]
+        self._states: Dict[Tuple[str, str], list] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._counts = {"received": 0, "emitted": 0, "expired": 0}
+
+    async def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._states.clear()
+
+    async def update(self, thread_id, user_id, is_typing: bool):
+        key = (str(thread_id), str(user_id))
+        is_typing = bool(is_typing)
+        now = time.monotonic()
+        self._counts["received"] += 1
+        state = self._states.get(key)
+        if state is None:
+            if not is_typing:
+                return
+            state = self._states[key] = [False, now - self.interval, None, 0.0]
+        if is_typing:
+            state[3] = now + self.ttl
+
+        if is_typing == state[0]:
+            state[2] = None
+            if is_typing and now - state[1] >= self.interval:
+                await self._emit(key, state, True, now)
+        elif now - state[1] >= self.interval:
+            await self._emit(key, state, is_typing, now)
+        else:
+            state[2] = is_typing
+        if self._wake is not None:
+            self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            **self._counts,
+            "active": sum(1 for state in self._states.values() if state[0]),
+            "interval": self.interval,
+            "ttl": self.ttl,
+        }
+
+    async def _emit(self, key, state, is_typing: bool, now: float):
+        state[0], state[1], state[2] = is_typing, now, None
+        self._counts["emitted"] += 1
+        thread_id, user_id = key
+        try:
+            await self.broadcast(
+                thread_id,
+                {"type": "user_typing", "thread_id": thread_id, "user_id": user_id, "is_typing": is_typing},
+                exclude_user=user_id,
+            )
+        except Exception as e:
+            print(f"Typing broadcast failed for thread {thread_id}: {e}")
+
+    def _deadline(self, state) -> float:
+        emitted, emitted_at, pending, expires_at = state
+        if emitted and pending is None:
+            return max(expires_at, emitted_at + self.interval)
+        return emitted_at + self.interval
+
+    async def _flush_due(self) -> Optional[float]:
+        """Send pending and expired states; return the next deadline, if any."""
+        now = time.monotonic()
+        next_deadline = None
+        for key, state in list(self._states.items()):
+            deadline = self._deadline(state)
+            if deadline > now:
+                next_deadline = deadline if next_deadline is None else min(next_deadline, deadline)
+                continue
+            if state[2] is not None:
+                await self._emit(key, state, state[2], now)
+            elif state[0]:
+                self._counts["expired"] += 1
+                await self._emit(key, state, False, now)
+            else:
+                del self._states[key]
+                continue
+            deadline = self._deadline(state)
+            next_deadline = deadline if next_deadline is None else min(next_deadline, deadline)
+        return next_deadline
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            next_deadline = await self._flush_due()
+            timeout = None if next_deadline is None else max(0.0, next_deadline - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+typing_indicators = TypingCoalescer(
+    manager.broadcast_to_thread,
+    interval=_env_float("WS_TYPING_INTERVAL_SECONDS", 1.0),
+    ttl=_env_float("WS_TYPING_TTL_SECONDS", 6.0),
+)
+event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def notify_recommendation_job_finished(job: dict):
+    """Push a finished job to the project owner's socket from a worker thread."""
+    if not job.get("owner_id") or event_loop is None or event_loop.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(
+        manager.send_personal_message(
+            {"type": "recommendations_ready", "job": format_recommendation_job(job)},
+            str(job["owner_id"]),
+        ),
+        event_loop,
     )
-    rows = [dict(row) for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return rows
 
 
-def generate_recommendations_for_project(project_id: int):
+def init_recommendation_job_table():
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor = conn.cursor()
 
+    # Job status shared by all workers; times are epoch seconds as in the queue.
     cursor.execute(
         """
-        SELECT project_id, owner_id, required_skills
-        FROM projects
-        WHERE project_id = %s
-    """,
-        (project_id,),
+        CREATE TABLE IF NOT EXISTS recommendation_job_status (
+            job_id VARCHAR(32) PRIMARY KEY,
+            project_id INTEGER NOT NULL,
+            owner_id INTEGER,
+            status VARCHAR(10) NOT NULL,
+            submitted_at DOUBLE PRECISION NOT NULL,
+            started_at DOUBLE PRECISION,
+            finished_at DOUBLE PRECISION,
+            coalesced INTEGER NOT NULL DEFAULT 0,
+            match_count INTEGER,
+            error TEXT
+        )
+    """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_recommendation_job_status_submitted
+        ON recommendation_job_status (submitted_at)
+    """
     )
-    project = cursor.fetchone()
-    if not project:
-        cursor.close()
-        conn.close()
-        raise HTTPException(status_code=404, detail="Project not found")
 
-    required_skills = _normalize_skills(project["required_skills"])
-    owner_id = project["owner_id"]
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print("Recommendation job table initialized")
 
-    cursor.execute("DELETE FROM project_matches WHERE project_id = %s", (project_id,))
 
-    candidates = fetch_candidate_users(cursor, owner_id)
-    feedback_stats = load_feedback_stats(cursor, [candidate["user_id"] for candidate in candidates])
-    user_best_recommendations = {}
-    normalized_required = required_skills if required_skills else ["general"]
+RECOMMENDATION_JOB_RETENTION_SECONDS = _env_float("RECOMMENDATION_JOB_RETENTION_SECONDS", 86400.0)
 
-    for skill in normalized_required:
-        skill_candidates = []
-        for candidate in candidates:
-            candidate_skills = _normalize_skills(candidate.get("skills"))
-            if skill != "general" and skill not in candidate_skills:
-                continue
-            skill_match_score = float(
-                calculate_skill_match_score(required_skills or candidate_skills, candidate_skills)
-            )
-            engagement_raw = candidate.get("engagement_score") or 0
-            rating_raw = candidate.get("rating") or 0
-            try:
-                engagement = float(engagement_raw)
-            except (TypeError, ValueError):
-                engagement = 0.0
-            try:
-                rating = float(rating_raw)
-            except (TypeError, ValueError):
-                rating = 0.0
 
-            normalized_skill = skill
-            skill_bucket = get_feedback_skill_bucket(
-                None if normalized_skill == DEFAULT_SKILL_BUCKET else normalized_skill
+def save_recommendation_job(job: dict):
+    """Upsert a job snapshot; a stale snapshot never moves a stored job backwards."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO recommendation_job_status (
+                job_id, project_id, owner_id, status, submitted_at,
+                started_at, finished_at, coalesced, match_count, error
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (job_id) DO UPDATE SET
+                owner_id = EXCLUDED.owner_id,
+                status = EXCLUDED.status,
+                started_at = EXCLUDED.started_at,
+                finished_at = EXCLUDED.finished_at,
+                coalesced = GREATEST(recommendation_job_status.coalesced, EXCLUDED.coalesced),
+                match_count = EXCLUDED.match_count,
+                error = EXCLUDED.error
+            WHERE (recommendation_job_status.started_at IS NULL OR EXCLUDED.started_at IS NOT NULL)
+              AND (recommendation_job_status.finished_at IS NULL OR EXCLUDED.finished_at IS NOT NULL)
+        """,
+            (
+                job["job_id"],
+                job["project_id"],
+                job["owner_id"],
+                job["status"],
+                job["submitted_at"],
+                job["started_at"],
+                job["finished_at"],
+                job["coalesced"],
+                job["match_count"],
+                job["error"],
+            ),
+        )
+        if job["finished_at"]:
+            cursor.execute(
+                "DELETE FROM recommendation_job_status WHERE submitted_at < %s",
+                (job["finished_at"] - RECOMMENDATION_JOB_RETENTION_SECONDS,),
             )
-            feedback_score = resolve_feedback_score(feedback_stats, candidate["user_id"], skill_bucket)
+        conn.commit()
+        cursor.close()
 
-            skill_component = skill_match_score * RECOMMENDATION_WEIGHTS["skill"]
-            engagement_component = (
-                clamp(engagement / 100.0, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["engagement"]
-            )
-            rating_component = (
-                clamp(rating / 5.0, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["rating"]
-            )
-            feedback_component = (
-                clamp(feedback_score, 0.0, 1.0) * 100.0 * RECOMMENDATION_WEIGHTS["feedback"]
-            )
-            composite_score = skill_component + engagement_component + rating_component + feedback_component
-            skill_candidates.append(
-                {
-                    "candidate": candidate,
-                    "skill_match_score": skill_match_score,
-                    "composite_score": composite_score,
-                    "engagement": engagement,
-                    "rating": rating,
-                }
-            )
 
-        skill_candidates.sort(key=lambda x: x["composite_score"], reverse=True)
-        count = 0
-        seen_users_for_skill = set()
-        for entry in skill_candidates:
-            candidate = entry["candidate"]
-            user_id = candidate["user_id"]
-            if (user_id, skill) in seen_users_for_skill:
-                continue
-            recommendation_payload = {
-                "project_id": project_id,
-                "recommended_user_id": user_id,
-                "required_skill": None if skill == "general" else skill,
-                "skill_match_score": entry["skill_match_score"],
-                "engagement_score_snapshot": entry["engagement"],
-                "rating_snapshot": entry["rating"],
-                "composite_score": entry["composite_score"],
-            }
+def load_recommendation_job(job_id: str) -> Optional[dict]:
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(
+            """
+            SELECT job_id, project_id, owner_id, status, submitted_at,
+                   started_at, finished_at, coalesced, match_count, error
+            FROM recommendation_job_status
+            WHERE job_id = %s
+        """,
+            (job_id,),
+        )
+        row = cursor.fetchone()
+        cursor.close()
+    return dict(row) if row else None
 
-            existing = user_best_recommendations.get(user_id)
-            if not existing or recommendation_payload["composite_score"] > existing["composite_score"]:
-                user_best_recommendations[user_id] = recommendation_payload
 
-            seen_users_for_skill.add((user_id, skill))
-            count += 1
-            if count >= 3:
-                break
+recommendation_jobs = RecommendationJobQueue(
+    generate_recommendations_for_project,
+    workers=_env_int("RECOMMENDATION_WORKERS", 2),
+    debounce_seconds=_env_float("RECOMMENDATION_DEBOUNCE_SECONDS", 0.5),
+    max_delay_seconds=_env_float("RECOMMENDATION_MAX_DELAY_SECONDS", 5.0),
+    on_finished=notify_recommendation_job_finished,
+    persist=save_recommendation_job,
+)
 
-    recommendations = sorted(
-        user_best_recommendations.values(), key=lambda rec: rec["composite_score"], reverse=True
-    )
 
-    for rec in recommendations:
-        rec_to_insert = rec.copy()
-        rec_to_insert.pop("composite_score", None)
+def persist_chat_messages(entries: List[dict]) -> List[dict]:
+    """
+    Insert a batch of queued chat messages in one transaction and return the
+    stored rows in the same order as ``entries``. Thread summaries and unread
+    counters are updated once per batch instead of once per message.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+        # message_id is assigned in insertion order, so inserting in queue
+        # order lets the returned rows be matched back up by sorting on it.
+        rows = execute_values(
+            cursor,
+            """
+            INSERT INTO messages (thread_id, sender_id, content, message_type)
+            SELECT v.thread_id, v.sender_id, v.content, 'text'
+            FROM (VALUES %s) AS v (position, thread_id, sender_id, content)
+            ORDER BY v.position
+            RETURNING message_id, thread_id, sender_id, content, message_type, created_at
+        """,
+            [
+                (position, int(entry["thread_id"]), int(entry["sender_id"]), entry["content"])
+                for position, entry in enumerate(entries)
+            ],
+            page_size=len(entries),
+            fetch=True,
+        )
+        messages = sorted((dict(row) for row in rows), key=lambda row: row["message_id"])
+        message_ids = [message["message_id"] for message in messages]
+
         cursor.execute(
             """
-            INSERT INTO project_matches (
-                project_id,
-                recommended_user_id,
-                required_skill,
-                skill_match_score,
-                engagement_score_snapshot,
-                rating_snapshot,
-                owner_decision,
-                user_decision,
-                owner_decided_at,
-                user_decided_at,
-                source_type
-            ) VALUES (%s, %s, %s, %s, %s, %s, 'pending', 'pending', NULL, NULL, 'automated')
-            ON CONFLICT (project_id, recommended_user_id, required_skill)
-            DO UPDATE SET
-                skill_match_score = EXCLUDED.skill_match_score,
-                engagement_score_snapshot = EXCLUDED.engagement_score_snapshot,
-                rating_snapshot = EXCLUDED.rating_snapshot,
-                owner_decision = 'pending',
-                user_decision = 'pending',
-                owner_decided_at = NULL,
-                user_decided_at = NULL,
-                updated_at = CURRENT_TIMESTAMP
+            UPDATE chat_threads t
+            SET updated_at = CURRENT_TIMESTAMP,
+                last_message_id = batch.message_id
+            FROM (
+                SELECT thread_id, MAX(message_id) AS message_id
+                FROM messages
+                WHERE message_id = ANY(%s)
+                GROUP BY thread_id
+            ) batch
+            WHERE t.thread_id = batch.thread_id
         """,
-            (
-                rec_to_insert["project_id"],
-                rec_to_insert["recommended_user_id"],
-                rec_to_insert["required_skill"],
-                rec_to_insert["skill_match_score"],
-                rec_to_insert["engagement_score_snapshot"],
-                rec_to_insert["rating_snapshot"],
-            ),
+            (message_ids,),
         )
 
-    conn.commit()
-    cursor.close()
-    conn.close()
-    return fetch_project_matches_with_users(project_id)
+        cursor.execute(
+            """
+            UPDATE thread_participants tp
+            SET unread_count = tp.unread_count + batch.unread
+            FROM (
+                SELECT p.thread_id, p.user_id, COUNT(*) AS unread
+                FROM messages m
+                JOIN thread_participants p
+                  ON p.thread_id = m.thread_id AND p.user_id != m.sender_id
+                WHERE m.message_id = ANY(%s)
+                GROUP BY p.thread_id, p.user_id
+            ) batch
+            WHERE tp.thread_id = batch.thread_id AND tp.user_id = batch.user_id
+        """,
+            (message_ids,),
+        )
 
+        conn.commit()
+        cursor.close()
+    return messages
 
-class ProjectCreateRequest(BaseModel):
-    title: str
-    description: Optional[str] = None
-    required_skills: List[str]
-    owner_id: int
-    roles_available: int = 0
-    status: Optional[str] = "Open"
 
+class ChatMessageWriter:
+    """
+    Write-behind persistence for chat messages.
+
+    ``submit`` only queues a message, so the WebSocket handler can broadcast
+    it straight away under a provisional id. A writer thread hands queued
+    messages to ``persist_batch`` once ``batch_size`` are waiting or
+    ``flush_interval`` seconds after the oldest was queued, whichever comes
+    first. ``on_flushed(entries, rows, error)`` is then called from the writer
+    thread with the stored rows (or the error) so senders can be acknowledged.
+    If a batch fails, its entries are retried one at a time so that a single
+    bad message (a deleted thread, an invalid payload) only fails itself.
+    Whatever is still queued on ``stop`` is flushed before the thread exits.
+    """
 
-class MatchDecisionRequest(BaseModel):
-    decision: str
-    reason: Optional[dict] = None
+    def __init__(self, persist_batch, batch_size: int = 100, flush_interval: float = 0.005, on_flushed=None):
+        self._persist_batch = persist_batch
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.on_flushed = on_flushed
+        self._pending: List[dict] = []
+        self._oldest_queued_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "submitted": 0,
+            "persisted": 0,
+            "failed": 0,
+            "batches": 0,
+            "largest_batch": 0,
+            "retried_batches": 0,
+        }
 
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._worker, name="chat-message-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            self._thread = None
+
+    def submit(self, entry: dict):
+        with self._cond:
+            if not self._pending:
+                self._oldest_queued_at = time.monotonic()
+            self._pending.append(entry)
+            self._stats["submitted"] += 1
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self) -> int:
+        """Persist everything queued on the calling thread; returns how many were written."""
+        written = 0
+        while True:
+            with self._cond:
+                batch = self._take_batch_locked()
+            if not batch:
+                return written
+            self._write(batch)
+            written += len(batch)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                **self._stats,
+                "pending": len(self._pending),
+                "running": self._thread is not None and self._thread.is_alive(),
+            }
 
-class SubmitRatingRequest(BaseModel):
-    score: float
-    feedback: Optional[str] = None
-    rater_id: int
+    def _take_batch_locked(self) -> List[dict]:
+        batch = self._pending[: self.batch_size]
+        del self._pending[: self.batch_size]
+        self._oldest_queued_at = time.monotonic() if self._pending else None
+        return batch
 
-    @validator("score")
-    def validate_score(cls, value):
-        if value < 0 or value > 5:
-            raise ValueError("Score must be between 0 and 5")
-        return round(float(value), 1)
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                while not self._stopped and len(self._pending) < self.batch_size:
+                    remaining = self._oldest_queued_at + self.flush_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch_locked()
+            self._write(batch)
+
+    def _write(self, batch: List[dict]):
+        retried = False
+        try:
+            outcomes = [(batch, self._persist_batch(batch), None)]
+        except Exception as e:
+            print(f"Failed to persist {len(batch)} chat messages: {e}")
+            if len(batch) == 1:
+                outcomes = [(batch, None, str(e))]
+            else:
+                outcomes, retried = self._write_each(batch), True
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+            self._stats["retried_batches"] += int(retried)
+            for entries, _, error in outcomes:
+                self._stats["failed" if error else "persisted"] += len(entries)
+        if self.on_flushed:
+            for entries, rows, error in outcomes:
+                try:
+                    self.on_flushed(entries, rows, error)
+                except Exception as e:
+                    print(f"Chat acknowledgement failed: {e}")
 
-    @validator("rater_id")
-    def validate_rater(cls, value):
-        if value <= 0:
-            raise ValueError("Invalid rater_id")
-        return value
+    def _write_each(self, batch: List[dict]) -> List[tuple]:
+        stored, rows, outcomes = [], [], []
+        for entry in batch:
+            try:
+                rows.extend(self._persist_batch([entry]))
+                stored.append(entry)
+            except Exception as e:
+                print(f"Failed to persist chat message for thread {entry.get('thread_id')}: {e}")
+                outcomes.append(([entry], None, str(e)))
+        if stored:
+            outcomes.insert(0, (stored, rows, None))
+        return outcomes
+
+
+async def send_chat_acknowledgements(entries: List[dict], rows: Optional[List[dict]], error: Optional[str]):
+    """Tell senders (and the thread) which provisional ids are now durable, or that they failed."""
+    if error is not None:
+        for entry in entries:
+            await manager.send_personal_message(
+                {
+                    "type": "message_failed",
+                    "threadId": str(entry["thread_id"]),
+                    "provisionalId": entry["provisional_id"],
+                    "clientId": entry.get("client_id"),
+                    "error": "Message could not be saved",
+                },
+                entry["sender_id"],
+            )
+        return
 
+    for entry, row in zip(entries, rows):
+        ack = {
+            "type": "message_persisted",
+            "threadId": str(entry["thread_id"]),
+            "provisionalId": entry["provisional_id"],
+            "clientId": entry.get("client_id"),
+            "id": str(row["message_id"]),
+            "createdAt": row["created_at"].isoformat(),
+        }
+        await manager.send_personal_message(ack, entry["sender_id"])
+        await manager.broadcast_to_thread(entry["thread_id"], ack, exclude_user=entry["sender_id"])
 
-def _safe_init_db():
-    """Initialize chat/rating/feedback tables. Skip if base schema (users) does not exist."""
-    try:
-        init_chat_tables()
-        init_rating_tables()
-        init_feedback_learning_tables()
-        print("✅ Database tables initialized")
-    except Exception as e:
-        err_msg = str(e).lower()
-        if "does not exist" in err_msg or "undefined_table" in err_msg:
-            print(
-                "⚠️  Database schema not initialized. Run init_db.sql and schema_updates.sql "
-                "against your DATABASE_URL. See repo docs for setup."
-            )
-        else:
-            raise
 
+_pending_chat_acknowledgements: Set = set()
+_pending_chat_acknowledgements_lock = threading.Lock()
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    _safe_init_db()
-    print("✅ Application started successfully")
 
-    yield
-    print("👋 Application shutting down")
+def notify_chat_messages_flushed(entries: List[dict], rows: Optional[List[dict]], error: Optional[str]):
+    """Hand a flushed batch from the writer thread to the event loop for acknowledgement."""
+    if event_loop is None or event_loop.is_closed():
+        return
+    future = asyncio.run_coroutine_threadsafe(send_chat_acknowledgements(entries, rows, error), event_loop)
+    with _pending_chat_acknowledgements_lock:
+        _pending_chat_acknowledgements.add(future)
+    future.add_done_callback(_forget_chat_acknowledgement)
 
 
-app = FastAPI(lifespan=lifespan, title="Konverge API")
+def _forget_chat_acknowledgement(future):
+    with _pending_chat_acknowledgements_lock:
+        _pending_chat_acknowledgements.discard(future)
 
 
-@app.get("/")
-async def root():
-    """Root endpoint - API info and links"""
-    return {
-        "message": "Konverge API",
-        "docs": "/docs",
-        "health": "/health",
-        "test": "/api/test",
-    }
+async def drain_chat_acknowledgements(timeout: float = 5.0):
+    """Wait for acknowledgements already handed to the event loop, e.g. by the final flush."""
+    with _pending_chat_acknowledgements_lock:
+        futures = list(_pending_chat_acknowledgements)
+    if futures:
+        await asyncio.wait([asyncio.wrap_future(future) for future in futures], timeout=timeout)
 
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "https://konverge-jmdm.vercel.app",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+chat_writer = ChatMessageWriter(
+    persist_chat_messages,
+    batch_size=_env_int("CHAT_WRITE_BATCH_SIZE", 100),
+    flush_interval=_env_float("CHAT_WRITE_FLUSH_SECONDS", 0.005),
+    on_flushed=notify_chat_messages_flushed,
 )
 
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.thread_participants: Dict[str, Set[str]] = {}
+def mark_message_read(message_id, user_id):
+    with db_connection() as conn:
+        cursor = conn.cursor()
 
-    async def connect(self, websocket: WebSocket, user_id: str):
-        await websocket.accept()
-        self.active_connections[user_id] = websocket
-        print(
-            f"User {user_id} connected. Total connections: {len(self.active_connections)}"
+        # Reads only move the watermark forward; the unread count becomes the
+        # range of other people's messages left past it.
+        cursor.execute(
+            """
+            UPDATE thread_participants tp
+            SET last_read_message_id = m.message_id,
+                unread_count = (
+                    SELECT COUNT(*)
+                    FROM messages later
+                    WHERE later.thread_id = m.thread_id
+                      AND later.message_id > m.message_id
+                      AND later.sender_id != tp.user_id
+                )
+            FROM messages m
+            WHERE m.message_id = %s
+              AND tp.thread_id = m.thread_id
+              AND tp.user_id = %s
+              AND tp.last_read_message_id < m.message_id
+        """,
+            (message_id, user_id),
         )
 
-    def disconnect(self, user_id: str):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-            print(
-                f"User {user_id} disconnected. Total connections: {len(self.active_connections)}"
+        conn.commit()
+        cursor.close()
+
+
+class ThreadMembershipIndex:
+    """
+    Each user's set of thread ids, for authorizing WebSocket joins, sends and
+    typing events without a query per frame.
+
+    A user's threads are loaded from ``thread_participants`` the first time
+    they are checked and kept for ``ttl`` seconds; ``create_thread`` and
+    ``create_or_get_direct_thread`` invalidate their participants. A thread
+    missing from a cached set (one created on another worker, say) is
+    re-checked against the database before the request is refused, at most
+    once per ``recheck_interval`` per user.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_users: int = 10000, recheck_interval: float = 1.0):
+        self._cache = TTLCache(max_entries=max_users, ttl=ttl)
+        self.recheck_interval = recheck_interval
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "denied": 0}
+
+    def check(self, user_id, thread_id) -> Optional[bool]:
+        """Answer from memory, or ``None`` when the database has to be consulted."""
+        entry = self._cache.get(str(user_id))
+        if entry is None:
+            return None
+        threads, loaded_at = entry
+        if str(thread_id) in threads:
+            return True
+        if time.monotonic() - loaded_at >= self.recheck_interval:
+            return None
+        with self._lock:
+            self._stats["denied"] += 1
+        return False
+
+    def is_member(self, user_id, thread_id) -> bool:
+        allowed = self.check(user_id, thread_id)
+        if allowed is None:
+            allowed = str(thread_id) in self.load(user_id)
+            if not allowed:
+                with self._lock:
+                    self._stats["denied"] += 1
+        return allowed
+
+    def load(self, user_id) -> frozenset:
+        key = str(user_id)
+        if not key.isdigit():
+            return frozenset()
+        with self._lock:
+            generation = self._generation
+            self._stats["loads"] += 1
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT thread_id FROM thread_participants WHERE user_id = %s",
+                (int(key),),
             )
+            threads = frozenset(str(row[0]) for row in cursor.fetchall())
+            cursor.close()
+        with self._lock:
+            if generation == self._generation:
+                self._cache.set(key, (threads, time.monotonic()))
+        return threads
 
-    def join_thread(self, thread_id: str, user_id: str):
-        if thread_id not in self.thread_participants:
-            self.thread_participants[thread_id] = set()
-        self.thread_participants[thread_id].add(user_id)
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+        self._cache.delete(*(str(user_id) for user_id in user_ids))
 
-    def leave_thread(self, thread_id: str, user_id: str):
-        if thread_id in self.thread_participants:
-            self.thread_participants[thread_id].discard(user_id)
-            if not self.thread_participants[thread_id]:
-                del self.thread_participants[thread_id]
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        return {**stats, "cache": self._cache.stats()}
 
-    async def send_personal_message(self, message: dict, user_id: str):
-        if user_id in self.active_connections:
-            try:
-                await self.active_connections[user_id].send_json(message)
-            except Exception as e:
-                print(f"Error sending message to {user_id}: {e}")
 
-    async def broadcast_to_thread(
-        self, thread_id: str, message: dict, exclude_user: str = None
-    ):
-        if thread_id in self.thread_participants:
-            for user_id in self.thread_participants[thread_id]:
-                if user_id != exclude_user:
-                    await self.send_personal_message(message, user_id)
+thread_memberships = ThreadMembershipIndex(
+    ttl=_env_float("THREAD_MEMBERSHIP_TTL_SECONDS", 600.0),
+    max_users=_env_int("THREAD_MEMBERSHIP_MAX_USERS", 10000),
+)
 
 
-manager = ConnectionManager()
+async def is_thread_member(user_id: str, thread_id) -> bool:
+    allowed = thread_memberships.check(user_id, thread_id)
+    if allowed is None:
+        allowed = await run_in_threadpool(thread_memberships.is_member, user_id, thread_id)
+    return allowed
 
 
 @app.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
-    await manager.connect(websocket, user_id)
+    connection = await manager.connect(websocket, user_id)
     try:
         while True:
             data = await websocket.receive_json()
@@ -855,6 +4730,11 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
 
             if message_type == "join_thread":
                 thread_id = data.get("thread_id")
+                if not await is_thread_member(user_id, thread_id):
+                    await manager.send_personal_message(
+                        {"type": "thread_join_denied", "thread_id": thread_id}, user_id
+                    )
+                    continue
                 manager.join_thread(thread_id, user_id)
                 await manager.send_personal_message(
                     {"type": "thread_joined", "thread_id": thread_id}, user_id
@@ -867,53 +4747,32 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             elif message_type == "send_message":
                 thread_id = data.get("thread_id")
                 content = data.get("content")
+                if not content or not str(thread_id).isdigit():
+                    continue
+                if not await is_thread_member(user_id, thread_id):
+                    continue
 
-                conn = get_db_connection()
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-                cursor.execute(
-                    """
-                    INSERT INTO messages (thread_id, sender_id, content, message_type)
-                    VALUES (%s, %s, %s, 'text')
-                    RETURNING message_id, thread_id, sender_id, content, message_type, created_at
-                """,
-                    (thread_id, user_id, content),
-                )
-
-                message = dict(cursor.fetchone())
-
-                cursor.execute(
-                    """
-                    SELECT user_id, name, email
-                    FROM users
-                    WHERE user_id = %s
-                """,
-                    (user_id,),
-                )
-
-                sender = dict(cursor.fetchone())
-
-                cursor.execute(
-                    """
-                    UPDATE chat_threads
-                    SET updated_at = CURRENT_TIMESTAMP
-                    WHERE thread_id = %s
-                """,
-                    (thread_id,),
-                )
-
-                conn.commit()
-                cursor.close()
-                conn.close()
+                # Read the shared entry on every message (a dict lookup) so a
+                # profile edit shows up without reconnecting.
+                sender = user_profiles.peek(user_id)
+                if sender is None:
+                    sender = await run_in_threadpool(user_profiles.get, user_id) or {
+                        "user_id": user_id,
+                        "name": None,
+                        "email": None,
+                    }
 
+                provisional_id = f"pending-{uuid.uuid4().hex}"
                 broadcast_message = {
                     "type": "new_message",
                     "message": {
-                        "id": str(message["message_id"]),
+                        "id": provisional_id,
+                        "clientId": data.get("client_id"),
+                        "pending": True,
                         "threadId": str(thread_id),
                         "senderId": str(user_id),
                         "content": content,
-                        "createdAt": message["created_at"].isoformat(),
+                        "createdAt": datetime.now().isoformat(),
                         "sender": {
                             "id": str(sender["user_id"]),
                             "name": sender["name"],
@@ -922,6 +4781,32 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
                     },
                 }
 
+                # Other workers only see the message through the backplane, so
+                # one too large for it is refused rather than shown to some
+                # participants and not others.
+                if not manager.fits_backplane(thread_id, broadcast_message, exclude_user=user_id):
+                    await manager.send_personal_message(
+                        {
+                            "type": "message_failed",
+                            "threadId": str(thread_id),
+                            "provisionalId": None,
+                            "clientId": data.get("client_id"),
+                            "error": "Message is too long",
+                        },
+                        user_id,
+                    )
+                    continue
+
+                chat_writer.submit(
+                    {
+                        "provisional_id": provisional_id,
+                        "client_id": data.get("client_id"),
+                        "thread_id": thread_id,
+                        "sender_id": user_id,
+                        "content": content,
+                    }
+                )
+
                 await manager.send_personal_message(broadcast_message, user_id)
                 await manager.broadcast_to_thread(
                     thread_id, broadcast_message, exclude_user=user_id
@@ -930,45 +4815,29 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             elif message_type == "typing":
                 thread_id = data.get("thread_id")
                 is_typing = data.get("is_typing", False)
+                if not await is_thread_member(user_id, thread_id):
+                    continue
 
-                await manager.broadcast_to_thread(
-                    thread_id,
-                    {
-                        "type": "user_typing",
-                        "thread_id": thread_id,
-                        "user_id": user_id,
-                        "is_typing": is_typing,
-                    },
-                    exclude_user=user_id,
-                )
+                await typing_indicators.update(thread_id, user_id, is_typing)
 
             elif message_type == "mark_read":
                 message_id = data.get("message_id")
+                # Provisional ids of messages still being written are skipped.
+                if not str(message_id).isdigit():
+                    continue
 
-                conn = get_db_connection()
-                cursor = conn.cursor()
-
-                cursor.execute(
-                    """
-                    INSERT INTO message_reads (message_id, user_id)
-                    VALUES (%s, %s)
-                    ON CONFLICT (message_id, user_id) DO NOTHING
-                """,
-                    (message_id, user_id),
-                )
-
-                conn.commit()
-                cursor.close()
-                conn.close()
+                await run_in_threadpool(mark_message_read, message_id, user_id)
 
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        manager.disconnect(connection)
     except Exception as e:
         print(f"WebSocket error for user {user_id}: {e}")
-        manager.disconnect(user_id)
+        manager.disconnect(connection)
 
 
-def format_match_row(row):
+def format_match_row(row, profile: Optional[dict] = None):
+    """Shape a match row for the API; ``profile`` fills in the recommended user when the row has no user columns."""
+    profile = profile or {}
     return {
         "matchId": row["match_id"],
         "projectId": row["project_id"],
@@ -982,15 +4851,15 @@ def format_match_row(row):
         "updatedAt": row.get("updated_at"),
         "recommendedUser": {
             "id": row.get("recommended_user_id"),
-            "name": row.get("recommended_user_name"),
-            "email": row.get("recommended_user_email"),
-            "skills": row.get("recommended_user_skills"),
+            "name": row.get("recommended_user_name", profile.get("name")),
+            "email": row.get("recommended_user_email", profile.get("email")),
+            "skills": row.get("recommended_user_skills", profile.get("skills")),
         },
     }
 
 
 @app.get("/api/threads/{user_id}")
-async def get_user_threads(user_id: str):
+def get_user_threads(user_id: str):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
@@ -1001,90 +4870,129 @@ async def get_user_threads(user_id: str):
             t.title,
             t.created_at,
             t.updated_at,
-            (
-                SELECT json_agg(json_build_object(
-                    'id', CAST(u.user_id AS TEXT),
-                    'name', u.name,
-                    'email', u.email
-                ))
-                FROM thread_participants tp
-                JOIN users u ON tp.user_id = u.user_id
-                WHERE tp.thread_id = t.thread_id
-            ) as participants,
-            (
-                SELECT json_build_object(
-                    'id', CAST(m.message_id AS TEXT),
-                    'content', m.content,
-                    'senderId', CAST(m.sender_id AS TEXT),
-                    'createdAt', m.created_at
-                )
-                FROM messages m
-                WHERE m.thread_id = t.thread_id
-                ORDER BY m.created_at DESC
-                LIMIT 1
-            ) as last_message,
-            (
-                SELECT COUNT(*)
-                FROM messages m
-                WHERE m.thread_id = t.thread_id
-                AND m.sender_id != %s
-                AND NOT EXISTS (
-                    SELECT 1 FROM message_reads mr
-                    WHERE mr.message_id = m.message_id
-                    AND mr.user_id = %s
-                )
-            ) as unread_count
-        FROM chat_threads t
-        JOIN thread_participants tp ON t.thread_id = tp.thread_id
-        WHERE tp.user_id = %s
+            participants.participant_ids,
+            CASE WHEN lm.message_id IS NOT NULL THEN json_build_object(
+                'id', CAST(lm.message_id AS TEXT),
+                'content', lm.content,
+                'senderId', CAST(lm.sender_id AS TEXT),
+                'createdAt', lm.created_at
+            ) END as last_message,
+            mine.unread_count
+        FROM thread_participants mine
+        JOIN chat_threads t ON t.thread_id = mine.thread_id
+        LEFT JOIN messages lm ON lm.message_id = t.last_message_id
+        CROSS JOIN LATERAL (
+            SELECT array_agg(tp.user_id ORDER BY tp.user_id) as participant_ids
+            FROM thread_participants tp
+            WHERE tp.thread_id = t.thread_id
+        ) participants
+        WHERE mine.user_id = %s
         ORDER BY t.updated_at DESC
     """,
-        (user_id, user_id, user_id),
+        (user_id,),
     )
 
-    threads = cursor.fetchall()
+    threads = [dict(t) for t in cursor.fetchall()]
+    profiles = user_profiles.get_many(
+        {participant_id for thread in threads for participant_id in thread["participant_ids"]}, cursor
+    )
     cursor.close()
     conn.close()
 
-    return {"threads": [dict(t) for t in threads]}
+    for thread in threads:
+        thread["participants"] = [
+            {
+                "id": str(participant_id),
+                "name": profiles[str(participant_id)]["name"],
+                "email": profiles[str(participant_id)]["email"],
+            }
+            for participant_id in thread.pop("participant_ids")
+            if str(participant_id) in profiles
+        ]
+
+    return {"threads": threads}
+
+
+MESSAGE_PAGE_SIZE = 50
+MESSAGE_MAX_PAGE_SIZE = 200
+
+THREAD_MESSAGES_QUERY = """
+    SELECT
+        CAST(m.message_id AS TEXT) as id,
+        CAST(m.thread_id AS TEXT) as threadId,
+        CAST(m.sender_id AS TEXT) as senderId,
+        m.content,
+        m.message_type,
+        m.created_at as "createdAt",
+        json_build_object(
+            'id', CAST(u.user_id AS TEXT),
+            'name', u.name,
+            'email', u.email
+        ) as sender
+    FROM messages m
+    JOIN users u ON m.sender_id = u.user_id
+    WHERE m.thread_id = %s{keyset}
+    ORDER BY m.created_at {direction}, m.message_id {direction}
+    LIMIT %s
+"""
 
 
 @app.get("/api/messages/{thread_id}")
-async def get_thread_messages(thread_id: str):
+def get_thread_messages(
+    thread_id: str,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = MESSAGE_PAGE_SIZE,
+):
+    """
+    Page through a thread's messages, oldest first within each page.
+
+    Without a cursor the newest ``limit`` messages are returned. ``before``
+    pages towards older history and ``after`` towards newer messages, both
+    keyed on a message id and seeking on (thread_id, created_at, message_id).
+    ``nextCursor`` is the id to pass back in the same direction, or null once
+    the end of the thread is reached.
+    """
+    if before is not None and after is not None:
+        raise HTTPException(400, "Pass either before or after, not both")
+    limit = max(1, min(limit, MESSAGE_MAX_PAGE_SIZE))
+
+    anchor = before if before is not None else after
+    params = [thread_id]
+    keyset = ""
+    if anchor is not None:
+        keyset = """
+      AND (m.created_at, m.message_id) {op} (
+          SELECT created_at, message_id FROM messages
+          WHERE message_id = %s AND thread_id = %s
+      )""".format(op=">" if after is not None else "<")
+        params += [anchor, thread_id]
+    params.append(limit + 1)
+    direction = "ASC" if after is not None else "DESC"
+
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
     cursor.execute(
-        """
-        SELECT 
-            CAST(m.message_id AS TEXT) as id,
-            CAST(m.thread_id AS TEXT) as threadId,
-            CAST(m.sender_id AS TEXT) as senderId,
-            m.content,
-            m.message_type,
-            m.created_at as "createdAt",
-            json_build_object(
-                'id', CAST(u.user_id AS TEXT),
-                'name', u.name,
-                'email', u.email
-            ) as sender
-        FROM messages m
-        JOIN users u ON m.sender_id = u.user_id
-        WHERE m.thread_id = %s
-        ORDER BY m.created_at ASC
-    """,
-        (thread_id,),
+        THREAD_MESSAGES_QUERY.format(keyset=keyset, direction=direction),
+        tuple(params),
     )
 
-    messages = cursor.fetchall()
+    messages = [dict(m) for m in cursor.fetchall()]
     cursor.close()
     conn.close()
 
-    return {"messages": [dict(m) for m in messages]}
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    next_cursor = messages[-1]["id"] if has_more else None
+    if after is None:
+        messages.reverse()
+
+    return {"messages": messages, "nextCursor": next_cursor, "hasMore": has_more}
 
 
 @app.post("/api/threads")
-async def create_thread(data: dict):
+def create_thread(data: dict):
     title = data.get("title")
     participant_ids = data.get("participant_ids", [])
 
@@ -1118,12 +5026,13 @@ async def create_thread(data: dict):
     conn.commit()
     cursor.close()
     conn.close()
+    thread_memberships.invalidate(*participant_ids)
 
     return {"thread": thread}
 
 
 @app.post("/api/threads/direct")
-async def create_or_get_direct_thread(data: dict):
+def create_or_get_direct_thread(data: dict):
     user1_id = data.get("user1_id")
     user2_id = data.get("user2_id")
 
@@ -1181,12 +5090,13 @@ async def create_or_get_direct_thread(data: dict):
     conn.commit()
     cursor.close()
     conn.close()
+    thread_memberships.invalidate(user1_id, user2_id)
 
     return {"thread": thread, "created": True}
 
 
 @app.get("/api/users")
-async def get_all_users():
+def get_all_users():
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
@@ -1215,7 +5125,7 @@ async def get_all_users():
 
 
 @app.post("/api/projects")
-async def create_project(request: ProjectCreateRequest):
+def create_project(request: ProjectCreateRequest):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
@@ -1236,7 +5146,7 @@ async def create_project(request: ProjectCreateRequest):
     )
 
     project = dict(cursor.fetchone())
-    add_engagement_points(
+    awarded = add_engagement_points(
         cursor,
         request.owner_id,
         ENGAGEMENT_POINTS.get("pitch_project", 10),
@@ -1245,13 +5155,19 @@ async def create_project(request: ProjectCreateRequest):
     conn.commit()
     cursor.close()
     conn.close()
+    invalidate_analytics(awarded)
+    recommendation_updater.mark_dirty(awarded)
+    if awarded:
+        leaderboard.mark_stale()
 
-    matches = generate_recommendations_for_project(project["project_id"])
-    return {"project": project, "matches": matches}
+    # Matching runs in the background; the owner gets a "recommendations_ready"
+    # event on /ws/{owner_id} (or can poll the job) when it finishes.
+    job = recommendation_jobs.submit(project["project_id"], request.owner_id)
+    return {"project": project, "matches": [], "recommendationJob": format_recommendation_job(job)}
 
 
 @app.post("/api/projects/{project_id}/apply")
-async def apply_to_join_project(project_id: int, current_user: dict = Depends(get_current_user)):
+def apply_to_join_project(project_id: int, current_user: dict = Depends(get_current_user)):
     """Create a manual application match for a project"""
     user_id = current_user["user_id"]
     
@@ -1322,11 +5238,15 @@ async def apply_to_join_project(project_id: int, current_user: dict = Depends(ge
     match_id = cursor.fetchone()["match_id"]
     
     # Add engagement points for applying
-    add_engagement_points(cursor, user_id, 5, "apply_collaboration")
+    awarded = add_engagement_points(cursor, user_id, 5, "apply_collaboration")
     
     conn.commit()
     cursor.close()
     conn.close()
+    invalidate_analytics(awarded)
+    recommendation_updater.mark_dirty(awarded)
+    if awarded:
+        leaderboard.mark_stale()
     
     return {
         "message": "Application submitted successfully",
@@ -1336,13 +5256,49 @@ async def apply_to_join_project(project_id: int, current_user: dict = Depends(ge
 
 
 @app.post("/api/projects/{project_id}/recommendations")
-async def refresh_project_recommendations(project_id: int):
-    matches = generate_recommendations_for_project(project_id)
-    return {"projectId": project_id, "matches": matches}
+def refresh_project_recommendations(project_id: int, wait: bool = False):
+    """Queue a recommendation refresh; ``wait=true`` runs it inline and returns the matches."""
+    if wait:
+        matches = generate_recommendations_for_project(project_id)
+        return {"projectId": project_id, "matches": matches}
+
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor.execute("SELECT owner_id FROM projects WHERE project_id = %s", (project_id,))
+    project = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    job = recommendation_jobs.submit(project_id, project["owner_id"])
+    return {"projectId": project_id, "matches": [], "job": format_recommendation_job(job)}
+
+
+@app.get("/api/recommendation-jobs/{job_id}")
+async def get_recommendation_job(job_id: str):
+    # Jobs run on the worker that queued them; a poll landing on another
+    # worker reads the stored status instead.
+    job = recommendation_jobs.get(job_id) or await run_in_threadpool(load_recommendation_job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Recommendation job not found")
+    return {"job": format_recommendation_job(job)}
+
+
+@app.post("/api/admin/recommendations/rebuild")
+def rebuild_recommendations(workers: Optional[int] = None, wait: bool = False):
+    """Rescore every open project; ``wait=true`` blocks until the rebuild finishes."""
+    state = recommendation_rebuild.start(workers=workers, wait=wait)
+    return {"rebuild": format_recommendation_rebuild(state)}
+
+
+@app.get("/api/admin/recommendations/rebuild")
+async def get_recommendation_rebuild():
+    return {"rebuild": format_recommendation_rebuild(recommendation_rebuild.status())}
 
 
 @app.delete("/api/projects/{project_id}")
-async def delete_project(project_id: int):
+def delete_project(project_id: int):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     cursor.execute(
@@ -1361,7 +5317,7 @@ async def delete_project(project_id: int):
 
 
 @app.get("/api/matches/pitched")
-async def get_pitched_matches(owner_id: int):
+def get_pitched_matches(owner_id: int):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     cursor.execute(
@@ -1385,7 +5341,7 @@ async def get_pitched_matches(owner_id: int):
 
 
 @app.get("/api/matches/assigned")
-async def get_assigned_matches(user_id: int):
+def get_assigned_matches(user_id: int):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     cursor.execute(
@@ -1408,7 +5364,7 @@ async def get_assigned_matches(user_id: int):
 
 
 @app.patch("/api/matches/{match_id}/owner")
-async def update_owner_decision(match_id: int, request: MatchDecisionRequest):
+def update_owner_decision(match_id: int, request: MatchDecisionRequest):
     decision = request.decision.lower()
     if decision not in {"accepted", "rejected"}:
         raise HTTPException(400, "decision must be accepted or rejected")
@@ -1430,9 +5386,10 @@ async def update_owner_decision(match_id: int, request: MatchDecisionRequest):
         raise HTTPException(404, "Match not found")
     previous_owner_decision = existing_row.get("owner_decision")
     if previous_owner_decision == decision:
+        profile = user_profiles.get(existing_row.get("recommended_user_id"), cursor)
         cursor.close()
         conn.close()
-        return {"match": format_match_row(existing_row)}
+        return {"match": format_match_row(existing_row, profile)}
 
     cursor.execute(
         """
@@ -1460,24 +5417,30 @@ async def update_owner_decision(match_id: int, request: MatchDecisionRequest):
     )
 
     # Only record feedback signal for automated recommendations
+    rescore = None
     if match_row.get("source_type") == "automated":
-        record_feedback_signal(
+        rescore = record_feedback_signal(
             cursor,
             match_row.get("recommended_user_id"),
             match_row.get("required_skill"),
             decision == "accepted",
         )
     
-    sync_collaboration_if_ready(cursor, match_row)
+    awarded = sync_collaboration_if_ready(cursor, match_row)
     conn.commit()
+    profile = user_profiles.get(match_row.get("recommended_user_id"), cursor)
     cursor.close()
     conn.close()
+    invalidate_analytics(match_row.get("recommended_user_id"), *awarded)
+    recommendation_updater.mark_many([rescore, *awarded])
+    if awarded:
+        leaderboard.mark_stale()
 
-    return {"match": format_match_row(match_row)}
+    return {"match": format_match_row(match_row, profile)}
 
 
 @app.patch("/api/matches/{match_id}/user")
-async def update_user_decision(match_id: int, request: MatchDecisionRequest):
+def update_user_decision(match_id: int, request: MatchDecisionRequest):
     decision = request.decision.lower()
     if decision not in {"accepted", "rejected"}:
         raise HTTPException(400, "decision must be accepted or rejected")
@@ -1499,9 +5462,10 @@ async def update_user_decision(match_id: int, request: MatchDecisionRequest):
         raise HTTPException(404, "Match not found")
     previous_user_decision = existing_row.get("user_decision")
     if previous_user_decision == decision:
+        profile = user_profiles.get(existing_row.get("recommended_user_id"), cursor)
         cursor.close()
         conn.close()
-        return {"match": format_match_row(existing_row)}
+        return {"match": format_match_row(existing_row, profile)}
 
     cursor.execute(
         """
@@ -1526,29 +5490,47 @@ async def update_user_decision(match_id: int, request: MatchDecisionRequest):
     """,
         (match_id, decision, json.dumps(request.reason) if request.reason else None),
     )
+    # Any decision counts as activity and lifts an inactivity freeze.
+    cursor.execute(
+        """
+        UPDATE users
+        SET last_decision_at = CURRENT_TIMESTAMP,
+            frozen_since = NULL
+        WHERE user_id = %s
+    """,
+        (match_row.get("recommended_user_id"),),
+    )
+    awarded = []
     if decision == "accepted" and previous_user_decision != "accepted":
-        add_engagement_points(
-            cursor,
-            match_row.get("recommended_user_id"),
-            ENGAGEMENT_POINTS.get("apply_collaboration", 5),
-            "apply_collaboration",
+        awarded.append(
+            add_engagement_points(
+                cursor,
+                match_row.get("recommended_user_id"),
+                ENGAGEMENT_POINTS.get("apply_collaboration", 5),
+                "apply_collaboration",
+            )
         )
     
     # Only record feedback signal for automated recommendations
+    rescore = None
     if match_row.get("source_type") == "automated":
-        record_feedback_signal(
+        rescore = record_feedback_signal(
             cursor,
             match_row.get("recommended_user_id"),
             match_row.get("required_skill"),
             decision == "accepted",
         )
     
-    sync_collaboration_if_ready(cursor, match_row)
+    awarded.extend(sync_collaboration_if_ready(cursor, match_row))
     conn.commit()
+    profile = user_profiles.get(match_row.get("recommended_user_id"), cursor)
     cursor.close()
     conn.close()
+    invalidate_analytics(match_row.get("recommended_user_id"), *awarded)
+    recommendation_updater.mark_many([rescore, *awarded])
+    leaderboard.mark_stale()
 
-    return {"match": format_match_row(match_row)}
+    return {"match": format_match_row(match_row, profile)}
 
 
 @app.get("/api/test")
@@ -1558,97 +5540,162 @@ async def test_endpoint():
 
 
 @app.get("/api/analytics/user/{user_id}")
-async def get_user_analytics(user_id: int):
+def get_user_analytics(user_id: int):
     """Get comprehensive analytics for a user"""
-    # Check cache first
-    cached_data = get_cached_analytics(user_id)
-    if cached_data:
-        return cached_data
-    
+    return analytics_loader.get(user_id)
+
+
+def compute_user_analytics(user_id: int):
+    """Build the analytics payload from the database; callers go through ``analytics_loader``."""
     conn = None
     cursor = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Get user basic info
+
+        # Every section is a CTE over the same user, so the whole payload is one
+        # statement and one network round trip. Chart sections come back as
+        # json arrays already formatted for the frontend; the engagement, rating
+        # and collaboration series are primary-key range reads on the rollup
+        # tables maintained by init_analytics_rollup_tables' triggers.
         cursor.execute(
             """
-            SELECT name, email, rating, engagement_score, skills 
-            FROM users WHERE user_id = %s
+            WITH target AS (
+                SELECT name, email, rating, engagement_score, skills
+                FROM users WHERE user_id = %(user_id)s
+            ),
+            collab_stats AS (
+                SELECT 
+                    COUNT(DISTINCT pc.project_id) as total_collaborations,
+                    COUNT(DISTINCT CASE WHEN pc.status = 'active' THEN pc.project_id END) as active_projects
+                FROM project_collaborators pc
+                WHERE pc.user_id = %(user_id)s
+            ),
+            match_stats AS (
+                SELECT 
+                    COUNT(*) FILTER (WHERE source_type = 'manual') as applications_total,
+                    COUNT(*) FILTER (WHERE source_type = 'manual' AND owner_decision = 'accepted') as applications_accepted,
+                    COUNT(*) FILTER (WHERE source_type = 'manual' AND owner_decision = 'rejected') as applications_rejected,
+                    COUNT(*) FILTER (WHERE source_type = 'manual' AND owner_decision = 'pending') as applications_pending,
+                    COUNT(*) FILTER (
+                        WHERE source_type = 'automated' AND owner_decision IN ('accepted', 'rejected')
+                    ) as responded,
+                    COUNT(*) FILTER (WHERE source_type = 'automated') as total_auto
+                FROM project_matches 
+                WHERE recommended_user_id = %(user_id)s
+            ),
+            engagement_trend AS (
+                -- Engagement trend (last 30 days)
+                SELECT COALESCE(
+                    json_agg(json_build_object('date', to_char(day, 'MM/DD'), 'score', score) ORDER BY day),
+                    '[]'::json
+                ) as entries
+                FROM (
+                    SELECT day, points as score
+                    FROM user_engagement_daily
+                    WHERE user_id = %(user_id)s AND day >= CURRENT_DATE - INTERVAL '30 days' AND entries > 0
+                ) daily
+            ),
+            rating_progress AS (
+                -- Rating progress (first 6 rated months)
+                SELECT COALESCE(
+                    json_agg(json_build_object('date', to_char(month, 'MM/DD'), 'rating', rating) ORDER BY month),
+                    '[]'::json
+                ) as entries
+                FROM (
+                    SELECT month, score_sum / NULLIF(score_count, 0) as rating
+                    FROM user_rating_monthly
+                    WHERE user_id = %(user_id)s AND entries > 0
+                    ORDER BY month
+                    LIMIT 6
+                ) monthly
+            ),
+            collaboration_frequency AS (
+                -- Collaboration frequency (last 6 months)
+                SELECT COALESCE(
+                    json_agg(json_build_object('month', to_char(month, 'Mon'), 'projects', projects) ORDER BY month),
+                    '[]'::json
+                ) as entries
+                FROM (
+                    SELECT DATE_TRUNC('month', day) as month, SUM(projects) as projects
+                    FROM user_collaboration_daily
+                    WHERE user_id = %(user_id)s AND day >= CURRENT_DATE - INTERVAL '6 months' AND projects > 0
+                    GROUP BY DATE_TRUNC('month', day)
+                ) monthly
+            ),
+            skills_distribution AS (
+                -- How often the user's top 5 skills were required by projects they joined
+                SELECT COALESCE(
+                    json_agg(json_build_object('skill', skill, 'count', count, 'percentage', percentage)),
+                    '[]'::json
+                ) as entries
+                FROM (
+                    SELECT 
+                        s.skill,
+                        COUNT(*) as count,
+                        ROUND(COUNT(*) * 100.0 / GREATEST((SELECT total_collaborations FROM collab_stats), 1), 1) as percentage
+                    FROM project_collaborators pc
+                    JOIN projects p ON pc.project_id = p.project_id
+                    CROSS JOIN LATERAL unnest(p.required_skills) as s(skill)
+                    WHERE pc.user_id = %(user_id)s
+                      AND p.required_skills && (SELECT skills FROM target)
+                      AND s.skill = ANY((SELECT skills[1:5] FROM target))
+                    GROUP BY s.skill
+                ) skill_counts
+            ),
+            project_types AS (
+                -- Project types (based on project titles/categories)
+                SELECT COALESCE(
+                    json_agg(json_build_object('type', type, 'count', count) ORDER BY count DESC),
+                    '[]'::json
+                ) as entries
+                FROM (
+                    SELECT 
+                        CASE 
+                            WHEN p.title ILIKE '%%app%%' OR p.title ILIKE '%%mobile%%' THEN 'Mobile Apps'
+                            WHEN p.title ILIKE '%%web%%' OR p.title ILIKE '%%website%%' THEN 'Web Development'
+                            WHEN p.title ILIKE '%%ml%%' OR p.title ILIKE '%%ai%%' OR p.title ILIKE '%%data%%' THEN 'AI/ML'
+                            WHEN p.title ILIKE '%%blockchain%%' OR p.title ILIKE '%%crypto%%' THEN 'Blockchain'
+                            ELSE 'Other'
+                        END as type,
+                        COUNT(*) as count
+                    FROM project_collaborators pc
+                    JOIN projects p ON pc.project_id = p.project_id
+                    WHERE pc.user_id = %(user_id)s
+                    GROUP BY type
+                ) types
+            )
+            SELECT
+                target.*,
+                collab_stats.*,
+                match_stats.*,
+                engagement_trend.entries as engagement_trend,
+                rating_progress.entries as rating_progress,
+                collaboration_frequency.entries as collaboration_frequency,
+                skills_distribution.entries as skills_distribution,
+                project_types.entries as project_types
+            FROM target, collab_stats, match_stats, engagement_trend, rating_progress,
+                 collaboration_frequency, skills_distribution, project_types
             """,
-            (user_id,)
+            {"user_id": user_id},
         )
         user = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        cursor = conn = None
         if not user:
-            cursor.close()
-            conn.close()
             raise HTTPException(status_code=404, detail="User not found")
-        
-        # Overview metrics
-        cursor.execute(
-            """
-            SELECT 
-                COUNT(DISTINCT pc.project_id) as total_collaborations,
-                COUNT(DISTINCT CASE WHEN pc.status = 'active' THEN pc.project_id END) as active_projects
-            FROM project_collaborators pc
-            WHERE pc.user_id = %s
-            """,
-            (user_id,)
-        )
-        collab_stats = cursor.fetchone()
-        
-        # Application stats
-        cursor.execute(
-            """
-            SELECT 
-                COUNT(*) as total,
-                COUNT(CASE WHEN owner_decision = 'accepted' THEN 1 END) as accepted,
-                COUNT(CASE WHEN owner_decision = 'rejected' THEN 1 END) as rejected,
-                COUNT(CASE WHEN owner_decision = 'pending' THEN 1 END) as pending
-            FROM project_matches 
-            WHERE recommended_user_id = %s AND source_type = 'manual'
-            """,
-            (user_id,)
-        )
-        app_stats = cursor.fetchone()
-        
-        # Response rate (for automated recommendations)
-        cursor.execute(
-            """
-            SELECT 
-                COUNT(CASE WHEN owner_decision IN ('accepted', 'rejected') THEN 1 END) as responded,
-                COUNT(*) as total_auto
-            FROM project_matches 
-            WHERE recommended_user_id = %s AND source_type = 'automated'
-            """,
-            (user_id,)
-        )
-        response_stats = cursor.fetchone()
+
         response_rate = 0
-        if response_stats['total_auto'] > 0:
-            response_rate = round((response_stats['responded'] / response_stats['total_auto']) * 100, 1)
-        
-        # Engagement trend (last 30 days)
-        cursor.execute(
-            """
-            SELECT 
-                DATE(timestamp) as date,
-                SUM(points) as score
-            FROM engagement 
-            WHERE user_id = %s AND timestamp >= CURRENT_DATE - INTERVAL '30 days'
-            GROUP BY DATE(timestamp)
-            ORDER BY date
-            """,
-            (user_id,)
-        )
-        engagement_rows = cursor.fetchall()
+        if user['total_auto'] > 0:
+            response_rate = round((user['responded'] / user['total_auto']) * 100, 1)
+
         engagement_trend = []
-        for row in engagement_rows:
+        for row in user["engagement_trend"] or []:
             if row and row.get("date") and row.get("score") is not None:
                 try:
                     engagement_trend.append({
-                        "date": row["date"].strftime("%m/%d"), 
+                        "date": row["date"],
                         "score": int(row["score"]) if row["score"] else 0
                     })
                 except (ValueError, TypeError):
@@ -1665,27 +5712,12 @@ async def get_user_analytics(user_id: int):
                     "score": max(0, base_score + random.randint(-10, 10))
                 })
         
-        # Rating progress (last 6 months)
-        cursor.execute(
-            """
-            SELECT 
-                DATE_TRUNC('month', completed_at) as month,
-                AVG(score) as rating
-            FROM user_ratings 
-            WHERE ratee_id = %s AND status = 'completed' AND completed_at IS NOT NULL
-            GROUP BY DATE_TRUNC('month', completed_at)
-            ORDER BY month
-            LIMIT 6
-            """,
-            (user_id,)
-        )
-        rating_rows = cursor.fetchall()
         rating_progress = []
-        for row in rating_rows:
-            if row and row.get("month") and row.get("rating") is not None:
+        for row in user["rating_progress"] or []:
+            if row and row.get("date") and row.get("rating") is not None:
                 try:
                     rating_progress.append({
-                        "date": row["month"].strftime("%m/%d"), 
+                        "date": row["date"],
                         "rating": float(row["rating"]) if row["rating"] else 0.0
                     })
                 except (ValueError, TypeError):
@@ -1701,26 +5733,12 @@ async def get_user_analytics(user_id: int):
                     "rating": round(min(5.0, max(1.0, base_rating + (5-i) * 0.1)), 1)
                 })
         
-        # Collaboration frequency (last 6 months)
-        cursor.execute(
-            """
-            SELECT 
-                DATE_TRUNC('month', joined_at) as month,
-                COUNT(*) as projects
-            FROM project_collaborators 
-            WHERE user_id = %s AND joined_at >= CURRENT_DATE - INTERVAL '6 months'
-            GROUP BY DATE_TRUNC('month', joined_at)
-            ORDER BY month
-            """,
-            (user_id,)
-        )
-        collab_rows = cursor.fetchall()
         collaboration_freq = []
-        for row in collab_rows:
+        for row in user["collaboration_frequency"] or []:
             if row and row.get("month") and row.get("projects") is not None:
                 try:
                     collaboration_freq.append({
-                        "month": row["month"].strftime("%b"), 
+                        "month": row["month"],
                         "projects": int(row["projects"]) if row["projects"] else 0
                     })
                 except (ValueError, TypeError):
@@ -1736,33 +5754,12 @@ async def get_user_analytics(user_id: int):
                     "projects": random.randint(1, 3)
                 })
         
-        # Skills distribution - OPTIMIZED: Single query instead of N+1
+        # Skills distribution
         skills = user["skills"] or []
         skills_distribution = []
         if skills:
-            # Use a single query to get all skill counts
             skill_list = skills[:5]  # Top 5 skills
-            placeholders = ','.join(['%s'] * len(skill_list))
-            cursor.execute(
-                f"""
-                SELECT 
-                    skill,
-                    COUNT(*) as count,
-                    ROUND(COUNT(*) * 100.0 / %s, 1) as percentage
-                FROM (
-                    SELECT unnest(p.required_skills) as skill
-                    FROM project_collaborators pc
-                    JOIN projects p ON pc.project_id = p.project_id
-                    WHERE pc.user_id = %s AND p.required_skills && %s
-                ) skill_counts
-                WHERE skill IN ({placeholders})
-                GROUP BY skill
-                """,
-                [max(collab_stats["total_collaborations"], 1), user_id, skills] + skill_list
-            )
-            skill_rows = cursor.fetchall()
-            
-            for row in skill_rows:
+            for row in user["skills_distribution"] or []:
                 if row and row.get("skill"):
                     skills_distribution.append({
                         "skill": row["skill"],
@@ -1789,38 +5786,13 @@ async def get_user_analytics(user_id: int):
                     "percentage": 33.3
                 })
         
-        # Project types (based on project titles/categories)
-        try:
-            cursor.execute(
-                """
-                SELECT 
-                    CASE 
-                        WHEN p.title ILIKE '%app%' OR p.title ILIKE '%mobile%' THEN 'Mobile Apps'
-                        WHEN p.title ILIKE '%web%' OR p.title ILIKE '%website%' THEN 'Web Development'
-                        WHEN p.title ILIKE '%ml%' OR p.title ILIKE '%ai%' OR p.title ILIKE '%data%' THEN 'AI/ML'
-                        WHEN p.title ILIKE '%blockchain%' OR p.title ILIKE '%crypto%' THEN 'Blockchain'
-                        ELSE 'Other'
-                    END as type,
-                    COUNT(*) as count
-                FROM project_collaborators pc
-                JOIN projects p ON pc.project_id = p.project_id
-                WHERE pc.user_id = %s
-                GROUP BY type
-                ORDER BY count DESC
-                """,
-                (user_id,)
-            )
-            project_type_rows = cursor.fetchall()
-            project_types = []
-            for row in project_type_rows:
-                if row and row.get("type") and row.get("count") is not None:
-                    project_types.append({
-                        "type": row["type"], 
-                        "count": int(row["count"]) if row["count"] else 0
-                    })
-        except Exception as e:
-            print(f"Project types query failed: {e}")
-            project_types = []
+        project_types = []
+        for row in user["project_types"] or []:
+            if row and row.get("type") and row.get("count") is not None:
+                project_types.append({
+                    "type": row["type"], 
+                    "count": int(row["count"]) if row["count"] else 0
+                })
         
         # If no project types, provide sample data
         if not project_types:
@@ -1830,13 +5802,10 @@ async def get_user_analytics(user_id: int):
                 {"type": "AI/ML", "count": 1}
             ]
         
-        cursor.close()
-        conn.close()
-        
         result = {
             "overview": {
-                "totalCollaborations": collab_stats["total_collaborations"],
-                "activeProjects": collab_stats["active_projects"],
+                "totalCollaborations": user["total_collaborations"],
+                "activeProjects": user["active_projects"],
                 "overallRating": float(user["rating"]) or 0.0,
                 "engagementScore": user["engagement_score"] or 0,
                 "skillsContributed": skills,
@@ -1848,16 +5817,13 @@ async def get_user_analytics(user_id: int):
             "skillsDistribution": skills_distribution,
             "projectTypes": project_types,
             "applicationStats": {
-                "total": app_stats["total"],
-                "accepted": app_stats["accepted"],
-                "rejected": app_stats["rejected"],
-                "pending": app_stats["pending"]
+                "total": user["applications_total"],
+                "accepted": user["applications_accepted"],
+                "rejected": user["applications_rejected"],
+                "pending": user["applications_pending"]
             }
         }
         
-        # Cache the result
-        cache_analytics(user_id, result)
-        
         return result
         
     except HTTPException:
@@ -1883,7 +5849,7 @@ async def get_user_analytics(user_id: int):
 
 
 @app.get("/api/ratings/pending")
-async def get_pending_ratings(user_id: int):
+def get_pending_ratings(user_id: int):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     cursor.execute(
@@ -1913,7 +5879,7 @@ async def get_pending_ratings(user_id: int):
 
 
 @app.post("/api/ratings/{rating_id}/submit")
-async def submit_rating_endpoint(rating_id: int, request: SubmitRatingRequest):
+def submit_rating_endpoint(rating_id: int, request: SubmitRatingRequest):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     cursor.execute(
@@ -1951,10 +5917,12 @@ async def submit_rating_endpoint(rating_id: int, request: SubmitRatingRequest):
         (request.score, request.feedback, rating_id),
     )
     updated_row = cursor.fetchone()
-    recalculate_user_rating(cursor, updated_row["ratee_id"])
+    rescore = recalculate_user_rating(cursor, updated_row["ratee_id"])
     conn.commit()
     cursor.close()
     conn.close()
+    invalidate_analytics(updated_row["ratee_id"])
+    recommendation_updater.mark_dirty(rescore)
     return {"rating": dict(updated_row)}
 
 
@@ -1963,61 +5931,272 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db-pool")
+async def db_pool_stats():
+    """Connection pool counters (checkouts, waits, wait time) for sizing the pool"""
+    limiter = to_thread.current_default_thread_limiter()
+    return {
+        "pool": db_pool.stats(),
+        "threadpool": {
+            "size": limiter.total_tokens,
+            "busy": limiter.borrowed_tokens,
+        },
+    }
+
+
+@app.get("/health/websockets")
+async def websocket_stats():
+    """Local connections, cross-worker backplane counters, per-hop delivery latency and typing throttling"""
+    return {**manager.stats(), "typing": typing_indicators.stats()}
+
+
+@app.get("/health/thread-memberships")
+def thread_membership_stats():
+    """Thread membership index loads, denied joins/sends and cache counters"""
+    return thread_memberships.stats()
+
+
+@app.get("/health/chat-writer")
+def chat_writer_stats():
+    """Write-behind chat persistence counters (queued, persisted, failed, batch sizes)"""
+    return chat_writer.stats()
+
+
+@app.get("/health/user-profiles")
+def user_profile_stats():
+    """User profile cache hit/miss counters, batched loads and change syncs"""
+    return {**user_profiles.stats(), "sync": user_profile_sync.stats()}
+
+
+@app.get("/health/analytics-cache")
+def analytics_cache_stats():
+    """Analytics cache size, hit/miss, eviction and invalidation counters"""
+    return {"cache": analytics_loader.cache.stats(), "loader": analytics_loader.stats()}
+
+
+LEADERBOARD_MAX_PAGE_SIZE = 100
+
+
+class Leaderboard:
+    """
+    In-memory ranked view of eligible users, overall and per skill.
+
+    Users are kept in lists sorted by ``_rank_key`` (exact engagement score,
+    highest first, users without a score last, then user id), so a page is a
+    slice and a rank is one bisect: reads cost O(limit * log n) regardless of
+    how many users exist. ``sync`` applies users whose
+    ``leaderboard_updated_at`` moved since the last sync (score, profile,
+    inactivity-freeze and completed-collaboration changes all stamp it); it
+    only loads everyone when nothing has been built yet. ``rebuild`` reloads
+    everyone and is run every ``rebuild_interval`` seconds by
+    ``leaderboard_rebuilder`` rather than by a request. ``mark_stale`` forces
+    a sync on the next read so a worker sees its own committed updates
+    immediately.
+    """
+
+    def __init__(
+        self, rebuild_interval: float = 300.0, sync_interval: float = 10.0, sync_overlap: float = 60.0
+    ):
+        self.rebuild_interval = rebuild_interval
+        self.sync_interval = sync_interval
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self._entries: Dict[int, dict] = {}
+        self._ranked: List[tuple] = []
+        self._ranked_by_skill: Dict[str, List[tuple]] = defaultdict(list)
+        self._synced_at: Optional[datetime] = None
+        self._built_at: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._stale = False
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def mark_stale(self):
+        with self._lock:
+            self._stale = True
+
+    def needs_sync(self) -> bool:
+        with self._lock:
+            return (
+                self._stale
+                or self._checked_at is None
+                or time.monotonic() - self._checked_at >= self.sync_interval
+            )
+
+    def sync(self, cursor):
+        # One sync at a time; callers that queued behind it find nothing left to do.
+        with self._sync_lock:
+            if not self.needs_sync():
+                return
+            with self._lock:
+                self._stale = False
+                built = self._built_at is not None
+                since = self._synced_at - self.sync_overlap if built and self._synced_at else None
+
+            if not built:
+                self._rebuild(cursor)
+                return
+            if since is None:
+                cursor.execute(LEADERBOARD_QUERY.format(filter=""))
+            else:
+                cursor.execute(
+                    LEADERBOARD_QUERY.format(filter="WHERE u.leaderboard_updated_at > %s"), (since,)
+                )
+            rows = cursor.fetchall()
+
+            with self._lock:
+                for row in rows:
+                    self._apply_locked(row)
+                    changed_at = row.get("leaderboard_updated_at")
+                    if changed_at and (self._synced_at is None or changed_at > self._synced_at):
+                        self._synced_at = changed_at
+                self._checked_at = time.monotonic()
+
+    def rebuild(self, cursor) -> int:
+        """Reload every user into fresh lists and swap them in; returns the number ranked."""
+        return self._rebuild(cursor)
+
+    def _rebuild(self, cursor) -> int:
+        cursor.execute(LEADERBOARD_QUERY.format(filter=""))
+        rows = cursor.fetchall()
+        board = Leaderboard()
+        synced_at = None
+        for row in rows:
+            board._apply_locked(row)
+            changed_at = row.get("leaderboard_updated_at")
+            if changed_at and (synced_at is None or changed_at > synced_at):
+                synced_at = changed_at
+
+        with self._lock:
+            had_board = self._built_at is not None
+            self._entries, self._ranked, self._ranked_by_skill = board._entries, board._ranked, board._ranked_by_skill
+            self._synced_at = synced_at
+            self._built_at = self._checked_at = time.monotonic()
+            # Deltas applied to the old lists while this query ran are gone;
+            # the next sync fetches everything stamped since the snapshot.
+            self._stale = self._stale or had_board
+            return len(self._ranked)
+
+    def page(self, offset: int = 0, limit: int = 50, skill: Optional[str] = None) -> Tuple[int, List[dict]]:
+        """Return ``(total, entries)`` for one page; each entry carries its ``rank``."""
+        with self._lock:
+            ranked = self._ranked if skill is None else self._ranked_by_skill.get(skill, [])
+            entries = []
+            for key in ranked[offset : offset + limit]:
+                # RANK() semantics: ties share the position of the first tied user.
+                rank = bisect.bisect_left(ranked, key[:2]) + 1
+                entries.append({**self._entries[key[-1]], "rank": rank})
+            return len(ranked), entries
+
+    def _apply_locked(self, row):
+        user_id = row["user_id"]
+        previous = self._entries.pop(user_id, None)
+        if previous is not None:
+            self._remove_key(self._ranked, previous["key"])
+            for skill in previous["normalized_skills"]:
+                ranked = self._ranked_by_skill.get(skill)
+                if ranked is not None:
+                    self._remove_key(ranked, previous["key"])
+                    if not ranked:
+                        del self._ranked_by_skill[skill]
+        if not row.get("eligible"):
+            return
+
+        entry = {
+            "user_id": user_id,
+            "name": row["name"],
+            "email": row["email"],
+            "skills": row["skills"] or [],
+            "rating": row["rating"],
+            "engagement_score": row["engagement_score"],
+            "projects_completed": row["projects_completed"] or 0,
+            "normalized_skills": frozenset(_normalize_skills(row["skills"])),
+            "key": self._rank_key(row["engagement_score"], user_id),
+        }
+        self._entries[user_id] = entry
+        bisect.insort(self._ranked, entry["key"])
+        for skill in entry["normalized_skills"]:
+            bisect.insort(self._ranked_by_skill[skill], entry["key"])
+
+    @staticmethod
+    def _rank_key(score, user_id) -> tuple:
+        # Ranks by the exact numeric value like ORDER BY engagement_score DESC,
+        # but with users who have no score after everyone who has one.
+        if score is None:
+            return (1, 0, user_id)
+        return (0, -score, user_id)
+
+    @staticmethod
+    def _remove_key(ranked: List[tuple], key: tuple):
+        position = bisect.bisect_left(ranked, key)
+        if position < len(ranked) and ranked[position] == key:
+            del ranked[position]
+
+
+LEADERBOARD_QUERY = """
+    SELECT 
+        u.user_id,
+        u.name,
+        u.email,
+        u.skills,
+        u.rating,
+        u.engagement_score,
+        u.leaderboard_updated_at,
+        COALESCE(pc.projects_completed, 0) as projects_completed,
+        (
+            u.account_status = 'active'
+            AND u.email != 'konverge@example.com'  -- Exclude main admin account
+            AND u.frozen_since IS NULL  -- Exclude accounts frozen for inactivity
+        ) as eligible
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) as projects_completed
+        FROM project_collaborators
+        WHERE status = 'completed'
+        GROUP BY user_id
+    ) pc ON pc.user_id = u.user_id
+    {filter}
+"""
+
+
+leaderboard = Leaderboard(
+    rebuild_interval=_env_float("LEADERBOARD_REBUILD_SECONDS", 300.0),
+    sync_interval=_env_float("LEADERBOARD_SYNC_SECONDS", 10.0),
+)
+
+
+def rebuild_leaderboard() -> int:
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        ranked = leaderboard.rebuild(cursor)
+        cursor.close()
+    return ranked
+
+
+leaderboard_rebuilder = PeriodicTask("leaderboard-rebuild", rebuild_leaderboard, leaderboard.rebuild_interval)
+
+
 @app.get("/api/leaderboard")
-async def get_leaderboard():
+def get_leaderboard(limit: int = 50, offset: int = 0, skill: Optional[str] = None):
     """
     Get leaderboard data ordered by engagement scores of actual users
     Excludes admin accounts and accounts frozen for inactivity
+
+    Served from the in-memory ``leaderboard``; ``limit``/``offset`` page
+    through it and ``skill`` restricts it to users listing that skill.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute(
-        """
-        SELECT 
-            u.user_id,
-            u.name,
-            u.email,
-            u.skills,
-            u.rating,
-            u.engagement_score,
-            u.bio,
-            u.github,
-            u.linkedin,
-            -- Calculate rank based on engagement_score
-            RANK() OVER (ORDER BY u.engagement_score DESC) as rank,
-            -- Get projects completed count
-            (SELECT COUNT(*) 
-             FROM project_collaborators pc 
-             WHERE pc.user_id = u.user_id AND pc.status = 'completed') as projects_completed,
-            -- Get badges (simplified - would need actual badges table)
-            ARRAY[]::text[] as badges
-        FROM users u
-        WHERE u.account_status = 'active'
-          AND u.email != 'konverge@example.com'  -- Exclude main admin account
-          AND (
-            -- Exclude accounts frozen for more than 4 weeks without response
-            u.user_id NOT IN (
-                SELECT DISTINCT pm.recommended_user_id
-                FROM project_matches pm
-                WHERE pm.user_decision = 'pending'
-                  AND pm.created_at < CURRENT_TIMESTAMP - INTERVAL '4 weeks'  -- Changed from 5 to 4 weeks
-                  AND pm.recommended_user_id NOT IN (
-                      -- Exclude users who have recent activity
-                      SELECT DISTINCT recommended_user_id
-                      FROM project_matches
-                      WHERE user_decision IN ('accepted', 'rejected')
-                        AND user_decided_at > CURRENT_TIMESTAMP - INTERVAL '4 weeks'
-                  )
-            )
-          )
-        ORDER BY u.engagement_score DESC
-        LIMIT 50
-    """
-    )
-    
+    limit = max(1, min(limit, LEADERBOARD_MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    skill = _normalize_skills([skill])[0] if skill and skill.strip() else None
+
+    if leaderboard.needs_sync():
+        with db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            leaderboard.sync(cursor)
+            cursor.close()
+    total, rows = leaderboard.page(offset, limit, skill)
+
     leaderboard_data = []
-    for row in cursor.fetchall():
+    for row in rows:
         # Generate badges based on achievements (simplified version)
         badges = []
         if row['projects_completed'] >= 1:
@@ -2044,13 +6223,91 @@ async def get_leaderboard():
             "collaborationScore": row["rating"] or 0.0
         })
     
-    cursor.close()
-    conn.close()
-    
-    return {"leaderboard": leaderboard_data}
+    return {
+        "leaderboard": leaderboard_data,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "skill": skill,
+    }
+
+
+def rebuild_recommendations_cli(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rescore recommendations for every open project.")
+    parser.add_argument("--workers", type=int, default=RECOMMENDATION_REBUILD_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=RECOMMENDATION_REBUILD_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    def report(done, total, elapsed):
+        rate = done / elapsed if elapsed > 0 else 0.0
+        print(f"  {done}/{total} projects ({rate:.1f} projects/s)")
+
+    _safe_init_db()
+    result = rebuild_open_project_recommendations(args.workers, args.chunk_size, progress=report)
+    print(
+        f"✅ Rebuilt {result['projects']} projects ({result['matches']} matches from "
+        f"{result['candidates']} candidates) in {result['seconds']}s "
+        f"({result['projects_per_second']} projects/s)"
+    )
+    db_pool.close()
+
+
+def backfill_analytics_rollups_cli(argv=None):
+    import argparse
+
+    argparse.ArgumentParser(description="Rebuild analytics rollup tables from raw history.").parse_args(argv)
+    _safe_init_db()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        backfill_analytics_rollups(cursor)
+        conn.commit()
+        cursor.close()
+    print(f"✅ Analytics rollups rebuilt in {time.perf_counter() - started:.2f}s")
+    db_pool.close()
+
+
+def drop_message_reads_cli(argv=None):
+    import argparse
+
+    argparse.ArgumentParser(
+        description="Drop the retired message_reads table once read watermarks cover it."
+    ).parse_args(argv)
+    _safe_init_db()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        result = drop_message_reads(cursor)
+        conn.commit()
+        cursor.close()
+    db_pool.close()
+    if result["dropped"]:
+        print("✅ message_reads dropped")
+    elif result["behind"]:
+        print(
+            f"❌ {result['behind']} participants have reads newer than their watermark; "
+            "message_reads was kept"
+        )
+        raise SystemExit(1)
+    else:
+        print("message_reads does not exist; nothing to do")
+
+
+CLI_COMMANDS = {
+    "rebuild-recommendations": rebuild_recommendations_cli,
+    "backfill-analytics-rollups": backfill_analytics_rollups_cli,
+    "drop-message-reads": drop_message_reads_cli,
+}
 
 
 if __name__ == "__main__":
-    import uvicorn
+    import sys
+
+    command = CLI_COMMANDS.get(sys.argv[1]) if len(sys.argv) > 1 else None
+    if command:
+        command(sys.argv[2:])
+    else:
+        import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,91 @@
+"""
+Compare the per-candidate Python scorer with the vectorized CandidateScoreMatrix.
+
+Usage (from the repo root):
+    python benchmarks/recommendation_scoring.py [--sizes 10000 100000 1000000]
+
+The candidate pool is synthetic; no database is needed. "python" is
+rank_candidates_python with the top-3 limits the recommendation engine uses.
+"build" is loading the pool into arrays; rank_candidates builds a fresh
+CandidateScoreMatrix on every call, so every project pays it. "arrays" is the
+batched composite-score computation alone, "rank" is scoring plus ordering
+every match for one project's required skills, and "top-3" is the bounded
+selection on an already built matrix. "speedup" is end to end for one
+project: python / (build + top-3).
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.main import CandidateScoreMatrix, rank_candidates_python  # noqa: E402
+
+SKILLS = [
+    "python", "react", "sql", "go", "rust", "figma", "java", "kotlin", "swift", "node.js",
+    "typescript", "docker", "kubernetes", "aws", "ml", "data", "c++", "flutter", "django", "vue",
+]
+REQUIRED_SKILLS = ["python", "react", "sql"]
+
+
+def make_pool(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    candidates = []
+    stats = {}
+    for user_id in range(1, size + 1):
+        candidates.append(
+            {
+                "user_id": user_id,
+                "skills": rng.sample(SKILLS, rng.randint(1, 5)),
+                "engagement_score": rng.randint(0, 150),
+                "rating": round(rng.uniform(0, 5), 1),
+            }
+        )
+        if rng.random() < 0.3:
+            stats[(user_id, rng.choice(SKILLS + ["general"]))] = round(rng.random(), 4)
+    return candidates, stats
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"required skills: {REQUIRED_SKILLS}")
+    print(
+        f"{'candidates':>12} {'python':>10} {'build':>10} {'arrays':>10} {'rank':>10} "
+        f"{'top-3':>10} {'speedup':>9}"
+    )
+    for size in args.sizes:
+        candidates, stats = make_pool(size)
+        limits = {skill: 3 for skill in REQUIRED_SKILLS}
+        expected = rank_candidates_python(candidates, REQUIRED_SKILLS, stats)
+        expected_top_k, python_time = timed(rank_candidates_python, candidates, REQUIRED_SKILLS, stats, limits)
+        matrix, build_time = timed(CandidateScoreMatrix, candidates, stats)
+        _, arrays_time = timed(matrix.score, REQUIRED_SKILLS)
+        ranked, rank_time = timed(matrix.rank, REQUIRED_SKILLS)
+        top_k, top_k_time = timed(matrix.rank, REQUIRED_SKILLS, limits)
+        for skill in expected:
+            assert [e["composite_score"] for e in ranked[skill]] == [
+                e["composite_score"] for e in expected[skill]
+            ], f"score mismatch for {skill}"
+            assert top_k[skill] == ranked[skill][:3], f"top-3 mismatch for {skill}"
+            assert [e["composite_score"] for e in top_k[skill]] == [
+                e["composite_score"] for e in expected_top_k[skill]
+            ], f"top-3 mismatch with the Python scorer for {skill}"
+        print(
+            f"{size:>12,} {python_time:>9.3f}s {build_time:>9.3f}s {arrays_time:>9.3f}s "
+            f"{rank_time:>9.3f}s {top_k_time:>9.3f}s {python_time / (build_time + top_k_time):>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Measure how many typing frames reach sockets with and without coalescing.
+
+Usage (from the repo root):
+    python benchmarks/typing_indicators.py [--threads 20] [--members 5] [--seconds 3]
+
+Every member of every thread types in bursts, sending a "typing" frame per
+keystroke (every 50 ms by default) and "stopped" after each burst, which is
+what a client without its own debounce does. The same traffic is delivered
+once by broadcasting every frame, as the handler used to, and once through
+TypingCoalescer; the run prints inbound frames, frames written to sockets,
+and the reduction.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.main import ConnectionManager, TypingCoalescer  # noqa: E402
+
+
+class CountingSocket:
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.received += 1
+
+
+async def type_in_bursts(send, thread_id, user_id, seconds, keystroke, rng):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for _ in range(rng.randint(5, 30)):
+            await send(thread_id, user_id, True)
+            await asyncio.sleep(keystroke)
+        await send(thread_id, user_id, False)
+        await asyncio.sleep(rng.uniform(0.2, 1.0))
+
+
+async def run(name, coalesce, args):
+    manager = ConnectionManager(max_queue=10000)
+    await manager.start()
+    sockets = []
+    for t in range(args.threads):
+        for m in range(args.members):
+            user_id = f"{t}-{m}"
+            socket = CountingSocket()
+            sockets.append(socket)
+            await manager.connect(socket, user_id)
+            manager.join_thread(str(t), user_id)
+
+    inbound = 0
+    coalescer = TypingCoalescer(manager.broadcast_to_thread, interval=args.interval, ttl=args.ttl)
+    if coalesce:
+        await coalescer.start()
+
+    async def send(thread_id, user_id, is_typing):
+        nonlocal inbound
+        inbound += 1
+        if coalesce:
+            await coalescer.update(thread_id, user_id, is_typing)
+        else:
+            await manager.broadcast_to_thread(
+                thread_id,
+                {"type": "user_typing", "thread_id": thread_id, "user_id": user_id, "is_typing": is_typing},
+                exclude_user=user_id,
+            )
+
+    rng = random.Random(args.seed)
+    await asyncio.gather(
+        *(
+            type_in_bursts(send, str(t), f"{t}-{m}", args.seconds, args.keystroke, rng)
+            for t in range(args.threads)
+            for m in range(args.members)
+        )
+    )
+    await asyncio.sleep(args.interval * 2)
+    await coalescer.stop()
+    await asyncio.sleep(0.05)
+    await manager.stop()
+    outbound = sum(socket.received for socket in sockets)
+    print(f"{name:<10} inbound={inbound:>7} outbound={outbound:>8}")
+    return outbound
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--members", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--keystroke", type=float, default=0.05)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--ttl", type=float, default=6.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    direct = await run("direct", False, args)
+    coalesced = await run("coalesced", True, args)
+    print(f"outbound frames reduced by {100 * (1 - coalesced / max(direct, 1)):.1f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
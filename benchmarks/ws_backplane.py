@@ -0,0 +1,96 @@
+"""
+Measure cross-worker WebSocket fan-out through the broadcast backplane.
+
+Usage (from the repo root):
+    python benchmarks/ws_backplane.py [--messages 5000] [--postgres]
+
+Two ConnectionManagers stand in for two uvicorn workers. Worker A broadcasts
+to a thread whose only participant is connected to worker B, and the run ends
+when B's socket has received every message. "throughput" is messages
+delivered per second end to end, and the latency columns are worker B's
+per-hop figures (publish on A to delivery on B). --postgres runs the same
+load over LISTEN/NOTIFY against DATABASE_URL as well as the in-process
+backplane.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.main import ConnectionManager, LocalBackplane, PostgresBackplane, _connect_raw  # noqa: E402
+
+
+class CountingSocket:
+    def __init__(self):
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.received += 1
+
+
+async def run(name, make_backplanes, messages, timeout):
+    backplane_a, backplane_b = make_backplanes()
+    worker_a, worker_b = ConnectionManager(backplane_a), ConnectionManager(backplane_b)
+    await worker_a.start()
+    await worker_b.start()
+    try:
+        socket = CountingSocket()
+        await worker_b.connect(socket, "2")
+        worker_b.join_thread("1", "2")
+        await asyncio.sleep(0.2)  # let listeners subscribe
+
+        started = time.perf_counter()
+        for n in range(messages):
+            await worker_a.broadcast_to_thread("1", {"type": "new_message", "n": n}, exclude_user="1")
+            # Let writer tasks run, as arriving socket traffic would; a loop
+            # that never yields just fills B's outbound queue until it closes.
+            await asyncio.sleep(0)
+        deadline = started + timeout
+        while socket.received < messages and time.perf_counter() < deadline:
+            await asyncio.sleep(0.001)
+        elapsed = time.perf_counter() - started
+
+        latency = worker_b.stats()["hop_latency"]
+        print(
+            f"{name:>10} {socket.received:>10,} {socket.received / elapsed:>12,.0f}/s "
+            f"{latency['p50_ms']:>9}ms {latency['p99_ms']:>9}ms {latency['max_ms']:>9}ms"
+        )
+    finally:
+        await worker_a.stop()
+        await worker_b.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--postgres", action="store_true", help="also measure LISTEN/NOTIFY against DATABASE_URL")
+    args = parser.parse_args()
+
+    print(f"{'backplane':>10} {'delivered':>10} {'throughput':>14} {'p50':>11} {'p99':>11} {'max':>11}")
+
+    def local():
+        shared = LocalBackplane()
+        return shared, shared
+
+    asyncio.run(run("local", local, args.messages, args.timeout))
+    if args.postgres:
+        channel = "konverge_ws_benchmark"
+        asyncio.run(
+            run(
+                "postgres",
+                lambda: (PostgresBackplane(_connect_raw, channel), PostgresBackplane(_connect_raw, channel)),
+                args.messages,
+                args.timeout,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,13 +11,46 @@ export interface CreateProjectPayload {
   roles_available?: number;
 }
 
+export interface RecommendationJob {
+  jobId: string;
+  projectId: number;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  submittedAt: string | null;
+  startedAt: string | null;
+  finishedAt: string | null;
+  coalescedRequests: number;
+  matchCount: number | null;
+  error: string | null;
+}
+
 export async function createProject(payload: CreateProjectPayload) {
   const res = await fetch(`${API_BASE}/projects`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(payload),
   });
-  return handleResponse<{ project: any; matches: any[] }>(res);
+  return handleResponse<{ project: any; matches: any[]; recommendationJob: RecommendationJob }>(res);
+}
+
+export async function getRecommendationJob(jobId: string) {
+  const res = await fetch(`${API_BASE}/recommendation-jobs/${jobId}`);
+  const data = await handleResponse<{ job: RecommendationJob }>(res);
+  return data.job;
+}
+
+// Poll a recommendation job until it completes or fails; resolves with the
+// last state seen, which is still queued/running if `timeoutMs` ran out.
+export async function waitForRecommendationJob(
+  jobId: string,
+  { intervalMs = 1000, timeoutMs = 60000 } = {}
+): Promise<RecommendationJob> {
+  const deadline = Date.now() + timeoutMs;
+  let job = await getRecommendationJob(jobId);
+  while ((job.status === 'queued' || job.status === 'running') && Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    job = await getRecommendationJob(jobId);
+  }
+  return job;
 }
 
 export async function deleteProject(projectId: number | string) {
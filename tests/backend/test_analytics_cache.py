@@ -0,0 +1,425 @@
+import threading
+import time
+
+import psycopg2
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.main import CachedLoader, PostgresCache, TTLCache, add_engagement_points, app
+
+
+class FakeCursor:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.current_step = None
+        self.executed = []
+        self.rowcount = -1
+
+    def execute(self, query, params=None):
+        assert self.steps, f"Unexpected query executed: {query}"
+        step = self.steps.pop(0)
+        if step.get("raise"):
+            raise step["raise"]
+        matcher = step.get("match")
+        if matcher:
+            assert matcher.lower() in query.lower(), f"Expected '{matcher}' in query: {query}"
+        self.executed.append((query, params))
+        self.current_step = step
+        self.rowcount = step.get("rowcount", -1)
+
+    def fetchone(self):
+        if not self.current_step:
+            return None
+        return self.current_step.get("fetchone")
+
+    def fetchall(self):
+        if not self.current_step:
+            return []
+        return self.current_step.get("fetchall", [])
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, steps):
+        self.cursor_obj = FakeCursor(steps)
+        self.committed = False
+
+    def cursor(self, cursor_factory=None):
+        return self.cursor_obj
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        pass
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    cache = TTLCache(max_entries=10, ttl=60)
+    loader = CachedLoader(cache, lambda user_id: main.compute_user_analytics(user_id), key=main.analytics_cache_key)
+    monkeypatch.setattr("backend.main.analytics_loader", loader)
+    return cache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+    assert stats["hit_rate"] == 0.75
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("backend.main.time.monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=5, ttl=30)
+    cache.set("a", {"x": 1})
+    now[0] += 29
+    assert cache.get("a") == {"x": 1}
+    now[0] += 2
+
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["size"] == 0
+
+
+def test_engagement_points_leave_invalidation_to_the_caller(memory_cache):
+    main.cache_analytics(7, {"overview": {}})
+    cursor = FakeCursor([{"match": "INSERT INTO engagement"}, {"match": "UPDATE users"}])
+
+    assert add_engagement_points(cursor, 7, 5, "test") == 7
+    assert add_engagement_points(cursor, 7, 0, "test") is None
+
+    assert main.get_cached_analytics(7) == {"overview": {}}
+    assert memory_cache.stats()["invalidations"] == 0
+
+
+def test_submit_rating_marks_ratee_for_rescoring_after_commit(monkeypatch):
+    events = []
+
+    class RecordingConnection(FakeConnection):
+        def commit(self):
+            events.append("commit")
+            super().commit()
+
+    class RecordingUpdater:
+        def mark_dirty(self, user_id):
+            events.append(("dirty", user_id))
+
+    steps = [
+        {"match": "SELECT rating_id", "fetchone": {"rating_id": 10, "rater_id": 1, "ratee_id": 42, "status": "pending"}},
+        {"match": "UPDATE user_ratings", "fetchone": {"rating_id": 10, "ratee_id": 42, "score": 4.0, "status": "completed"}},
+        {"match": "SELECT AVG", "fetchone": (4.0,)},
+        {"match": "UPDATE users"},
+    ]
+    fake_conn = RecordingConnection(steps)
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    monkeypatch.setattr("backend.main.recommendation_updater", RecordingUpdater())
+
+    response = client.post("/api/ratings/10/submit", json={"score": 4.0, "rater_id": 1})
+
+    assert response.status_code == 200
+    assert events == ["commit", ("dirty", 42)]
+
+
+def test_create_project_invalidates_owner_analytics_after_commit(monkeypatch, memory_cache):
+    main.cache_analytics(7, {"overview": {}})
+    main.cache_analytics(8, {"overview": {}})
+    cached_at_commit = []
+
+    class RecordingConnection(FakeConnection):
+        def commit(self):
+            cached_at_commit.append(main.get_cached_analytics(7))
+            super().commit()
+
+    project = {
+        "project_id": 3,
+        "title": "T",
+        "description": "D",
+        "required_skills": ["python"],
+        "owner_id": 7,
+        "status": "Open",
+        "roles_available": 1,
+    }
+    fake_conn = RecordingConnection(
+        [
+            {"match": "INSERT INTO projects", "fetchone": project},
+            {"match": "INSERT INTO engagement"},
+            {"match": "UPDATE users"},
+        ]
+    )
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    monkeypatch.setattr(
+        main.recommendation_jobs,
+        "submit",
+        lambda project_id, owner_id: {
+            "job_id": "j", "project_id": project_id, "status": "queued", "submitted_at": None,
+            "started_at": None, "finished_at": None, "coalesced": 0, "match_count": None, "error": None,
+        },
+    )
+
+    response = client.post(
+        "/api/projects",
+        json={"title": "T", "description": "D", "required_skills": ["python"], "owner_id": 7},
+    )
+
+    assert response.status_code == 200
+    assert cached_at_commit == [{"overview": {}}]
+    assert main.get_cached_analytics(7) is None
+    assert main.get_cached_analytics(8) == {"overview": {}}
+
+
+def test_submit_rating_invalidates_ratee_analytics(monkeypatch, memory_cache):
+    main.cache_analytics(42, {"overview": {}})
+    steps = [
+        {"match": "SELECT rating_id", "fetchone": {"rating_id": 10, "rater_id": 1, "ratee_id": 42, "status": "pending"}},
+        {"match": "UPDATE user_ratings", "fetchone": {"rating_id": 10, "ratee_id": 42, "score": 4.0, "status": "completed"}},
+        {"match": "SELECT AVG", "fetchone": (4.0,)},
+        {"match": "UPDATE users"},
+    ]
+    fake_conn = FakeConnection(steps)
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+
+    response = client.post("/api/ratings/10/submit", json={"score": 4.0, "rater_id": 1})
+
+    assert response.status_code == 200
+    assert main.get_cached_analytics(42) is None
+
+
+def test_analytics_endpoint_serves_cached_result(monkeypatch, memory_cache):
+    main.cache_analytics(3, {"overview": {"engagementScore": 12}})
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: pytest.fail("cache miss"))
+
+    response = client.get("/api/analytics/user/3")
+
+    assert response.json() == {"overview": {"engagementScore": 12}}
+    assert client.get("/health/analytics-cache").json()["cache"]["hits"] == 1
+
+
+def test_postgres_cache_reads_writes_and_prunes(monkeypatch):
+    conns = []
+
+    def connect_with(*steps):
+        def connect():
+            conn = FakeConnection(steps)
+            conns.append(conn)
+            return conn
+
+        return connect
+
+    cache = PostgresCache(None, max_entries=2, ttl=30, prune_every=1)
+
+    cache._connect = connect_with({"match": "UPDATE analytics_cache", "fetchone": ({"a": 1}, True)})
+    assert cache.get("k") == {"a": 1}
+
+    cache._connect = connect_with({"match": "UPDATE analytics_cache", "fetchone": None})
+    assert cache.get("k") is None
+
+    steps = iter(
+        [
+            {"match": "INSERT INTO analytics_cache"},
+            {"match": "WHERE expires_at <=", "rowcount": 1},
+            {"match": "OFFSET", "rowcount": 2},
+        ]
+    )
+    cache._connect = lambda: FakeConnection([next(steps)])
+    cache.set("k", {"a": 1})
+
+    stats_conn = FakeConnection([{"match": "SELECT COUNT(*)", "fetchone": (2,)}])
+    cache._connect = lambda: stats_conn
+    stats = cache.stats()
+    assert stats["backend"] == "postgres"
+    assert stats["size"] == 2
+    assert (stats["hits"], stats["misses"], stats["sets"]) == (1, 1, 1)
+    assert (stats["expirations"], stats["evictions"]) == (1, 2)
+
+
+def test_postgres_cache_errors_are_misses():
+    cache = PostgresCache(lambda: FakeConnection([{"raise": psycopg2.OperationalError("down")}]))
+
+    assert cache.get("k") is None
+    assert cache.stats()["errors"] == 2
+
+
+def test_burst_of_misses_runs_one_load():
+    calls = []
+    release = threading.Event()
+
+    def load(user_id):
+        calls.append(user_id)
+        release.wait(2)
+        return {"user": user_id}
+
+    loader = CachedLoader(TTLCache(ttl=60), load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(loader.get(5))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    while loader.stats()["coalesced"] < 19:
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [5]
+    assert results == [{"user": 5}] * 20
+    assert loader.get(5) == {"user": 5}
+    assert calls == [5]
+
+
+def test_coalesced_callers_share_the_error():
+    release = threading.Event()
+
+    def load(user_id):
+        release.wait(2)
+        raise main.HTTPException(status_code=404, detail="User not found")
+
+    loader = CachedLoader(TTLCache(ttl=60), load)
+    errors = []
+
+    def call():
+        try:
+            loader.get(1)
+        except main.HTTPException as exc:
+            errors.append(exc.status_code)
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while loader.stats()["coalesced"] < 4:
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == [404] * 5
+    assert loader.stats()["executions"] == 1
+
+
+def test_stale_entry_is_served_while_refreshing(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("backend.main.time.monotonic", lambda: now[0])
+    version = [1]
+    refreshed = threading.Event()
+
+    def load(user_id):
+        value = {"version": version[0]}
+        if version[0] > 1:
+            refreshed.set()
+        return value
+
+    loader = CachedLoader(TTLCache(ttl=10, stale_ttl=60), load)
+    assert loader.get(1) == {"version": 1}
+
+    version[0] = 2
+    now[0] = 15
+    assert loader.get(1) == {"version": 1}
+    assert refreshed.wait(2)
+    for _ in range(200):
+        if not loader.stats()["in_flight"]:
+            break
+        time.sleep(0.005)
+
+    assert loader.get(1) == {"version": 2}
+    stats = loader.stats()
+    assert stats["stale_served"] == 1
+    assert stats["revalidations"] == 1
+
+    now[0] = 200
+    version[0] = 3
+    assert loader.get(1) == {"version": 3}
+
+
+def test_burst_of_stale_hits_starts_one_refresh(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("backend.main.time.monotonic", lambda: now[0])
+    calls = []
+    release = threading.Event()
+
+    def load(user_id):
+        calls.append(user_id)
+        if len(calls) > 1:
+            release.wait(2)
+        return {"version": len(calls)}
+
+    loader = CachedLoader(TTLCache(ttl=10, stale_ttl=60), load)
+    assert loader.get(1) == {"version": 1}
+
+    now[0] = 15
+    barrier = threading.Barrier(20)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(loader.get(1))
+
+    threads = [threading.Thread(target=call) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    release.set()
+    for _ in range(200):
+        if not loader.stats()["refreshing"]:
+            break
+        time.sleep(0.005)
+
+    assert results == [{"version": 1}] * 20
+    assert calls == [1, 1]
+    stats = loader.stats()
+    assert stats["stale_served"] == 20
+    assert stats["revalidations"] == 1
+    assert loader.get(1) == {"version": 2}
+
+
+def test_refresh_skips_entry_reloaded_before_it_ran(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("backend.main.time.monotonic", lambda: now[0])
+    calls = []
+    cache = TTLCache(ttl=10, stale_ttl=60)
+    loader = CachedLoader(cache, lambda user_id: calls.append(user_id) or {"loaded": True})
+
+    now[0] = 15
+    cache.set("1", {"reloaded": True})
+    loader._revalidate_worker("1", 1)
+
+    assert calls == []
+    assert cache.get("1") == {"reloaded": True}
+
+
+def test_invalidation_during_load_is_not_overwritten():
+    started = threading.Event()
+    release = threading.Event()
+    cache = TTLCache(ttl=60)
+
+    def load(user_id):
+        started.set()
+        release.wait(2)
+        return {"stale": True}
+
+    loader = CachedLoader(cache, load)
+    thread = threading.Thread(target=loader.get, args=(1,))
+    thread.start()
+    assert started.wait(2)
+    loader.invalidate(1)
+    release.set()
+    thread.join()
+
+    assert cache.lookup("1") is None
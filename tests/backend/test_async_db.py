@@ -0,0 +1,55 @@
+import time
+
+import anyio
+import httpx
+
+from backend.main import app
+
+
+class SlowCursor:
+    def execute(self, query, params=None):
+        time.sleep(0.3)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class SlowConnection:
+    def cursor(self, cursor_factory=None):
+        return SlowCursor()
+
+    def close(self):
+        pass
+
+
+def test_slow_query_does_not_block_event_loop(monkeypatch):
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: SlowConnection())
+    finished = {}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = time.monotonic()
+
+            async def slow_request():
+                response = await client.get("/api/users")
+                finished["slow"] = time.monotonic() - started
+                assert response.status_code == 200
+
+            async def fast_request():
+                await anyio.sleep(0.05)
+                response = await client.get("/health")
+                finished["fast"] = time.monotonic() - started
+                assert response.status_code == 200
+
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(slow_request)
+                tg.start_soon(fast_request)
+
+    anyio.run(scenario)
+
+    assert finished["fast"] < 0.25
+    assert finished["slow"] >= 0.3
@@ -0,0 +1,530 @@
+import time
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.main import (
+    ChatMessageWriter,
+    PostgresBackplane,
+    ThreadMembershipIndex,
+    UserProfileCache,
+    app,
+    create_or_get_direct_thread,
+    drop_message_reads,
+    init_thread_summary_columns,
+    mark_message_read,
+    persist_chat_messages,
+)
+
+
+class FakeCursor:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.current_step = None
+        self.executed = []
+
+    def execute(self, query, params=None):
+        assert self.steps, f"Unexpected query executed: {query}"
+        step = self.steps.pop(0)
+        matcher = step.get("match")
+        if matcher:
+            assert matcher.lower() in query.lower(), f"Expected '{matcher}' in query: {query}"
+        self.executed.append((query, params))
+        self.current_step = step
+
+    def fetchone(self):
+        if not self.current_step:
+            return None
+        return self.current_step.get("fetchone")
+
+    def fetchall(self):
+        if not self.current_step:
+            return []
+        return self.current_step.get("fetchall", [])
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, steps):
+        self.cursor_obj = FakeCursor(steps)
+        self.committed = False
+
+    def cursor(self, cursor_factory=None):
+        return self.cursor_obj
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        pass
+
+
+client = TestClient(app)
+
+CREATED = datetime(2024, 6, 1, 9, 30)
+
+
+def test_batch_insert_updates_summaries_once_per_batch(monkeypatch):
+    def row(message_id, content):
+        return {
+            "message_id": message_id,
+            "thread_id": 3,
+            "sender_id": 7,
+            "content": content,
+            "message_type": "text",
+            "created_at": CREATED,
+        }
+
+    inserted = {}
+
+    def fake_execute_values(cursor, query, argslist, page_size, fetch):
+        inserted.update(query=query, argslist=argslist, page_size=page_size)
+        return [row(56, "second"), row(55, "first")]
+
+    fake_conn = FakeConnection(
+        [
+            {"match": "UPDATE chat_threads t"},
+            {"match": "SET unread_count = tp.unread_count + batch.unread"},
+        ]
+    )
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    monkeypatch.setattr("backend.main.execute_values", fake_execute_values)
+
+    entries = [
+        {"thread_id": "3", "sender_id": "7", "content": "first"},
+        {"thread_id": "3", "sender_id": "7", "content": "second"},
+    ]
+    messages = persist_chat_messages(entries)
+
+    assert [m["content"] for m in messages] == ["first", "second"]
+    assert inserted["argslist"] == [(0, 3, 7, "first"), (1, 3, 7, "second")]
+    assert inserted["page_size"] == 2
+    assert "ORDER BY v.position" in inserted["query"]
+    executed = fake_conn.cursor_obj.executed
+    assert executed[0][1] == ([55, 56],)
+    assert executed[1][1] == ([55, 56],)
+    assert fake_conn.committed
+
+
+def test_writer_flushes_in_batches_and_reports_rows():
+    persisted = []
+    flushed = []
+
+    def persist(batch):
+        persisted.append([entry["content"] for entry in batch])
+        return [{"message_id": i} for i, _ in enumerate(batch)]
+
+    writer = ChatMessageWriter(
+        persist, batch_size=2, on_flushed=lambda entries, rows, error: flushed.append((len(entries), error))
+    )
+    for content in ("a", "b", "c"):
+        writer.submit({"content": content})
+
+    assert writer.flush() == 3
+    assert persisted == [["a", "b"], ["c"]]
+    assert flushed == [(2, None), (1, None)]
+    stats = writer.stats()
+    assert stats["persisted"] == 3
+    assert stats["batches"] == 2
+    assert stats["largest_batch"] == 2
+    assert stats["pending"] == 0
+
+
+def test_writer_reports_failed_batches():
+    flushed = []
+
+    def persist(batch):
+        raise RuntimeError("database unavailable")
+
+    writer = ChatMessageWriter(persist, on_flushed=lambda entries, rows, error: flushed.append((rows, error)))
+    writer.submit({"content": "a"})
+    writer.flush()
+
+    assert flushed == [(None, "database unavailable")]
+    assert writer.stats()["failed"] == 1
+
+
+def test_writer_retries_a_failed_batch_one_entry_at_a_time():
+    flushed = []
+    calls = []
+
+    def persist(batch):
+        calls.append([entry["content"] for entry in batch])
+        if any(entry["thread_id"] == 404 for entry in batch):
+            raise RuntimeError("violates foreign key constraint")
+        return [{"message_id": entry["content"]} for entry in batch]
+
+    writer = ChatMessageWriter(
+        persist,
+        on_flushed=lambda entries, rows, error: flushed.append(
+            ([entry["content"] for entry in entries], rows, error)
+        ),
+    )
+    for content, thread_id in (("a", 1), ("b", 404), ("c", 2)):
+        writer.submit({"content": content, "thread_id": thread_id})
+    writer.flush()
+
+    assert calls == [["a", "b", "c"], ["a"], ["b"], ["c"]]
+    assert flushed == [
+        (["a", "c"], [{"message_id": "a"}, {"message_id": "c"}], None),
+        (["b"], None, "violates foreign key constraint"),
+    ]
+    stats = writer.stats()
+    assert (stats["persisted"], stats["failed"], stats["retried_batches"]) == (2, 1, 1)
+
+
+def test_writer_thread_flushes_after_interval_and_drains_on_stop():
+    persisted = []
+    writer = ChatMessageWriter(lambda batch: persisted.append(len(batch)) or [], batch_size=50, flush_interval=0.01)
+    writer.start()
+    try:
+        writer.submit({"content": "a"})
+        writer.submit({"content": "b"})
+        deadline = time.monotonic() + 2
+        while not persisted and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert persisted == [2]
+    finally:
+        writer.stop()
+
+    writer.submit({"content": "c"})
+    writer.stop()
+    assert writer.stats()["pending"] == 1
+
+
+def test_send_message_broadcasts_before_persisting(monkeypatch):
+    writer = ChatMessageWriter(lambda batch: [])
+    monkeypatch.setattr("backend.main.chat_writer", writer)
+    profiles = UserProfileCache()
+    profiles._cache.set("7", {"user_id": 7, "name": "Dana", "email": "dana@example.com", "skills": []})
+    monkeypatch.setattr("backend.main.user_profiles", profiles)
+    memberships = ThreadMembershipIndex()
+    memberships._cache.set("7", (frozenset({"3"}), time.monotonic()))
+    monkeypatch.setattr("backend.main.thread_memberships", memberships)
+
+    with client.websocket_connect("/ws/7") as websocket:
+        websocket.send_json({"type": "send_message", "thread_id": "3", "content": "hi", "client_id": "temp-1"})
+        event = websocket.receive_json()
+
+    assert event["type"] == "new_message"
+    assert event["message"]["id"].startswith("pending-")
+    assert event["message"]["clientId"] == "temp-1"
+    assert event["message"]["sender"]["name"] == "Dana"
+    assert writer.stats()["pending"] == 1
+
+
+def test_send_message_too_large_for_the_backplane_is_refused(monkeypatch):
+    writer = ChatMessageWriter(lambda batch: [])
+    monkeypatch.setattr("backend.main.chat_writer", writer)
+    profiles = UserProfileCache()
+    profiles._cache.set("7", {"user_id": 7, "name": "Dana", "email": "dana@example.com", "skills": []})
+    monkeypatch.setattr("backend.main.user_profiles", profiles)
+    memberships = ThreadMembershipIndex()
+    memberships._cache.set("7", (frozenset({"3"}), time.monotonic()))
+    monkeypatch.setattr("backend.main.thread_memberships", memberships)
+    backplane = PostgresBackplane(lambda: None)
+    monkeypatch.setattr(main.manager, "backplane", backplane)
+
+    with client.websocket_connect("/ws/7") as websocket:
+        websocket.send_json({"type": "send_message", "thread_id": "3", "content": "é" * 3000, "client_id": "temp-1"})
+        refused = websocket.receive_json()
+        websocket.send_json({"type": "send_message", "thread_id": "3", "content": "hi", "client_id": "temp-2"})
+        accepted = websocket.receive_json()
+
+    assert refused == {
+        "type": "message_failed",
+        "threadId": "3",
+        "provisionalId": None,
+        "clientId": "temp-1",
+        "error": "Message is too long",
+    }
+    assert accepted["type"] == "new_message"
+    assert accepted["message"]["clientId"] == "temp-2"
+    assert writer.stats()["pending"] == 1
+    assert backplane.stats()["oversized"] == 0
+
+
+def test_mark_read_advances_watermark(monkeypatch):
+    fake_conn = FakeConnection([{"match": "SET last_read_message_id = m.message_id"}])
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+
+    mark_message_read(55, 8)
+
+    query, params = fake_conn.cursor_obj.executed[0]
+    assert "tp.last_read_message_id < m.message_id" in query
+    assert "later.message_id > m.message_id" in query
+    assert params == (55, 8)
+    assert fake_conn.committed
+
+
+def test_watermark_migration_folds_in_message_reads():
+    cursor = FakeCursor(
+        [
+            {"match": "pg_advisory_xact_lock"},
+            {"match": "column_name = 'last_read_message_id'", "fetchone": (True, True)},
+            {"match": "ALTER TABLE chat_threads"},
+            {"match": "ADD COLUMN IF NOT EXISTS last_read_message_id"},
+            {"match": "idx_thread_participants_user"},
+            {"match": "idx_messages_thread_message"},
+            {"match": "SET last_message_id"},
+            {"match": "MAX(m.message_id)"},
+            {"match": "m.message_id > tp.last_read_message_id"},
+        ]
+    )
+
+    init_thread_summary_columns(cursor)
+
+    assert not cursor.steps
+
+
+def test_watermark_migration_is_a_no_op_once_applied():
+    cursor = FakeCursor(
+        [
+            {"match": "pg_advisory_xact_lock"},
+            {"match": "column_name = 'last_read_message_id'", "fetchone": (False, True)},
+            {"match": "ALTER TABLE chat_threads"},
+            {"match": "ALTER TABLE thread_participants"},
+            {"match": "idx_thread_participants_user"},
+            {"match": "idx_messages_thread_message"},
+        ]
+    )
+
+    init_thread_summary_columns(cursor)
+
+    assert not cursor.steps
+
+
+def test_message_reads_is_kept_while_any_watermark_is_behind():
+    cursor = FakeCursor(
+        [
+            {"match": "pg_advisory_xact_lock"},
+            {"match": "to_regclass('message_reads')", "fetchone": (True,)},
+            {"match": "tp.last_read_message_id < latest.message_id", "fetchone": (2,)},
+        ]
+    )
+
+    assert drop_message_reads(cursor) == {"dropped": False, "behind": 2}
+    assert not cursor.steps
+
+
+def test_message_reads_is_dropped_once_watermarks_cover_it():
+    cursor = FakeCursor(
+        [
+            {"match": "pg_advisory_xact_lock"},
+            {"match": "to_regclass('message_reads')", "fetchone": (True,)},
+            {"match": "tp.last_read_message_id < latest.message_id", "fetchone": (0,)},
+            {"match": "DROP TABLE IF EXISTS message_reads"},
+        ]
+    )
+
+    assert drop_message_reads(cursor) == {"dropped": True, "behind": 0}
+    assert not cursor.steps
+
+
+def test_inbox_reads_denormalized_summaries(monkeypatch):
+    thread = {
+        "thread_id": 3,
+        "title": None,
+        "created_at": CREATED,
+        "updated_at": CREATED,
+        "participant_ids": [7, 8],
+        "last_message": {"id": "55", "content": "hi", "senderId": "7", "createdAt": "2024-06-01T09:30:00"},
+        "unread_count": 2,
+    }
+    profiles = UserProfileCache()
+    profiles._cache.set("8", {"user_id": 8, "name": "Sam", "email": "sam@example.com", "skills": []})
+    fake_conn = FakeConnection(
+        [
+            {"match": "FROM thread_participants mine", "fetchall": [thread]},
+            {
+                "match": "WHERE user_id = ANY(%s)",
+                "fetchall": [{"user_id": 7, "name": "Dana", "email": "dana@example.com", "skills": []}],
+            },
+        ]
+    )
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    monkeypatch.setattr("backend.main.user_profiles", profiles)
+
+    response = client.get("/api/threads/8")
+
+    assert response.status_code == 200
+    body = response.json()["threads"][0]
+    assert body["unread_count"] == 2
+    assert body["participants"] == [
+        {"id": "7", "name": "Dana", "email": "dana@example.com"},
+        {"id": "8", "name": "Sam", "email": "sam@example.com"},
+    ]
+    query, params = fake_conn.cursor_obj.executed[0]
+    assert params == ("8",)
+    assert "t.last_message_id" in query
+    assert "message_reads" not in query
+    assert "ORDER BY m.created_at" not in query
+    assert "JOIN users" not in query
+    assert fake_conn.cursor_obj.executed[1][1] == ([7],)
+
+
+def _message(message_id):
+    return {
+        "id": str(message_id),
+        "threadid": "3",
+        "senderid": "7",
+        "content": f"m{message_id}",
+        "message_type": "text",
+        "createdAt": CREATED,
+        "sender": {"id": "7", "name": "Dana", "email": "dana@example.com"},
+    }
+
+
+def test_messages_default_to_latest_page(monkeypatch):
+    rows = [_message(i) for i in (30, 29, 28)]
+    fake_conn = FakeConnection([{"match": "ORDER BY m.created_at DESC", "fetchall": rows}])
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+
+    response = client.get("/api/messages/3?limit=2")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [m["id"] for m in body["messages"]] == ["29", "30"]
+    assert body["nextCursor"] == "29"
+    assert body["hasMore"] is True
+    query, params = fake_conn.cursor_obj.executed[0]
+    assert "(m.created_at, m.message_id)" not in query
+    assert params == ("3", 3)
+
+
+def test_messages_before_cursor_seeks_older(monkeypatch):
+    rows = [_message(i) for i in (12, 11)]
+    fake_conn = FakeConnection([{"match": "(m.created_at, m.message_id) <", "fetchall": rows}])
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+
+    response = client.get("/api/messages/3?before=13&limit=2")
+
+    body = response.json()
+    assert [m["id"] for m in body["messages"]] == ["11", "12"]
+    assert body["nextCursor"] is None
+    assert body["hasMore"] is False
+    assert fake_conn.cursor_obj.executed[0][1] == ("3", 13, "3", 3)
+
+
+def test_messages_after_cursor_seeks_newer(monkeypatch):
+    rows = [_message(i) for i in (14, 15, 16)]
+    fake_conn = FakeConnection([{"match": "ORDER BY m.created_at ASC", "fetchall": rows}])
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+
+    response = client.get("/api/messages/3?after=13&limit=2")
+
+    body = response.json()
+    assert [m["id"] for m in body["messages"]] == ["14", "15"]
+    assert body["nextCursor"] == "15"
+    assert "(m.created_at, m.message_id) >" in fake_conn.cursor_obj.executed[0][0]
+
+
+def test_messages_reject_both_cursors():
+    response = client.get("/api/messages/3?before=10&after=5")
+
+    assert response.status_code == 400
+
+
+def test_profile_cache_loads_misses_in_one_query_and_syncs_changes():
+    profiles = UserProfileCache()
+    cursor = FakeCursor(
+        [
+            {
+                "match": "WHERE user_id = ANY(%s)",
+                "fetchall": [
+                    {"user_id": 7, "name": "Dana", "email": "dana@example.com", "skills": []},
+                    {"user_id": 8, "name": "Sam", "email": "sam@example.com", "skills": []},
+                ],
+            },
+            {"match": "MAX(profile_updated_at)", "fetchone": {"synced_at": CREATED}},
+            {"match": "WHERE profile_updated_at > %s", "fetchall": [{"user_id": 8, "profile_updated_at": CREATED}]},
+        ]
+    )
+
+    loaded = profiles.get_many(["7", 8, "not-a-user"], cursor)
+    assert sorted(loaded) == ["7", "8"]
+    assert cursor.executed[0][1] == ([7, 8],)
+    assert profiles.get(7, cursor)["name"] == "Dana"
+
+    assert profiles.sync(cursor) == 0
+    assert profiles.sync(cursor) == 1
+    assert profiles.peek(7) is not None
+    assert profiles.peek(8) is None
+    assert not cursor.steps
+
+
+def test_profile_load_overlapping_an_invalidation_is_not_cached():
+    profiles = UserProfileCache()
+
+    class InvalidatingCursor(FakeCursor):
+        def fetchall(self):
+            profiles.invalidate(7)
+            return super().fetchall()
+
+    cursor = InvalidatingCursor(
+        [{"match": "FROM users", "fetchall": [{"user_id": 7, "name": "Old", "email": "d@example.com", "skills": []}]}]
+    )
+
+    assert profiles.get(7, cursor)["name"] == "Old"
+    assert profiles.peek(7) is None
+
+
+def test_membership_loads_once_and_rechecks_unknown_threads_sparingly(monkeypatch):
+    fake_conn = FakeConnection(
+        [
+            {"match": "FROM thread_participants WHERE user_id = %s", "fetchall": [(3,), (4,)]},
+            {"match": "FROM thread_participants WHERE user_id = %s", "fetchall": [(3,), (4,), (9,)]},
+        ]
+    )
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    memberships = ThreadMembershipIndex(recheck_interval=60)
+
+    assert memberships.check(7, 3) is None
+    assert memberships.is_member(7, 3) is True
+    assert memberships.check("7", "4") is True
+    assert memberships.check(7, 9) is False
+    assert len(fake_conn.cursor_obj.steps) == 1
+
+    memberships.recheck_interval = 0
+    assert memberships.is_member(7, 9) is True
+    assert not fake_conn.cursor_obj.steps
+    assert memberships.stats()["loads"] == 2
+
+
+def test_new_direct_thread_invalidates_both_participants(monkeypatch):
+    fake_conn = FakeConnection(
+        [
+            {"match": "WITH user_threads AS", "fetchone": None},
+            {"match": "INSERT INTO chat_threads", "fetchone": {"thread_id": 9, "title": None}},
+            {"match": "INSERT INTO thread_participants"},
+        ]
+    )
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    memberships = ThreadMembershipIndex()
+    for user_id in ("7", "8", "5"):
+        memberships._cache.set(user_id, (frozenset({"3"}), time.monotonic()))
+    monkeypatch.setattr("backend.main.thread_memberships", memberships)
+
+    create_or_get_direct_thread({"user1_id": 7, "user2_id": 8})
+
+    assert memberships.check(7, 9) is None
+    assert memberships.check(8, 9) is None
+    assert memberships.check(5, 3) is True
+
+
+def test_join_is_refused_for_threads_the_user_is_not_in(monkeypatch):
+    memberships = ThreadMembershipIndex(recheck_interval=60)
+    memberships._cache.set("7", (frozenset({"3"}), time.monotonic()))
+    monkeypatch.setattr("backend.main.thread_memberships", memberships)
+
+    with client.websocket_connect("/ws/7") as websocket:
+        websocket.send_json({"type": "join_thread", "thread_id": "4"})
+        refused = websocket.receive_json()
+        websocket.send_json({"type": "join_thread", "thread_id": "3"})
+        joined = websocket.receive_json()
+
+    assert refused == {"type": "thread_join_denied", "thread_id": "4"}
+    assert joined == {"type": "thread_joined", "thread_id": "3"}
@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.main import ConnectionPool, PooledConnection
+
+
+class FakeRawCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise RuntimeError("server closed the connection unexpectedly")
+
+    def close(self):
+        pass
+
+
+class FakeRawConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+        self.in_transaction = False
+
+    def cursor(self, cursor_factory=None):
+        return FakeRawCursor(self)
+
+    def get_transaction_status(self):
+        return 2 if self.in_transaction else 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = FakeRawConnection()
+        created.append(conn)
+        return conn
+
+    return ConnectionPool(connect, **kwargs), created
+
+
+def test_pool_reuses_returned_connections():
+    pool, created = make_pool(min_size=0, max_size=2)
+
+    first = PooledConnection(pool, pool.getconn())
+    first.close()
+    second = PooledConnection(pool, pool.getconn())
+    second.close()
+
+    assert len(created) == 1
+    stats = pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["connections_created"] == 1
+    assert stats["idle"] == 1 and stats["in_use"] == 0
+
+
+def test_pool_rolls_back_open_transaction_on_return():
+    pool, created = make_pool(min_size=0, max_size=1)
+
+    conn = pool.getconn()
+    conn.in_transaction = True
+    pool.putconn(conn)
+
+    assert conn.rollbacks == 1
+    assert pool.getconn() is conn
+
+
+def test_pool_waits_for_release_and_records_wait():
+    pool, _ = make_pool(min_size=0, max_size=1, timeout=2.0)
+    held = pool.getconn()
+
+    def release_later():
+        time.sleep(0.05)
+        pool.putconn(held)
+
+    releaser = threading.Thread(target=release_later)
+    releaser.start()
+    conn = pool.getconn()
+    releaser.join()
+
+    assert conn is held
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["wait_time_max"] > 0
+
+
+def test_pool_times_out_when_exhausted():
+    pool, _ = make_pool(min_size=0, max_size=1, timeout=0.01)
+    pool.getconn()
+
+    with pytest.raises(HTTPException) as exc_info:
+        pool.getconn()
+
+    assert exc_info.value.status_code == 503
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_discards_connections_failing_health_check():
+    pool, created = make_pool(min_size=0, max_size=2, health_check_interval=0)
+
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.broken = True
+
+    replacement = pool.getconn()
+
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.stats()["health_check_failures"] == 1
+    assert len(created) == 2
+
+
+def test_pool_recycles_idle_connections_above_min_size():
+    pool, created = make_pool(min_size=1, max_size=3, idle_timeout=0.01)
+    pool.open()
+    a, b = pool.getconn(), pool.getconn()
+    pool.putconn(a)
+    pool.putconn(b)
+    time.sleep(0.02)
+
+    pool.getconn()
+
+    stats = pool.stats()
+    assert stats["idle_recycled"] == 1
+    assert stats["size"] == 1
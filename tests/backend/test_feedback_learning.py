@@ -197,7 +197,7 @@ def test_recommendation_scoring_includes_feedback_accept_rate(monkeypatch):
     fake_conn = FakeConnection(steps)
     monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
 
-    response = client.post("/api/projects/101/recommendations")
+    response = client.post("/api/projects/101/recommendations?wait=true")
     assert response.status_code == 200
     data = response.json()
     matches = data.get("matches", [])
@@ -0,0 +1,140 @@
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.main import LEADERBOARD_QUERY, PeriodicTask, app, sweep_inactive_accounts
+
+
+class FakeCursor:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.current_step = None
+        self.executed = []
+
+    def execute(self, query, params=None):
+        assert self.steps, f"Unexpected query executed: {query}"
+        step = self.steps.pop(0)
+        matcher = step.get("match")
+        if matcher:
+            assert matcher.lower() in query.lower(), f"Expected '{matcher}' in query: {query}"
+        self.executed.append((query, params))
+        self.current_step = step
+
+    def fetchone(self):
+        if not self.current_step:
+            return None
+        return self.current_step.get("fetchone")
+
+    def fetchall(self):
+        if not self.current_step:
+            return []
+        return self.current_step.get("fetchall", [])
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, steps):
+        self.cursor_obj = FakeCursor(steps)
+        self.committed = False
+
+    def cursor(self, cursor_factory=None):
+        return self.cursor_obj
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        pass
+
+
+client = TestClient(app)
+
+
+def test_sweep_freezes_and_thaws_in_one_statement():
+    cursor = FakeCursor([{"match": "WITH overdue AS", "fetchone": (3, 1)}])
+
+    assert sweep_inactive_accounts(cursor) == {"frozen": 3, "thawed": 1}
+    query = cursor.executed[0][0]
+    assert "SET frozen_since = NULL" in query
+    assert "INTERVAL '4 weeks'" in query
+    assert "NOT IN" not in query
+
+
+def test_leaderboard_filters_on_the_maintained_flag():
+    assert "u.frozen_since IS NULL" in LEADERBOARD_QUERY
+    assert "project_matches" not in LEADERBOARD_QUERY
+
+
+def test_user_decision_records_activity(monkeypatch):
+    match = {
+        "match_id": 11,
+        "project_id": 4,
+        "recommended_user_id": 7,
+        "required_skill": None,
+        "source_type": "manual",
+        "owner_decision": "pending",
+        "user_decision": "pending",
+    }
+    steps = [
+        {"match": "SELECT *", "fetchone": match},
+        {"match": "UPDATE project_matches", "fetchone": {**match, "user_decision": "rejected"}},
+        {"match": "INSERT INTO match_feedback"},
+        {"match": "SET last_decision_at = CURRENT_TIMESTAMP"},
+        {
+            "match": "FROM users",
+            "fetchall": [{"user_id": 7, "name": "Dana", "email": "dana@example.com", "skills": ["python"]}],
+        },
+    ]
+    fake_conn = FakeConnection(steps)
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    monkeypatch.setattr("backend.main.user_profiles", main.UserProfileCache())
+    board = main.Leaderboard()
+    board._checked_at = main.time.monotonic()
+    monkeypatch.setattr("backend.main.leaderboard", board)
+
+    response = client.patch("/api/matches/11/user", json={"decision": "rejected"})
+
+    assert response.status_code == 200
+    assert fake_conn.committed
+    assert not fake_conn.cursor_obj.steps
+    assert fake_conn.cursor_obj.executed[3][1] == (7,)
+    assert response.json()["match"]["recommendedUser"]["name"] == "Dana"
+    assert board.needs_sync()
+
+
+def test_periodic_task_records_results_and_errors():
+    outcomes = iter([{"frozen": 1, "thawed": 0}, RuntimeError("db down")])
+
+    def task():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    sweeper = PeriodicTask("test-sweeper", task, interval=60)
+    assert sweeper.run_once() == {"frozen": 1, "thawed": 0}
+    assert sweeper.run_once() is None
+
+    stats = sweeper.stats()
+    assert stats["runs"] == 1
+    assert stats["errors"] == 1
+    assert stats["last_result"] == {"frozen": 1, "thawed": 0}
+    assert stats["last_error"] == "db down"
+
+
+def test_sweep_run_marks_leaderboard_stale_only_on_change(monkeypatch):
+    board = main.Leaderboard()
+    board._checked_at = main.time.monotonic()
+    monkeypatch.setattr("backend.main.leaderboard", board)
+
+    fake_conn = FakeConnection([{"match": "WITH overdue AS", "fetchone": (0, 0)}])
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    assert main.run_inactivity_sweep() == {"frozen": 0, "thawed": 0}
+    assert fake_conn.committed
+    assert not board.needs_sync()
+
+    fake_conn = FakeConnection([{"match": "WITH overdue AS", "fetchone": (2, 0)}])
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    main.run_inactivity_sweep()
+    assert board.needs_sync()
@@ -0,0 +1,135 @@
+import time
+
+from backend.main import (
+    RecommendationUpdater,
+    SkillIndex,
+    plan_incremental_match_updates,
+)
+
+
+def make_candidate(**overrides):
+    candidate = {
+        "user_id": 5,
+        "name": "Dana",
+        "email": "dana@example.com",
+        "skills": ["python"],
+        "rating": 5,
+        "engagement_score": 100,
+    }
+    candidate.update(overrides)
+    return candidate
+
+
+def slate_row(match_id, user_id, skill="python", score=50.0, owner="pending", user="pending"):
+    return {
+        "match_id": match_id,
+        "project_id": 1,
+        "recommended_user_id": user_id,
+        "required_skill": skill,
+        "composite_score": score,
+        "owner_decision": owner,
+        "user_decision": user,
+    }
+
+
+PROJECT = {1: {"owner_id": 99, "required_skills": ["Python"], "status": "Open"}}
+
+
+def test_user_joins_slate_with_room():
+    plan = plan_incremental_match_updates(5, make_candidate(), {}, PROJECT, [slate_row(10, 2)])
+
+    assert [rec["recommended_user_id"] for rec in plan["inserts"]] == [5]
+    assert plan["inserts"][0]["required_skill"] == "python"
+    assert plan["updates"] == [] and plan["deletes"] == []
+
+
+def test_user_evicts_weakest_undecided_match_when_slate_is_full():
+    slates = [
+        slate_row(10, 2, score=20.0, owner="accepted"),
+        slate_row(11, 3, score=30.0),
+        slate_row(12, 4, score=90.0),
+    ]
+
+    plan = plan_incremental_match_updates(5, make_candidate(), {}, PROJECT, slates)
+
+    assert plan["deletes"] == [11]
+    assert [rec["recommended_user_id"] for rec in plan["inserts"]] == [5]
+
+
+def test_user_below_full_slate_is_not_added():
+    slates = [slate_row(10 + i, 2 + i, score=99.0) for i in range(3)]
+
+    plan = plan_incremental_match_updates(5, make_candidate(engagement_score=0, rating=0), {}, PROJECT, slates)
+
+    assert plan == {"inserts": [], "updates": [], "deletes": []}
+
+
+def test_existing_undecided_match_is_rescored_in_place():
+    slates = [slate_row(10, 5, score=10.0)]
+
+    plan = plan_incremental_match_updates(5, make_candidate(), {(5, "python"): 1.0}, PROJECT, slates)
+
+    assert len(plan["updates"]) == 1
+    update = plan["updates"][0]
+    assert update["match_id"] == 10
+    assert update["composite_score"] == 100.0
+
+
+def test_ineligible_user_loses_undecided_matches_but_keeps_decided_ones():
+    projects = {
+        1: PROJECT[1],
+        2: {"owner_id": 99, "required_skills": ["python"], "status": "Open"},
+    }
+    slates = [slate_row(10, 5), dict(slate_row(11, 5, user="accepted"), project_id=2)]
+
+    plan = plan_incremental_match_updates(5, None, {}, projects, slates)
+
+    assert plan == {"inserts": [], "updates": [], "deletes": [10]}
+
+
+def test_updater_debounces_repeated_changes():
+    refreshed = []
+    updater = RecommendationUpdater(
+        lambda user_id: refreshed.append(user_id) or {"updated": 1}, debounce_seconds=0.05
+    )
+    updater.start()
+    try:
+        for _ in range(5):
+            updater.mark_dirty(7)
+        updater.mark_dirty(8)
+        deadline = time.time() + 2
+        while len(refreshed) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+    finally:
+        updater.stop()
+
+    assert sorted(refreshed) == [7, 8]
+    assert updater.stats()["updated"] == 2
+
+
+def test_skill_index_reports_changed_users_after_initial_build():
+    changed = []
+    index = SkillIndex(on_change=changed.append)
+
+    class Cursor:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def execute(self, query, params=None):
+            pass
+
+        def fetchall(self):
+            return self.rows
+
+    index.sync(Cursor([{"user_id": 1, "skills": ["python"], "skills_updated_at": None}]))
+    index.sync(
+        Cursor(
+            [
+                {"user_id": 1, "skills": ["Python "], "skills_updated_at": None},
+                {"user_id": 2, "skills": ["go"], "skills_updated_at": None},
+            ]
+        )
+    )
+
+    assert changed == [{2}]
@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from backend.main import Leaderboard, app
+
+
+class FakeCursor:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.current_step = None
+        self.executed = []
+
+    def execute(self, query, params=None):
+        assert self.steps, f"Unexpected query executed: {query}"
+        step = self.steps.pop(0)
+        matcher = step.get("match")
+        if matcher:
+            assert matcher.lower() in query.lower(), f"Expected '{matcher}' in query: {query}"
+        self.executed.append((query, params))
+        self.current_step = step
+
+    def fetchone(self):
+        if not self.current_step:
+            return None
+        return self.current_step.get("fetchone")
+
+    def fetchall(self):
+        if not self.current_step:
+            return []
+        return self.current_step.get("fetchall", [])
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, steps):
+        self.cursor_obj = FakeCursor(steps)
+
+    def cursor(self, cursor_factory=None):
+        return self.cursor_obj
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+client = TestClient(app)
+
+STAMP = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def user_row(user_id, score, skills=("python",), eligible=True, completed=0, rating=4.0):
+    return {
+        "user_id": user_id,
+        "name": f"User {user_id}",
+        "email": f"user{user_id}@example.com",
+        "skills": list(skills),
+        "rating": rating,
+        "engagement_score": score,
+        "leaderboard_updated_at": STAMP,
+        "projects_completed": completed,
+        "eligible": eligible,
+    }
+
+
+def built_leaderboard(rows):
+    board = Leaderboard()
+    board.sync(FakeCursor([{"match": "FROM users u", "fetchall": rows}]))
+    return board
+
+
+def test_page_ranks_ties_like_sql_rank():
+    board = built_leaderboard(
+        [
+            user_row(1, 50),
+            user_row(2, 80),
+            user_row(3, 80),
+            user_row(4, 10),
+            user_row(5, 99, eligible=False),
+        ]
+    )
+
+    total, entries = board.page(0, 10)
+
+    assert total == 4
+    assert [(entry["user_id"], entry["rank"]) for entry in entries] == [(2, 1), (3, 1), (1, 3), (4, 4)]
+
+    total, entries = board.page(2, 1)
+    assert [(entry["user_id"], entry["rank"]) for entry in entries] == [(1, 3)]
+
+
+def test_skill_boards_rank_within_skill():
+    board = built_leaderboard(
+        [
+            user_row(1, 90, skills=["Python"]),
+            user_row(2, 70, skills=["go", "python"]),
+            user_row(3, 60, skills=["go"]),
+        ]
+    )
+
+    total, entries = board.page(0, 10, "go")
+
+    assert total == 2
+    assert [(entry["user_id"], entry["rank"]) for entry in entries] == [(2, 1), (3, 2)]
+    assert board.page(0, 10, "rust") == (0, [])
+
+
+def test_delta_sync_moves_and_removes_users():
+    board = built_leaderboard([user_row(1, 90), user_row(2, 70), user_row(3, 60, skills=["go"])])
+    board.mark_stale()
+    assert board.needs_sync()
+
+    cursor = FakeCursor(
+        [
+            {
+                "match": "WHERE u.leaderboard_updated_at > %s",
+                "fetchall": [user_row(3, 95, skills=["python"]), user_row(1, 90, eligible=False)],
+            }
+        ]
+    )
+    board.sync(cursor)
+
+    assert cursor.executed[0][1] == (STAMP - board.sync_overlap,)
+    assert not board.needs_sync()
+    total, entries = board.page(0, 10)
+    assert total == 2
+    assert [(entry["user_id"], entry["rank"]) for entry in entries] == [(3, 1), (2, 2)]
+    assert board.page(0, 10, "go") == (0, [])
+    assert board.page(0, 10, "python")[0] == 2
+
+
+def test_leaderboard_endpoint_paginates(monkeypatch):
+    board = Leaderboard()
+    monkeypatch.setattr("backend.main.leaderboard", board)
+    rows = [user_row(user_id, 200 - user_id, completed=user_id % 6) for user_id in range(1, 8)]
+    fake_conn = FakeConnection([{"match": "FROM users u", "fetchall": rows}])
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+
+    response = client.get("/api/leaderboard?limit=2&offset=4")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 7
+    assert [entry["rank"] for entry in body["leaderboard"]] == [5, 6]
+    entry = body["leaderboard"][0]
+    assert entry["user"]["id"] == "5"
+    assert entry["points"] == 195
+    assert entry["projectsCompleted"] == 5
+    assert [badge["id"] for badge in entry["user"]["badges"]] == ["first_collab", "collaborator", "engaged"]
+
+    # Served from memory until the next sync is due.
+    assert client.get("/api/leaderboard?skill=Python").json()["total"] == 7
+
+
+def test_ranks_by_exact_score_with_unscored_users_last():
+    board = built_leaderboard(
+        [
+            user_row(1, Decimal("10.2")),
+            user_row(2, Decimal("10.7")),
+            user_row(3, None),
+            user_row(4, 0),
+            user_row(5, None),
+            user_row(6, 10),
+        ]
+    )
+
+    total, entries = board.page(0, 10)
+
+    assert [(entry["user_id"], entry["rank"]) for entry in entries] == [
+        (2, 1),
+        (1, 2),
+        (6, 3),
+        (4, 4),
+        (3, 5),
+        (5, 5),
+    ]
+
+
+def test_rebuild_swaps_in_a_fresh_board_and_resyncs_recent_changes():
+    board = built_leaderboard([user_row(1, 90), user_row(2, 70)])
+    assert not board.needs_sync()
+
+    later = STAMP + timedelta(minutes=5)
+    rows = [user_row(2, 95), user_row(3, 10)]
+    rows[0]["leaderboard_updated_at"] = later
+    assert board.rebuild(FakeCursor([{"match": "FROM users u", "fetchall": rows}])) == 2
+
+    total, entries = board.page(0, 10)
+    assert [entry["user_id"] for entry in entries] == [2, 3]
+    # Changes applied while the rebuild query ran are fetched again.
+    assert board.needs_sync()
+    cursor = FakeCursor([{"match": "WHERE u.leaderboard_updated_at > %s", "fetchall": []}])
+    board.sync(cursor)
+    assert cursor.executed[0][1] == (later - board.sync_overlap,)
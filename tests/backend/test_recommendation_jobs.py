@@ -0,0 +1,127 @@
+import threading
+import time
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from backend.main import RecommendationJobQueue, app
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_requests_for_same_project_are_coalesced():
+    runs = []
+    finished = []
+    queue = RecommendationJobQueue(
+        lambda project_id: runs.append(project_id) or [{"match_id": 1}],
+        debounce_seconds=0.05,
+        on_finished=finished.append,
+    )
+    try:
+        first = queue.submit(7, owner_id=3)
+        second = queue.submit(7)
+        other = queue.submit(8)
+
+        assert second["job_id"] == first["job_id"]
+        assert other["job_id"] != first["job_id"]
+        assert wait_for(lambda: len(finished) == 2)
+    finally:
+        queue.stop()
+
+    assert sorted(runs) == [7, 8]
+    job = queue.get(first["job_id"])
+    assert job["status"] == "completed"
+    assert job["coalesced"] == 1
+    assert job["match_count"] == 1
+    assert {j["owner_id"] for j in finished} == {3, None}
+
+
+def test_request_during_run_schedules_single_follow_up():
+    release = threading.Event()
+    runs = []
+
+    def run(project_id):
+        runs.append(project_id)
+        release.wait(2)
+        return []
+
+    queue = RecommendationJobQueue(run, workers=2, debounce_seconds=0)
+    try:
+        first = queue.submit(7)
+        assert wait_for(lambda: queue.get(first["job_id"])["status"] == "running")
+        follow_ups = {queue.submit(7)["job_id"] for _ in range(5)}
+        time.sleep(0.05)
+        assert runs == [7], "follow-up must wait for the running job"
+        release.set()
+        (follow_up_id,) = follow_ups
+        assert wait_for(lambda: queue.get(follow_up_id)["status"] == "completed")
+    finally:
+        release.set()
+        queue.stop()
+
+    assert runs == [7, 7]
+
+
+def test_failed_job_reports_error():
+    def run(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    queue = RecommendationJobQueue(run, debounce_seconds=0)
+    try:
+        job = queue.submit(99)
+        assert wait_for(lambda: queue.get(job["job_id"])["status"] == "failed")
+    finally:
+        queue.stop()
+
+    assert queue.get(job["job_id"])["error"] == "Project not found"
+
+
+def test_job_states_are_persisted_for_other_workers():
+    stored = []
+    queue = RecommendationJobQueue(lambda project_id: [{"match_id": 1}], debounce_seconds=0.05, persist=stored.append)
+    try:
+        job = queue.submit(7)
+        queue.submit(7)
+        assert wait_for(lambda: queue.get(job["job_id"])["status"] == "completed")
+        assert wait_for(lambda: len(stored) == 4)
+    finally:
+        queue.stop()
+
+    assert {snapshot["job_id"] for snapshot in stored} == {job["job_id"]}
+    assert [(s["status"], s["coalesced"]) for s in stored] == [
+        ("queued", 0),
+        ("queued", 1),
+        ("running", 1),
+        ("completed", 1),
+    ]
+    assert stored[-1]["match_count"] == 1
+
+
+def test_job_status_poll_falls_back_to_the_stored_job(monkeypatch):
+    stored = {
+        "job_id": "abc",
+        "project_id": 7,
+        "owner_id": 3,
+        "status": "completed",
+        "submitted_at": 1700000000.0,
+        "started_at": 1700000000.5,
+        "finished_at": 1700000001.0,
+        "coalesced": 0,
+        "match_count": 4,
+        "error": None,
+    }
+    monkeypatch.setattr("backend.main.load_recommendation_job", lambda job_id: stored if job_id == "abc" else None)
+    client = TestClient(app)
+
+    response = client.get("/api/recommendation-jobs/abc")
+    assert response.status_code == 200
+    assert response.json()["job"]["status"] == "completed"
+    assert response.json()["job"]["matchCount"] == 4
+    assert client.get("/api/recommendation-jobs/missing").status_code == 404
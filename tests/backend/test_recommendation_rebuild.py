@@ -0,0 +1,258 @@
+import random
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.main import (
+    RecommendationRebuild,
+    SharedCandidatePool,
+    _env_skill_limits,
+    app,
+    rebuild_open_project_recommendations,
+    recommendation_limits,
+)
+
+
+class FakeCursor:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.current_step = None
+        self.executed = []
+
+    def execute(self, query, params=None):
+        assert self.steps, f"Unexpected query executed: {query}"
+        step = self.steps.pop(0)
+        matcher = step.get("match")
+        if matcher:
+            assert matcher.lower() in query.lower(), f"Expected '{matcher}' in query: {query}"
+        self.executed.append((query, params))
+        self.current_step = step
+
+    def fetchone(self):
+        if not self.current_step:
+            return None
+        return self.current_step.get("fetchone")
+
+    def fetchall(self):
+        if not self.current_step:
+            return []
+        return self.current_step.get("fetchall", [])
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, steps):
+        self.cursor_obj = FakeCursor(steps)
+        self.commits = 0
+
+    def cursor(self, cursor_factory=None):
+        return self.cursor_obj
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+
+client = TestClient(app)
+
+SKILLS = ["python", "react", "go", "sql", "figma"]
+
+
+def make_candidates(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "user_id": user_id,
+            "name": f"User {user_id}",
+            "email": f"user{user_id}@example.com",
+            "skills": rng.sample(SKILLS, rng.randint(0, 3)),
+            "rating": rng.choice([None, 0, 2.5, 4, 5]),
+            "engagement_score": rng.randint(0, 150),
+        }
+        for user_id in range(1, count + 1)
+    ]
+
+
+PROJECTS = [
+    {"project_id": 10, "owner_id": 1, "required_skills": ["Python", "SQL"]},
+    {"project_id": 11, "owner_id": 2, "required_skills": []},
+    {"project_id": 12, "owner_id": 3, "required_skills": ["figma"]},
+]
+
+
+@pytest.mark.parametrize("size", [8, 200])
+def test_shared_pool_excludes_owner_and_keeps_top_k(size):
+    candidates = make_candidates(size)
+    pool = SharedCandidatePool(candidates, {(4, "python"): 1.0})
+    assert (pool.matrix is not None) == (size >= main.VECTORIZED_SCORING_MIN_CANDIDATES)
+
+    for project in PROJECTS:
+        recommendations = pool.recommend(project)
+        owners = [rec["recommended_user_id"] for rec in recommendations]
+        assert project["owner_id"] not in owners
+        assert all(rec["project_id"] == project["project_id"] for rec in recommendations)
+        scores = [rec["composite_score"] for rec in recommendations]
+        assert scores == sorted(scores, reverse=True)
+
+        expected = main.merge_ranked_recommendations(
+            project["project_id"],
+            main._normalize_skills(project["required_skills"]),
+            main.rank_candidates_python(
+                [c for c in candidates if c["user_id"] != project["owner_id"]],
+                main._normalize_skills(project["required_skills"]),
+                {(4, "python"): 1.0},
+                main.recommendation_limits(main._normalize_skills(project["required_skills"])),
+            ),
+        )
+        assert scores == [rec["composite_score"] for rec in expected]
+
+
+def rebuild_steps(candidates, chunks):
+    steps = [
+        {"match": "FROM projects", "fetchall": PROJECTS},
+        {"match": "FROM users u", "fetchall": candidates},
+        {"match": "FROM user_feedback_stats", "fetchall": []},
+    ]
+    for chunk in chunks:
+        steps.append({"match": "DELETE FROM project_matches WHERE project_id = ANY"})
+        steps.append({"match": "INSERT INTO project_matches", "fetchall": [{"match_id": i} for i in range(chunk)]})
+    return steps
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rebuild_scores_each_chunk_and_writes_in_bulk(monkeypatch, workers):
+    candidates = make_candidates(100)
+    fake_conn = FakeConnection(rebuild_steps(candidates, [2, 1]))
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    monkeypatch.setattr(main, "RECOMMENDATION_REBUILD_WORKERS", 4)
+    progress = []
+
+    result = rebuild_open_project_recommendations(
+        workers=workers, chunk_size=2, progress=lambda done, total, elapsed: progress.append((done, total))
+    )
+
+    assert progress == [(2, 3), (3, 3)]
+    assert result["projects"] == 3
+    assert result["candidates"] == 100
+    assert result["matches"] == 3
+    assert result["projects_per_second"] > 0
+    assert fake_conn.commits == 3
+
+    executed = fake_conn.cursor_obj.executed
+    assert executed[3][1] == ([10, 11],)
+    assert executed[5][1] == ([12],)
+    pool = SharedCandidatePool(candidates, {})
+    written = executed[4][1]
+    expected = pool.recommend(PROJECTS[0]) + pool.recommend(PROJECTS[1])
+    assert list(written[0]) == [rec["project_id"] for rec in expected]
+    assert list(written[1]) == [rec["recommended_user_id"] for rec in expected]
+
+
+def test_rebuild_workers_are_capped_and_not_forked(monkeypatch):
+    created = []
+
+    class RecordingExecutor:
+        def __init__(self, max_workers, mp_context, initializer, initargs):
+            created.append((max_workers, mp_context.get_start_method()))
+            initializer(*initargs)
+
+        def map(self, fn, chunks):
+            return map(fn, chunks)
+
+        def shutdown(self, *args, **kwargs):
+            pass
+
+    candidates = make_candidates(100)
+    fake_conn = FakeConnection(rebuild_steps(candidates, [1, 1, 1]))
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    monkeypatch.setattr("backend.main.ProcessPoolExecutor", RecordingExecutor)
+    monkeypatch.setattr(main, "RECOMMENDATION_REBUILD_WORKERS", 2)
+
+    rebuild_open_project_recommendations(workers=500, chunk_size=1)
+
+    assert len(created) == 1
+    max_workers, start_method = created[0]
+    assert max_workers == 2
+    assert start_method in {"forkserver", "spawn"}
+
+
+def test_rebuild_tracker_rejects_overlapping_runs():
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_rebuild(workers=None, chunk_size=None, progress=None):
+        started.set()
+        progress(1, 2, 0.1)
+        release.wait(2)
+        return {"projects": 2, "candidates": 5, "matches": 4, "seconds": 0.2, "projects_per_second": 10.0}
+
+    rebuild = RecommendationRebuild(slow_rebuild)
+    state = rebuild.start()
+    assert state["status"] == "running"
+    assert started.wait(2)
+
+    with pytest.raises(HTTPException) as excinfo:
+        rebuild.start()
+    assert excinfo.value.status_code == 409
+    assert rebuild.status()["done"] == 1
+
+    release.set()
+    for _ in range(200):
+        if rebuild.status()["status"] != "running":
+            break
+        threading.Event().wait(0.01)
+    assert rebuild.status()["status"] == "succeeded"
+    assert rebuild.status()["result"]["matches"] == 4
+
+
+def test_rebuild_endpoint_waits_and_reports_throughput(monkeypatch):
+    monkeypatch.setattr(
+        "backend.main.recommendation_rebuild",
+        RecommendationRebuild(
+            lambda workers=None, chunk_size=None, progress=None: {
+                "projects": 3,
+                "candidates": 40,
+                "matches": 9,
+                "seconds": 0.5,
+                "projects_per_second": 6.0,
+            }
+        ),
+    )
+
+    response = client.post("/api/admin/recommendations/rebuild?wait=true")
+
+    assert response.status_code == 200
+    body = response.json()["rebuild"]
+    assert body["status"] == "succeeded"
+    assert body["matchCount"] == 9
+    assert body["projectsPerSecond"] == 6.0
+
+    status = client.get("/api/admin/recommendations/rebuild").json()["rebuild"]
+    assert status["status"] == "succeeded"
+
+
+def test_per_skill_overrides_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv(
+        "RECOMMENDATIONS_PER_SKILL_OVERRIDES",
+        '{" Python ": 5, "figma": 1, "sql": 0, "go": "2", "rust": true}',
+    )
+    overrides = _env_skill_limits("RECOMMENDATIONS_PER_SKILL_OVERRIDES")
+    monkeypatch.setattr(main, "RECOMMENDATIONS_PER_SKILL_OVERRIDES", overrides)
+    monkeypatch.setattr(main, "RECOMMENDATIONS_PER_SKILL", 3)
+
+    assert overrides == {"python": 5, "figma": 1}
+    assert recommendation_limits(["python", "figma", "sql"]) == {"python": 5, "figma": 1, "sql": 3}
+
+
+def test_malformed_per_skill_overrides_are_ignored(monkeypatch):
+    monkeypatch.setenv("RECOMMENDATIONS_PER_SKILL_OVERRIDES", "[5]")
+    assert _env_skill_limits("RECOMMENDATIONS_PER_SKILL_OVERRIDES") == {}
+    monkeypatch.setenv("RECOMMENDATIONS_PER_SKILL_OVERRIDES", "{python: 5}")
+    assert _env_skill_limits("RECOMMENDATIONS_PER_SKILL_OVERRIDES") == {}
@@ -0,0 +1,195 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import SkillIndex, app
+
+
+class FakeCursor:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.current_step = None
+        self.executed = []
+
+    def execute(self, query, params=None):
+        assert self.steps, f"Unexpected query executed: {query}"
+        step = self.steps.pop(0)
+        matcher = step.get("match")
+        if matcher:
+            assert matcher.lower() in query.lower(), f"Expected '{matcher}' in query: {query}"
+        self.executed.append((query, params))
+        self.current_step = step
+
+    def fetchone(self):
+        if not self.current_step:
+            return None
+        return self.current_step.get("fetchone")
+
+    def fetchall(self):
+        if not self.current_step:
+            return []
+        return self.current_step.get("fetchall", [])
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, steps):
+        self.cursor_obj = FakeCursor(steps)
+        self.committed = False
+
+    def cursor(self, cursor_factory=None):
+        return self.cursor_obj
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        pass
+
+
+client = TestClient(app)
+
+
+def test_update_user_moves_postings_between_skills():
+    index = SkillIndex()
+    index.update_user(1, [" Python", "React "])
+    index.update_user(2, ["python"])
+
+    assert index.users_with_skill("python") == {1, 2}
+    assert index.users_with_any(["react", "go"]) == {1}
+
+    index.update_user(1, ["go"])
+    assert index.users_with_skill("python") == {2}
+    assert index.users_with_skill("react") == set()
+    assert index.users_with_skill("go") == {1}
+
+    index.remove_user(2)
+    assert index.users_with_skill("python") == set()
+
+
+def test_sync_rebuilds_once_then_applies_deltas():
+    index = SkillIndex()
+    first_seen = datetime(2024, 1, 1, 12, 0, 0)
+    cursor = FakeCursor(
+        [
+            {
+                "match": "SELECT user_id, skills, skills_updated_at FROM users",
+                "fetchall": [
+                    {"user_id": 1, "skills": ["python"], "skills_updated_at": first_seen},
+                    {"user_id": 2, "skills": ["react"], "skills_updated_at": first_seen},
+                ],
+            },
+            {
+                "match": "WHERE skills_updated_at >",
+                "fetchall": [
+                    {
+                        "user_id": 2,
+                        "skills": ["react", "python"],
+                        "skills_updated_at": datetime(2024, 1, 1, 12, 5, 0),
+                    },
+                ],
+            },
+        ]
+    )
+
+    assert index.lookup(cursor, ["python"]) == {1}
+    assert index.lookup(cursor, ["python"]) == {1, 2}
+    _, delta_params = cursor.executed[1]
+    assert delta_params[0] < first_seen  # overlap window re-reads recent changes
+    assert not cursor.steps
+
+
+def test_recommendations_only_load_users_with_required_skills(monkeypatch):
+    monkeypatch.setattr("backend.main.skill_index", SkillIndex())
+    steps = [
+        {
+            "match": "SELECT project_id, owner_id, required_skills",
+            "fetchone": {"project_id": 101, "owner_id": 1, "required_skills": ["Python"]},
+        },
+        {"match": "DELETE FROM project_matches"},
+        {
+            "match": "SELECT user_id, skills, skills_updated_at FROM users",
+            "fetchall": [
+                {"user_id": 2, "skills": ["python"], "skills_updated_at": None},
+                {"user_id": 3, "skills": ["figma"], "skills_updated_at": None},
+            ],
+        },
+        {
+            "match": "AS active_collaborations",
+            "fetchall": [
+                {
+                    "user_id": 2,
+                    "name": "Alice",
+                    "email": "alice@example.com",
+                    "skills": ["python"],
+                    "rating": 4.0,
+                    "engagement_score": 50,
+                },
+            ],
+        },
+        {"match": "SELECT user_id, skill, accept_rate", "fetchall": []},
+        {"match": "INSERT INTO project_matches", "fetchall": [{"match_id": 1, "recommended_user_id": 2}]},
+    ]
+    fake_conn = FakeConnection(steps)
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+
+    response = client.post("/api/projects/101/recommendations?wait=true")
+
+    assert response.status_code == 200
+    cursor = fake_conn.cursor_obj
+    candidate_query, candidate_params = cursor.executed[3]
+    assert "= ANY(%s)" in candidate_query
+    assert candidate_params[0] == [2]
+    _, insert_params = cursor.executed[5]
+    assert insert_params[0] == [101]
+    assert insert_params[1] == [2]
+    assert response.json()["matches"] == [{"match_id": 1, "recommended_user_id": 2}]
+    assert fake_conn.committed is True
+    assert not cursor.steps, "Not all scripted DB steps were consumed"
+
+
+def test_upsert_project_matches_writes_all_rows_in_one_statement():
+    from backend.main import upsert_project_matches
+
+    cursor = FakeCursor(
+        [{"match": "FROM unnest(", "fetchall": [{"match_id": 1}, {"match_id": 2}]}]
+    )
+    recommendations = [
+        {
+            "project_id": 101,
+            "recommended_user_id": 7,
+            "required_skill": "python",
+            "skill_match_score": 100.0,
+            "engagement_score_snapshot": 40.0,
+            "rating_snapshot": 4.5,
+            "composite_score": 91.5,
+        },
+        {
+            "project_id": 101,
+            "recommended_user_id": 8,
+            "required_skill": None,
+            "skill_match_score": 50.0,
+            "engagement_score_snapshot": 10.0,
+            "rating_snapshot": 3.0,
+            "composite_score": 40.0,
+        },
+    ]
+
+    rows = upsert_project_matches(cursor, recommendations)
+
+    assert rows == [{"match_id": 1}, {"match_id": 2}]
+    query, params = cursor.executed[0]
+    assert "JOIN users u" in query
+    assert params == (
+        [101, 101],
+        [7, 8],
+        ["python", None],
+        [100.0, 50.0],
+        [40.0, 10.0],
+        [4.5, 3.0],
+        [91.5, 40.0],
+    )
+    assert upsert_project_matches(FakeCursor([]), []) == []
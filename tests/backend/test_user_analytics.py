@@ -0,0 +1,186 @@
+from fastapi.testclient import TestClient
+
+import backend.main as main
+from backend.main import CachedLoader, TTLCache, app
+
+
+class FakeCursor:
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.current_step = None
+        self.executed = []
+
+    def execute(self, query, params=None):
+        assert self.steps, f"Unexpected query executed: {query}"
+        step = self.steps.pop(0)
+        matcher = step.get("match")
+        if matcher:
+            assert matcher.lower() in query.lower(), f"Expected '{matcher}' in query: {query}"
+        self.executed.append((query, params))
+        self.current_step = step
+
+    def fetchone(self):
+        if not self.current_step:
+            return None
+        return self.current_step.get("fetchone")
+
+    def fetchall(self):
+        if not self.current_step:
+            return []
+        return self.current_step.get("fetchall", [])
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, steps):
+        self.cursor_obj = FakeCursor(steps)
+        self.closed = False
+
+    def cursor(self, cursor_factory=None):
+        return self.cursor_obj
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+client = TestClient(app)
+
+
+def analytics_row(**overrides):
+    row = {
+        "name": "Dana",
+        "email": "dana@example.com",
+        "rating": 4.5,
+        "engagement_score": 120,
+        "skills": ["python", "sql"],
+        "total_collaborations": 2,
+        "active_projects": 1,
+        "applications_total": 3,
+        "applications_accepted": 1,
+        "applications_rejected": 1,
+        "applications_pending": 1,
+        "responded": 1,
+        "total_auto": 4,
+        "engagement_trend": [{"date": "03/01", "score": 8}, {"date": "03/04", "score": 5}],
+        "rating_progress": [{"date": "02/01", "rating": 4.25}],
+        "collaboration_frequency": [{"month": "Feb", "projects": 2}],
+        "skills_distribution": [{"skill": "python", "count": 2, "percentage": 100.0}],
+        "project_types": [{"type": "Web Development", "count": 2}],
+    }
+    row.update(overrides)
+    return row
+
+
+def use_fresh_loader(monkeypatch, fake_conn):
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    monkeypatch.setattr(
+        "backend.main.analytics_loader",
+        CachedLoader(TTLCache(ttl=60), lambda user_id: main.compute_user_analytics(user_id)),
+    )
+
+
+def test_analytics_is_one_round_trip(monkeypatch):
+    fake_conn = FakeConnection([{"match": "WITH target AS", "fetchone": analytics_row()}])
+    use_fresh_loader(monkeypatch, fake_conn)
+
+    response = client.get("/api/analytics/user/9")
+
+    assert response.status_code == 200
+    assert len(fake_conn.cursor_obj.executed) == 1
+    assert fake_conn.cursor_obj.executed[0][1] == {"user_id": 9}
+    assert fake_conn.closed
+    assert response.json() == {
+        "overview": {
+            "totalCollaborations": 2,
+            "activeProjects": 1,
+            "overallRating": 4.5,
+            "engagementScore": 120,
+            "skillsContributed": ["python", "sql"],
+            "responseRate": 25.0,
+        },
+        "engagementTrend": [{"date": "03/01", "score": 8}, {"date": "03/04", "score": 5}],
+        "ratingProgress": [{"date": "02/01", "rating": 4.25}],
+        "collaborationFrequency": [{"month": "Feb", "projects": 2}],
+        "skillsDistribution": [
+            {"skill": "python", "count": 2, "percentage": 100.0},
+            {"skill": "sql", "count": 1, "percentage": 20.0},
+        ],
+        "projectTypes": [{"type": "Web Development", "count": 2}],
+        "applicationStats": {"total": 3, "accepted": 1, "rejected": 1, "pending": 1},
+    }
+
+
+def test_analytics_fills_sample_sections_for_new_users(monkeypatch):
+    row = analytics_row(
+        skills=[],
+        total_auto=0,
+        engagement_trend=[],
+        rating_progress=[],
+        collaboration_frequency=[],
+        skills_distribution=[],
+        project_types=[],
+    )
+    use_fresh_loader(monkeypatch, FakeConnection([{"fetchone": row}]))
+
+    body = client.get("/api/analytics/user/9").json()
+
+    assert body["overview"]["responseRate"] == 0
+    assert len(body["engagementTrend"]) == 6
+    assert len(body["ratingProgress"]) == 6
+    assert len(body["collaborationFrequency"]) == 6
+    assert [entry["skill"] for entry in body["skillsDistribution"]] == ["JavaScript", "Python", "React"]
+    assert len(body["projectTypes"]) == 3
+
+
+def test_analytics_unknown_user_is_404(monkeypatch):
+    use_fresh_loader(monkeypatch, FakeConnection([{"fetchone": None}]))
+
+    response = client.get("/api/analytics/user/404")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "User not found"
+
+
+def test_analytics_series_read_rollups_instead_of_raw_history(monkeypatch):
+    fake_conn = FakeConnection([{"fetchone": analytics_row()}])
+    use_fresh_loader(monkeypatch, fake_conn)
+
+    client.get("/api/analytics/user/9")
+
+    query = fake_conn.cursor_obj.executed[0][0]
+    for rollup in ("user_engagement_daily", "user_rating_monthly", "user_collaboration_daily"):
+        assert f"FROM {rollup}" in query
+    assert "FROM engagement" not in query
+    assert "FROM user_ratings" not in query
+
+
+def rollup_init_steps(missing):
+    steps = [{"match": "to_regclass('user_engagement_daily')", "fetchone": (missing,)}]
+    steps += [{"match": "CREATE TABLE IF NOT EXISTS"}] * 3
+    steps += [{"match": "CREATE OR REPLACE FUNCTION rollup_"}] * 3
+    steps += [{"match": "DROP TRIGGER IF EXISTS"}, {"match": "CREATE TRIGGER"}] * 3
+    return steps
+
+
+def test_rollup_tables_are_backfilled_once_when_created(monkeypatch):
+    backfill = [
+        {"match": "LOCK TABLE engagement, user_ratings, project_collaborators"},
+        {"match": "TRUNCATE user_engagement_daily"},
+        {"match": "INSERT INTO user_engagement_daily"},
+        {"match": "INSERT INTO user_rating_monthly"},
+        {"match": "INSERT INTO user_collaboration_daily"},
+    ]
+    fake_conn = FakeConnection(rollup_init_steps(True) + backfill)
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    main.init_analytics_rollup_tables()
+    assert not fake_conn.cursor_obj.steps
+
+    fake_conn = FakeConnection(rollup_init_steps(False))
+    monkeypatch.setattr("backend.main.get_db_connection", lambda: fake_conn)
+    main.init_analytics_rollup_tables()
+    assert not fake_conn.cursor_obj.steps
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.main import CandidateScoreMatrix, rank_candidates_python
+
+SKILLS = ["python", "react", "sql", "go", "figma", "rust"]
+
+
+def make_pool(seed, size=400):
+    rng = random.Random(seed)
+    candidates = []
+    stats = {}
+    for user_id in range(1, size + 1):
+        skills = rng.sample(SKILLS + [" Python ", "REACT"], rng.randint(0, 4))
+        candidates.append(
+            {
+                "user_id": user_id,
+                "skills": skills,
+                # Coarse values produce plenty of exact ties.
+                "engagement_score": rng.choice([None, 0, 40, 85, 150, "bad"]),
+                "rating": rng.choice([None, 0, 3.5, 4.2, 5, 7.0]),
+            }
+        )
+        for bucket in rng.sample(SKILLS + ["general"], rng.randint(0, 3)):
+            stats[(user_id, bucket)] = rng.choice([0.0, 0.25, 0.5, 0.8, 1.2])
+    return candidates, stats
+
+
+def summarize(ranked):
+    return {
+        skill: [
+            (
+                entry["candidate"]["user_id"],
+                entry["composite_score"],
+                entry["skill_match_score"],
+                entry["engagement"],
+                entry["rating"],
+            )
+            for entry in entries
+        ]
+        for skill, entries in ranked.items()
+    }
+
+
+@pytest.mark.parametrize(
+    "required_skills",
+    [
+        ["python", "react"],
+        ["python", "react", "sql"],
+        ["go", "go", "rust"],
+        ["cobol"],
+        [],
+    ],
+)
+def test_matrix_matches_python_scorer_exactly(required_skills):
+    for seed in range(3):
+        candidates, stats = make_pool(seed)
+        expected = summarize(rank_candidates_python(candidates, required_skills, stats))
+        actual = summarize(CandidateScoreMatrix(candidates, stats).rank(required_skills))
+        assert actual == expected
+
+
+def test_matrix_handles_empty_pool():
+    matrix = CandidateScoreMatrix([], {})
+    assert matrix.rank(["python"]) == {"python": []}
+    assert matrix.rank([]) == {"general": []}
+
+
+@pytest.mark.parametrize("limit", [0, 1, 3, 10, 1000])
+def test_top_k_matches_prefix_of_full_ranking(limit):
+    required_skills = ["python", "react", "sql"]
+    limits = {skill: limit for skill in required_skills}
+    for seed in range(3):
+        candidates, stats = make_pool(seed)
+        full = summarize(rank_candidates_python(candidates, required_skills, stats))
+        expected = {skill: entries[:limit] for skill, entries in full.items()}
+
+        assert summarize(rank_candidates_python(candidates, required_skills, stats, limits)) == expected
+        assert summarize(CandidateScoreMatrix(candidates, stats).rank(required_skills, limits)) == expected
+
+
+def test_top_k_rows_breaks_ties_by_row_order():
+    from backend.main import top_k_rows
+
+    rows = np.array([3, 5, 8, 9, 12])
+    scores = np.array([1.0, 2.0, 2.0, 2.0, 0.5])
+
+    assert top_k_rows(rows, scores, 2).tolist() == [5, 8]
+    assert top_k_rows(rows, scores, 4).tolist() == [3, 5, 8, 9]
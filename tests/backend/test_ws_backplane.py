@@ -0,0 +1,422 @@
+import asyncio
+import json
+
+from backend.main import ClientConnection, ConnectionManager, LocalBackplane, PostgresBackplane, TypingCoalescer
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class StalledSocket(FakeSocket):
+    """A client that stops reading until ``resume`` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.resume = asyncio.Event()
+
+    async def send_json(self, message):
+        await self.resume.wait()
+        await super().send_json(message)
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def make_workers(count=2):
+    backplane = LocalBackplane()
+    workers = [ConnectionManager(backplane) for _ in range(count)]
+    return backplane, workers
+
+
+def test_thread_broadcast_reaches_participants_on_other_workers():
+    async def scenario():
+        backplane, (worker_a, worker_b) = make_workers()
+        for worker in (worker_a, worker_b):
+            await worker.start()
+        alice, bob, carol = FakeSocket(), FakeSocket(), FakeSocket()
+        await worker_a.connect(alice, "1")
+        await worker_a.connect(carol, "3")
+        await worker_b.connect(bob, "2")
+        worker_a.join_thread("9", "1")
+        worker_a.join_thread(9, "3")
+        worker_b.join_thread("9", "2")
+
+        await worker_a.broadcast_to_thread(9, {"type": "new_message"}, exclude_user="1")
+        await settle()
+        for worker in (worker_a, worker_b):
+            await worker.stop()
+        return backplane, worker_b, alice, bob, carol
+
+    backplane, worker_b, alice, bob, carol = asyncio.run(scenario())
+
+    assert alice.sent == []
+    assert carol.sent == [{"type": "new_message"}]
+    assert bob.sent == [{"type": "new_message"}]
+    assert backplane.stats()["published"] == 1
+    assert worker_b.stats()["received"] == 1
+    assert worker_b.stats()["hop_latency"]["samples"] == 1
+
+
+def test_personal_message_is_delivered_wherever_the_user_is_connected():
+    async def scenario():
+        _, (worker_a, worker_b) = make_workers()
+        for worker in (worker_a, worker_b):
+            await worker.start()
+        bob = FakeSocket()
+        await worker_b.connect(bob, "2")
+
+        await worker_a.send_personal_message({"type": "recommendations_ready"}, 2)
+        await settle()
+        for worker in (worker_a, worker_b):
+            await worker.stop()
+        return worker_a, bob
+
+    worker_a, bob = asyncio.run(scenario())
+
+    assert bob.sent == [{"type": "recommendations_ready"}]
+    assert worker_a.stats()["received"] == 0
+
+
+def test_stopped_worker_no_longer_receives():
+    async def scenario():
+        backplane, (worker_a, worker_b) = make_workers()
+        for worker in (worker_a, worker_b):
+            await worker.start()
+        bob = FakeSocket()
+        await worker_b.connect(bob, "2")
+        await worker_b.stop()
+
+        await worker_a.send_personal_message({"type": "ping"}, "2")
+        await settle()
+        subscribers = backplane.stats()["subscribers"]
+        await worker_a.stop()
+        return subscribers, bob
+
+    subscribers, bob = asyncio.run(scenario())
+
+    assert bob.sent == []
+    assert subscribers == 1
+
+
+class FakeNotifyCursor:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def close(self):
+        pass
+
+
+class FakeNotifyConnection:
+    def __init__(self):
+        self.executed = []
+        self.closed = False
+
+    def set_session(self, autocommit=False):
+        self.autocommit = autocommit
+
+    def cursor(self):
+        return FakeNotifyCursor(self.executed)
+
+    def close(self):
+        self.closed = True
+
+
+def test_postgres_backplane_sends_queued_events_in_one_notify():
+    conn = FakeNotifyConnection()
+    backplane = PostgresBackplane(lambda: conn, channel="test_ws")
+
+    async def publish():
+        await backplane.publish({"kind": "user", "user_id": "2", "message": {"n": 1}})
+        await backplane.publish({"kind": "user", "user_id": "2", "message": {"n": 2}})
+        await backplane.publish({"kind": "user", "user_id": "2", "message": {"text": "x" * 9000}})
+
+    asyncio.run(publish())
+    backplane._stopped.set()
+    backplane._publish_worker()
+
+    assert len(conn.executed) == 1
+    query, (channel, payloads) = conn.executed[0]
+    assert "pg_notify" in query
+    assert channel == "test_ws"
+    assert [json.loads(p)["message"]["n"] for p in payloads] == [1, 2]
+    stats = backplane.stats()
+    assert stats["published"] == 2
+    assert stats["oversized"] == 1
+    assert stats["batches"] == 1
+    assert conn.closed
+
+
+def test_fits_backplane_measures_the_published_thread_event():
+    message = {"type": "new_message", "message": {"content": "x" * 7000}}
+    local = ConnectionManager(LocalBackplane())
+    postgres = ConnectionManager(PostgresBackplane(lambda: None))
+
+    assert local.fits_backplane("9", {"type": "new_message", "message": {"content": "x" * 9000}})
+    assert postgres.fits_backplane("9", message, exclude_user="1")
+    # 3000 bytes of UTF-8, but JSON escapes each character to six bytes.
+    assert not postgres.fits_backplane("9", {"type": "new_message", "message": {"content": "é" * 1500}})
+
+
+def typing(user_id, is_typing=True, thread_id="9"):
+    return {"type": "user_typing", "thread_id": thread_id, "user_id": user_id, "is_typing": is_typing}
+
+
+def test_slow_client_does_not_delay_the_rest_of_the_thread():
+    async def scenario():
+        worker = ConnectionManager()
+        slow, fast = StalledSocket(), FakeSocket()
+        await worker.connect(slow, "1")
+        await worker.connect(fast, "2")
+        for user_id in ("1", "2"):
+            worker.join_thread("9", user_id)
+
+        await worker.broadcast_to_thread("9", {"type": "new_message"})
+        await worker.broadcast_to_thread("9", {"type": "new_message"})
+        await settle()
+        depth = worker.stats()["outbound"]["max_queue_depth"]
+        slow.resume.set()
+        await settle()
+        await worker.stop()
+        return slow, fast, depth
+
+    slow, fast, depth = asyncio.run(scenario())
+
+    assert len(fast.sent) == 2
+    assert depth == 1
+    assert len(slow.sent) == 2
+
+
+def test_coalesce_keeps_only_the_latest_typing_state_per_user():
+    async def scenario():
+        socket = StalledSocket()
+        connection = ClientConnection(socket, "1", max_queue=10, policy="coalesce")
+        connection.send({"type": "new_message"})
+        await settle()
+        connection.send(typing("2"))
+        connection.send(typing("3"))
+        connection.send(typing("2", is_typing=False))
+        depth = connection.depth
+        socket.resume.set()
+        await settle()
+        connection.close()
+        return socket, depth, connection.counters
+
+    socket, depth, counters = asyncio.run(scenario())
+
+    assert depth == 2
+    assert socket.sent == [{"type": "new_message"}, typing("2", is_typing=False), typing("3")]
+    assert counters["coalesced"] == 1
+
+
+def test_full_queue_drops_typing_before_chat_and_closes_when_only_chat_is_left():
+    async def scenario():
+        socket = StalledSocket()
+        connection = ClientConnection(socket, "1", max_queue=2, policy="drop")
+        connection.send({"type": "new_message", "n": 0})
+        await settle()
+        connection.send(typing("2"))
+        connection.send({"type": "new_message", "n": 1})
+        refused_typing = connection.send(typing("3"))
+        evicted_for_chat = connection.send({"type": "new_message", "n": 2})
+        queued = connection.depth
+        refused_chat = connection.send({"type": "new_message", "n": 3})
+        socket.resume.set()
+        await settle()
+        return socket, connection.counters, refused_typing, evicted_for_chat, queued, refused_chat
+
+    socket, counters, refused_typing, evicted_for_chat, queued, refused_chat = asyncio.run(scenario())
+
+    assert refused_typing is False
+    assert evicted_for_chat is True
+    assert queued == 2
+    assert refused_chat is False
+    assert socket.closed_with == 1013
+    assert counters["slow_disconnects"] == 1
+    assert counters["dropped"] == 5
+
+
+def test_disconnect_policy_closes_as_soon_as_the_queue_is_full():
+    async def scenario():
+        socket = StalledSocket()
+        connection = ClientConnection(socket, "1", max_queue=1, policy="disconnect")
+        connection.send({"type": "new_message"})
+        await settle()
+        connection.send({"type": "new_message"})
+        accepted = connection.send(typing("2"))
+        socket.resume.set()
+        await settle()
+        return socket, accepted
+
+    socket, accepted = asyncio.run(scenario())
+
+    assert accepted is False
+    assert socket.closed_with == 1013
+
+
+def test_every_session_of_a_user_receives_and_closing_one_keeps_the_rest():
+    async def scenario():
+        worker = ConnectionManager()
+        laptop, phone = FakeSocket(), FakeSocket()
+        laptop_connection = await worker.connect(laptop, "1")
+        await worker.connect(phone, "1")
+        worker.join_thread("9", "1")
+
+        await worker.broadcast_to_thread("9", {"type": "new_message", "n": 1})
+        await settle()
+        worker.disconnect(laptop_connection)
+        worker.disconnect(laptop_connection)
+        await worker.broadcast_to_thread("9", {"type": "new_message", "n": 2})
+        await settle()
+        stats = worker.stats()
+        await worker.stop()
+        return laptop, phone, stats
+
+    laptop, phone, stats = asyncio.run(scenario())
+
+    assert [m["n"] for m in laptop.sent] == [1]
+    assert [m["n"] for m in phone.sent] == [1, 2]
+    assert stats["users"] == 1
+    assert stats["connections"] == 1
+
+
+def test_last_session_closing_drops_thread_membership():
+    async def scenario():
+        worker = ConnectionManager()
+        connection = await worker.connect(FakeSocket(), "1")
+        worker.join_thread("9", "1")
+        worker.join_thread("10", "1")
+        worker.disconnect(connection)
+        return worker
+
+    worker = asyncio.run(scenario())
+
+    assert worker.active_connections == {}
+    assert worker.thread_participants == {}
+    assert worker._user_threads == {}
+
+
+class RecordingBroadcast:
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, thread_id, message, exclude_user=None):
+        self.sent.append((message["user_id"], message["is_typing"]))
+
+
+def test_typing_bursts_are_throttled_to_the_latest_state_per_interval():
+    async def scenario():
+        broadcast = RecordingBroadcast()
+        coalescer = TypingCoalescer(broadcast, interval=0.05, ttl=10)
+        await coalescer.start()
+        for _ in range(20):
+            await coalescer.update("1", "2", True)
+        await coalescer.update("1", "2", False)
+        await coalescer.update("1", "2", True)
+        await coalescer.update("1", "2", False)
+        sent_before_interval = list(broadcast.sent)
+        await asyncio.sleep(0.1)
+        await coalescer.stop()
+        return broadcast.sent, sent_before_interval, coalescer.stats()
+
+    sent, sent_before_interval, stats = asyncio.run(scenario())
+
+    assert sent_before_interval == [("2", True)]
+    assert sent == [("2", True), ("2", False)]
+    assert stats["received"] == 23
+    assert stats["emitted"] == 2
+
+
+def test_change_reverted_within_the_interval_is_never_sent():
+    async def scenario():
+        broadcast = RecordingBroadcast()
+        coalescer = TypingCoalescer(broadcast, interval=0.05, ttl=10)
+        await coalescer.start()
+        await coalescer.update("1", "2", True)
+        await coalescer.update("1", "2", False)
+        await coalescer.update("1", "2", True)
+        await asyncio.sleep(0.1)
+        await coalescer.stop()
+        return broadcast.sent
+
+    assert asyncio.run(scenario()) == [("2", True)]
+
+
+def test_stale_typing_state_expires_as_stopped():
+    async def scenario():
+        broadcast = RecordingBroadcast()
+        coalescer = TypingCoalescer(broadcast, interval=0.01, ttl=0.1)
+        await coalescer.start()
+        await coalescer.update("1", "2", True)
+        await coalescer.update("1", "3", True)
+        await asyncio.sleep(0.06)
+        await coalescer.update("1", "3", True)
+        await asyncio.sleep(0.07)
+        partial = list(broadcast.sent)
+        await asyncio.sleep(0.2)
+        await coalescer.stop()
+        return partial, broadcast.sent, coalescer.stats()
+
+    partial, sent, stats = asyncio.run(scenario())
+
+    assert partial == [("2", True), ("3", True), ("3", True), ("2", False)]
+    assert sent[-1] == ("3", False)
+    assert stats["expired"] == 2
+    assert stats["active"] == 0
+
+
+def test_stopping_the_manager_sends_queued_messages_before_closing():
+    async def scenario():
+        manager = ConnectionManager()
+        await manager.start()
+        socket = FakeSocket()
+        connection = await manager.connect(socket, "1")
+        connection.send({"type": "message_persisted", "id": "5"})
+        await manager.stop()
+        return socket, connection.send({"type": "late"})
+
+    socket, accepted_after_stop = asyncio.run(scenario())
+
+    assert socket.sent == [{"type": "message_persisted", "id": "5"}]
+    assert socket.closed_with is not None
+    assert not accepted_after_stop
+
+
+def test_typing_longer_than_the_ttl_stays_on_while_heartbeats_arrive():
+    async def scenario():
+        broadcast = RecordingBroadcast()
+        coalescer = TypingCoalescer(broadcast, interval=0.05, ttl=0.1)
+        await coalescer.start()
+        # A 0.4s session, well past the TTL, with a heartbeat every 0.03s.
+        for _ in range(14):
+            await coalescer.update("1", "2", True)
+            await asyncio.sleep(0.03)
+        during = list(broadcast.sent)
+        await asyncio.sleep(0.2)
+        await coalescer.stop()
+        return during, broadcast.sent, coalescer.stats()
+
+    during, sent, stats = asyncio.run(scenario())
+
+    assert ("2", False) not in during
+    # Heartbeats are passed on as refreshes, at most one per interval.
+    assert 2 <= len(during) <= 9
+    assert set(during) == {("2", True)}
+    assert sent[-1] == ("2", False)
+    assert stats["expired"] == 1
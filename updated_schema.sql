@@ -12,15 +12,39 @@ WITH ranked_threads AS (
     JOIN thread_participants tp ON t.thread_id = tp.thread_id
     GROUP BY t.thread_id, t.created_at
 )
-DELETE FROM message_reads
-WHERE message_id IN (
-    SELECT m.message_id 
-    FROM messages m
-    WHERE m.thread_id IN (
-        SELECT thread_id FROM ranked_threads WHERE rn > 1
-    )
+UPDATE chat_threads
+SET last_message_id = NULL
+WHERE thread_id IN (
+    SELECT thread_id FROM ranked_threads WHERE rn > 1
 );
 
+-- message_reads is kept after the read-watermark migration until it is
+-- dropped explicitly; clear its rows for the messages deleted below.
+DO $$
+BEGIN
+    IF to_regclass('message_reads') IS NOT NULL THEN
+        WITH ranked_threads AS (
+            SELECT 
+                t.thread_id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY ARRAY_AGG(tp.user_id ORDER BY tp.user_id)
+                    ORDER BY t.created_at ASC
+                ) as rn
+            FROM chat_threads t
+            JOIN thread_participants tp ON t.thread_id = tp.thread_id
+            GROUP BY t.thread_id, t.created_at
+        )
+        DELETE FROM message_reads
+        WHERE message_id IN (
+            SELECT m.message_id
+            FROM messages m
+            WHERE m.thread_id IN (
+                SELECT thread_id FROM ranked_threads WHERE rn > 1
+            )
+        );
+    END IF;
+END $$;
+
 WITH ranked_threads AS (
     SELECT 
         t.thread_id,